@@ -1,17 +1,34 @@
-import pandas as pd
+import os
+import queue
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from startup import lazy_import
 
-TELEGRAM_BOT_TOKEN = "7978817256:AAFF-ZMYSEFSNGiJxumkRfjrMsj3UI1AT7Y"
-CHAT_ID = 6363167802
+pd = lazy_import('pandas')  # Only for DataFrame-shaped alert payloads
 
-def send_telegram_message(symbol, price, df):
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "7978817256:AAFF-ZMYSEFSNGiJxumkRfjrMsj3UI1AT7Y")
+CHAT_ID = int(os.getenv("TELEGRAM_CHAT_ID", "6363167802"))
+
+# ✅ Dispatcher Parameters
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")  # Point at a local stub for testing
+ALERT_QUEUE_SIZE = 1000  # Alerts beyond this are dropped rather than blocking detection
+DIGEST_WINDOW = 2.0  # Seconds to gather alerts into one digest message
+CHAT_MIN_INTERVAL = 1.0  # Telegram allows about one message per second per chat
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 3
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit per message
+CLOSE_TIMEOUT = 5.0  # Seconds an exiting bot waits for queued alerts (the watchdog kills it after 15)
+
+def format_breakout_message(symbol, price, df):
     if isinstance(df, dict):
         df = pd.DataFrame(df)  # ✅ Convert dictionary to DataFrame
 
     latest_close = df['close'].iloc[-1]
     high = df['high'].iloc[-1]  # ✅ Ensure this column exists
 
-    message = (
+    return (
         f"🚀 {symbol} breakout! 📈\n"
         f"Price: {price}\n"
         f"Check Kraken for details.\n\n"
@@ -20,19 +37,156 @@ def send_telegram_message(symbol, price, df):
         f"🔹 % Change: {(latest_close / high - 1) * 100:.2f}%"
     )
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": CHAT_ID,
-        "text": message
-    }
+def _digest_chunks(messages, header=None, limit=MAX_MESSAGE_LENGTH):
+    """Joins header + messages into as few texts as fit Telegram's length limit: [(text, messages in it)]."""
+    chunks, current, count = [], "", 0
+    for message, alerts in ([(header, 0)] if header else []) + [(message, 1) for message in messages]:
+        message = message[:limit]
+        candidate = f"{current}\n\n{message}" if current else message
+        if len(candidate) > limit:
+            chunks.append((current, count))
+            candidate, count = message, 0
+        current = candidate
+        count += alerts
+    if current:
+        chunks.append((current, count))
+    return chunks
 
-    response = requests.post(url, data=payload)
-    return response.json()  # ✅ For debugging purposes
+class AlertDispatcher:
+    """Sends alerts from one background thread over a pooled session.
 
-# ✅ Test the function only when running the script directly
-if __name__ == "__main__":
-    send_telegram_message('TEST/USD', 99999, {
-        'close': [99999], 'high': [100000], 'RSI': [70], 'MA20': [98000], 'MA50': [97000]
-    })
+    send() only enqueues, so a slow Telegram API never stalls detection. Alerts that arrive within
+    DIGEST_WINDOW of each other go out as one digest, messages to the chat are spaced at least
+    CHAT_MIN_INTERVAL apart, and 429 responses are retried after Telegram's retry_after.
+    """
+
+    def __init__(self, token=TELEGRAM_BOT_TOKEN, chat_id=CHAT_ID, api_url=TELEGRAM_API_URL,
+                 window=DIGEST_WINDOW, min_interval=CHAT_MIN_INTERVAL, queue_size=ALERT_QUEUE_SIZE):
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.window = window
+        self.min_interval = min_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.session = requests.Session()
+        self.session.mount(api_url, HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.last_sent = 0.0
+        self.stats = {'queued': 0, 'dropped': 0, 'messages': 0, 'alerts_sent': 0, 'failed': 0, 'alerts_failed': 0,
+                      'rate_limited': 0}
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def send(self, text):
+        """Queues an alert; returns False (and counts a drop) if the queue is full."""
+        try:
+            self.queue.put_nowait(text)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['queued'] += 1
+        return True
+
+    def flush(self, timeout=None):
+        """Blocks until every queued alert has been sent (or given up on); False if timeout ran out first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Gives queued alerts up to timeout seconds to go out (the thread is a daemon and dies with the process)."""
+        if not self.flush(timeout):
+            print(f"⚠️ Exiting with {self.queue.unfinished_tasks} alerts not sent")
+        self.session.close()
 
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                header = f"📣 {len(batch)} alerts" if len(batch) > 1 else None
+                for chunk, alerts in _digest_chunks(batch, header):
+                    # Only alerts in a message Telegram accepted count as sent
+                    if self._post(chunk):
+                        self.stats['messages'] += 1
+                        self.stats['alerts_sent'] += alerts
+                    else:
+                        self.stats['failed'] += 1
+                        self.stats['alerts_failed'] += alerts
+            except Exception as e:
+                print(f"❌ Error sending alerts: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
 
+    def _post(self, text):
+        for attempt in range(MAX_RETRIES + 1):
+            wait = self.last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_sent = time.monotonic()
+            try:
+                response = self.session.post(self.url, data={"chat_id": self.chat_id, "text": text},
+                                             timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                print(f"⚠️ Telegram request failed ({e}), attempt {attempt + 1}/{MAX_RETRIES + 1}")
+                time.sleep(2 ** attempt)
+                continue
+
+            if response.status_code == 429:
+                self.stats['rate_limited'] += 1
+                try:
+                    retry_after = response.json().get('parameters', {}).get('retry_after', 2 ** attempt)
+                except ValueError:
+                    retry_after = 2 ** attempt
+                print(f"⚠️ Telegram flood limit, retrying in {retry_after}s...")
+                time.sleep(retry_after)
+                continue
+            if response.status_code >= 500:
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code != 200:
+                print(f"❌ Telegram rejected alert: {response.status_code} {response.text[:200]}")
+                return False
+            return True
+        return False
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """The process-wide dispatcher, started on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+        return _dispatcher
+
+def close_dispatcher(timeout=CLOSE_TIMEOUT):
+    """Flushes and closes the process-wide dispatcher, if one was started (call on exit)."""
+    with _dispatcher_lock:
+        dispatcher = _dispatcher
+    if dispatcher is not None:
+        dispatcher.close(timeout)
+
+def send_telegram_message(symbol, price, df):
+    """Queues a breakout alert for the background dispatcher; returns False if it had to be dropped."""
+    return get_dispatcher().send(format_breakout_message(symbol, price, df))
+
+# ✅ Test the function only when running the script directly (tests/test_alerts.py runs it against a stub server)
+if __name__ == "__main__":
+    sample = {'close': [99999], 'high': [100000], 'RSI': [70], 'MA20': [98000], 'MA50': [97000]}
+    send_telegram_message('TEST/USD', 99999, sample)
+    close_dispatcher()
+    print(f"✅ {get_dispatcher().stats}")
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+import rate_limiter
+from price_snapshot import fetch_price_snapshot_async
+import candle_store
+import market_cache
+from universe_buffer import UniverseBuffer
+
+# ✅ Scanner Parameters
+MAX_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "10"))  # Requests allowed in flight at once
+CYCLE_SECONDS = 60  # Target time between the start of two sweeps
+breakout_threshold = 50  # How many past candles to check for breakouts
+
+def create_exchange(scheduler=None):
+    """Creates an async Kraken client; the process-wide request scheduler keeps us inside the rate budget."""
+    return rate_limiter.create_async_exchange(scheduler=scheduler)
+
+async def get_all_trading_pairs(exchange):
+    """Fetch all available trading pairs from Kraken and include both USDT and USD pairs."""
+    try:
+        markets = await market_cache.load_markets_async(exchange)
+        return [pair for pair in markets if pair.endswith(("/USDT", "/USD"))]
+    except Exception as e:
+        print(f"❌ Error fetching trading pairs: {e}")
+        return []
+
+async def update_candles(exchange, semaphore, universe, symbol, timeframe="5m", limit=breakout_threshold,
+                         store_dir=candle_store.CANDLE_STORE_DIR):
+    """Stores the candles we don't have yet and feeds them to the universe buffer (which keeps the rolling high)."""
+    async with semaphore:
+        try:
+            await candle_store.update_async(exchange, symbol, timeframe, limit=limit, store_dir=store_dir)
+            universe.sync(symbol, timeframe, store_dir=store_dir)
+            return True
+        except Exception as e:
+            print(f"❌ Error fetching OHLCV for {symbol}: {e}")
+            return False
+
+def universe_buffer(trading_pairs=()):
+    """Buffer for scan_once: 'breakout_threshold' candles = the closed window plus the forming candle."""
+    return UniverseBuffer(trading_pairs, window=breakout_threshold - 1)
+
+async def scan_once(exchange, trading_pairs, concurrency=MAX_CONCURRENCY, store_dir=candle_store.CANDLE_STORE_DIR,
+                    universe=None):
+    """Checks every pair once and returns (breakouts, sweep_seconds).
+
+    Pass the same universe buffer every sweep; without one it is rebuilt from the store.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    universe = universe_buffer(trading_pairs) if universe is None else universe
+    universe.add(trading_pairs)
+
+    # One batched ticker snapshot for the whole universe, then the OHLCV requests fan out
+    prices = await fetch_price_snapshot_async(exchange, trading_pairs)
+    updated = await asyncio.gather(*(update_candles(exchange, semaphore, universe, pair, store_dir=store_dir)
+                                     for pair in trading_pairs))
+
+    # ✅ One vectorized check over the whole universe: price above the high of the last 'breakout_threshold' candles
+    checked = [pair for pair, ok in zip(trading_pairs, updated) if ok]
+    breakouts = universe.breakouts(universe.prices_array(prices), checked,
+                                   include_current=True, above_ma=False, min_closed=0)
+    return breakouts, time.perf_counter() - start
+
+async def run_scanner(on_breakout, trading_pairs=None, concurrency=MAX_CONCURRENCY, scheduler=None):
+    """Runs sweeps forever, calling on_breakout(symbol, price) for every breakout found."""
+    exchange = create_exchange(scheduler)
+    try:
+        if trading_pairs is None:
+            trading_pairs = await get_all_trading_pairs(exchange)
+            print(f"✅ Loaded {len(trading_pairs)} trading pairs from Kraken.")
+        else:
+            await market_cache.load_markets_async(exchange)
+        universe = universe_buffer(trading_pairs)
+
+        while True:
+            print(f"\n🔄 [{datetime.now(timezone.utc).isoformat()}] Checking all trading pairs ({len(trading_pairs)}) "
+                  f"with concurrency {concurrency}...\n")
+
+            breakouts, elapsed = await scan_once(exchange, trading_pairs, concurrency, universe=universe)
+            for pair, price in breakouts:
+                on_breakout(pair, price)
+
+            rate = len(trading_pairs) / elapsed if elapsed > 0 else 0
+            print(f"⏱️ Sweep finished in {elapsed:.2f}s ({len(trading_pairs)} pairs, {rate:.1f} pairs/sec, "
+                  f"{len(breakouts)} breakouts)")
+
+            # Only wait out whatever is left of the cycle
+            wait = max(0, CYCLE_SECONDS - elapsed)
+            print(f"⏳ Waiting {wait:.0f} seconds before the next check...\n")
+            await asyncio.sleep(wait)
+    finally:
+        await exchange.close()
+
+def print_breakout(symbol, price):
+    """Default breakout handler when the scanner runs on its own."""
+    print(f"[{datetime.now(timezone.utc).isoformat()}] 🚀 Breakout detected: {symbol} at {price}")
+
+if __name__ == "__main__":
+    asyncio.run(run_scanner(print_breakout))
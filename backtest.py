@@ -1,19 +1,21 @@
-import ccxt
-import pandas as pd
+import startup
+import rate_limiter
+from price_snapshot import PriceSnapshot, fetch_price_snapshot
+from post_breakout_scheduler import PostBreakoutScheduler
+import candle_store
+import market_cache
 from datetime import datetime, timezone
-import time
+
+pd = startup.lazy_import('pandas')  # Only needed for the CSV export
 
 # Initialize Kraken API
-exchange = ccxt.kraken({
-    'rateLimit': 1000,
-    'enableRateLimit': True
-})
+exchange = rate_limiter.create_exchange()  # Token-bucket throttling and backoff for every request
 
 # ✅ Fetch all trading pairs from Kraken, ensuring more pairs are included
 def get_all_trading_pairs():
     """Fetch all available trading pairs from Kraken and include both USDT and USD pairs."""
     try:
-        markets = exchange.load_markets()
+        markets = market_cache.load_markets(exchange)  # ✅ Disk-cached, refreshed in the background when stale
         return [pair for pair in markets if pair.endswith(("/USDT", "/USD"))]  # ✅ Include USD pairs too
     except Exception as e:
         print(f"❌ Error fetching trading pairs: {e}")
@@ -23,25 +25,26 @@ def get_all_trading_pairs():
 trading_pairs = get_all_trading_pairs()
 print(f"✅ Loaded {len(trading_pairs)} trading pairs from Kraken.")
 
+# ✅ Prices for every pair come from one batched snapshot instead of a ticker call per pair
+price_snapshot = PriceSnapshot(exchange, trading_pairs)
+
 tracking_intervals = [300, 900, 3600]  # 5 min, 15 min, 1 hour
 breakout_data = []
 breakout_threshold = 50  # How many past candles to check for breakouts
 
 def fetch_latest_price(symbol):
-    """Fetches the latest price for a given trading pair."""
-    try:
-        ticker = exchange.fetch_ticker(symbol)
-        return ticker['last']
-    except Exception as e:
-        print(f"❌ Error fetching price for {symbol}: {e}")
-        return None
+    """Fetches the latest price for a given trading pair from the shared snapshot."""
+    price = price_snapshot.get(symbol)
+    if price is None:
+        print(f"❌ No snapshot price for {symbol}")
+    return price
 
 def fetch_historical_high(symbol, timeframe="5m", limit=breakout_threshold):
     """Fetches the highest price from the last 'N' candles."""
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        highs = [candle[2] for candle in ohlcv]  # Extract high prices
-        return max(highs) if highs else None
+        candle_store.update(exchange, symbol, timeframe, limit=limit)  # Only candles we don't have yet
+        highs = candle_store.load(symbol, timeframe, limit=limit)[:, 2]  # Extract high prices
+        return highs.max() if len(highs) else None
     except Exception as e:
         print(f"❌ Error fetching OHLCV for {symbol}: {e}")
         return None
@@ -50,22 +53,34 @@ def log_breakout(symbol, breakout_price):
     """Logs the breakout event and schedules price tracking."""
     timestamp = datetime.now(timezone.utc).isoformat()
     breakout_record = {
+        "id": f"{symbol}@{timestamp}",
         "timestamp": timestamp,
         "symbol": symbol,
         "breakout_price": breakout_price,
         "post_prices": {interval: None for interval in tracking_intervals}
     }
     breakout_data.append(breakout_record)
+    records_by_id[breakout_record["id"]] = breakout_record
     print(f"[{timestamp}] 🚀 Breakout detected: {symbol} at {breakout_price}")
 
     for interval in tracking_intervals:
-        threading.Timer(interval, fetch_post_breakout_price, args=(breakout_record, interval)).start()
+        post_breakout_scheduler.schedule(breakout_record["id"], symbol, interval, interval=interval)
+
+def fetch_post_breakout_price(check, post_price):
+    """Records a post-breakout price once its scheduled check comes due."""
+    interval = check["interval"]
+    record = records_by_id.get(check["id"])
+    if record is not None:
+        record["post_prices"][interval] = post_price
+    print(f"[{datetime.now(timezone.utc).isoformat()}] 🕒 {interval // 60} min post-breakout price for {check['symbol']}: {post_price}")
 
-def fetch_post_breakout_price(record, interval):
-    """Fetches post-breakout prices after a set time interval."""
-    post_price = fetch_latest_price(record["symbol"])
-    record["post_prices"][interval] = post_price
-    print(f"[{datetime.now(timezone.utc).isoformat()}] 🕒 {interval // 60} min post-breakout price for {record['symbol']}: {post_price}")
+# ✅ One scheduler thread serves every pending check, due checks share one batched price fetch.
+# Nothing is saved to disk: this is a one-shot run, and checks left over from an aborted run would
+# have no records to fill in and only hold up the drain below.
+records_by_id = {}
+post_breakout_scheduler = PostBreakoutScheduler(
+    lambda symbols: fetch_price_snapshot(exchange, symbols), fetch_post_breakout_price, path=None
+).start()
 
 def save_to_csv():
     """Saves breakout and post-breakout data to CSV."""
@@ -86,9 +101,9 @@ for pair in trading_pairs:
             log_breakout(pair, latest_price)
         else:
             print(f"❌ No breakout detected for {pair}.")
-    
-    # Sleep between tests
-    time.sleep(2)
 
-# Save results
+# Wait for the scheduled post-breakout checks, then save results
+if post_breakout_scheduler.pending():
+    print(f"⏳ Waiting for {post_breakout_scheduler.pending()} post-breakout price checks...")
+    post_breakout_scheduler.drain()
 save_to_csv()
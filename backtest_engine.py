@@ -0,0 +1,120 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+import candle_store
+from exit_resolver import first_touch
+
+# ✅ Backtest Parameters
+TIMEFRAME = '5m'
+LOOKBACK = 50  # Candles that make up the rolling high
+THRESHOLD = 0.0  # Fraction above the rolling high needed to enter (0.001 = 0.1%)
+TAKE_PROFIT = 0.05  # 5% target
+STOP_LOSS = 0.02  # 2% stop
+MIN_CONFIRMATIONS = 1  # Consecutive closes above the rolling high before entering
+MAX_HOLD = 288  # Candles before an open trade is closed at market (1 day of 5m candles)
+OUTPUT_FILE = 'backtest_engine_trades.csv'
+
+def breakout_entries(high, close, lookback=LOOKBACK, threshold=THRESHOLD, min_confirmations=MIN_CONFIRMATIONS):
+    """Indices where the close has been above the previous 'lookback' highs for 'min_confirmations' candles in a row."""
+    rolling_high = pd.Series(high).rolling(lookback).max().shift(1).to_numpy()
+    signal = close > rolling_high * (1 + threshold)  # NaN highs compare False
+
+    # Length of the current run of breakout closes, 0 where there is none
+    idx = np.arange(len(signal))
+    run_length = idx - np.maximum.accumulate(np.where(signal, -1, idx))
+    return np.flatnonzero(run_length == min_confirmations)
+
+def resolve_exits(high, low, close, entries, take_profit=TAKE_PROFIT, stop_loss=STOP_LOSS, max_hold=MAX_HOLD):
+    """Finds the first candle after each entry that touches the target or the stop.
+
+    Works on an (entries x max_hold) window view, so every entry is resolved at once. When one
+    candle touches both levels we assume the stop came first. Entries are evaluated independently.
+    """
+    n = len(close)
+    entry_price = close[entries]
+    target = entry_price * (1 + take_profit)
+    stop = entry_price * (1 - stop_loss)
+
+    first_target, first_stop = first_touch(high[1:], low[1:], entries, target, stop, max_hold)
+
+    stopped = (first_stop <= first_target) & (first_stop < max_hold)
+    targeted = ~stopped & (first_target < max_hold)
+    offset = np.minimum(first_target, first_stop)
+    timeout_idx = np.minimum(entries + max_hold, n - 1)
+    exit_idx = np.where(stopped | targeted, entries + 1 + offset, timeout_idx)
+    exit_price = np.where(stopped, stop, np.where(targeted, target, close[timeout_idx]))
+    outcome = np.where(stopped, 'stop', np.where(targeted, 'target', 'timeout'))
+    return exit_idx, exit_price, outcome
+
+def backtest_series(symbol, data, lookback=LOOKBACK, threshold=THRESHOLD, take_profit=TAKE_PROFIT,
+                    stop_loss=STOP_LOSS, max_hold=MAX_HOLD, min_confirmations=MIN_CONFIRMATIONS):
+    """Runs the breakout strategy over one stored OHLCV array and returns its trades."""
+    timestamps, high, low, close = data[:, 0], data[:, 2], data[:, 3], data[:, 4]
+    entries = breakout_entries(high, close, lookback, threshold, min_confirmations)
+    if len(entries) == 0:
+        return pd.DataFrame()
+
+    exit_idx, exit_price, outcome = resolve_exits(high, low, close, entries, take_profit, stop_loss, max_hold)
+    entry_price = close[entries]
+    return pd.DataFrame({
+        'symbol': symbol,
+        'entry_time': pd.to_datetime(timestamps[entries], unit='ms', utc=True),
+        'entry_price': entry_price,
+        'exit_time': pd.to_datetime(timestamps[exit_idx], unit='ms', utc=True),
+        'exit_price': exit_price,
+        'outcome': outcome,
+        'bars_held': exit_idx - entries,
+        'pnl_pct': (exit_price / entry_price - 1) * 100,
+    })
+
+def run_backtest(symbols, timeframe=TIMEFRAME, **params):
+    """Backtests every symbol's stored candles and returns all trades in one DataFrame."""
+    trades = []
+    for symbol in symbols:
+        data = candle_store.open_memmap(symbol, timeframe)
+        if len(data) > params.get('lookback', LOOKBACK) + 1:
+            trades.append(backtest_series(symbol, np.asarray(data), **params))
+    trades = [t for t in trades if not t.empty]
+    return pd.concat(trades, ignore_index=True) if trades else pd.DataFrame()
+
+def summarize(trades):
+    """Aggregate PnL stats for a trades DataFrame."""
+    if trades.empty:
+        return {'trades': 0, 'win_rate': 0.0, 'total_pnl_pct': 0.0, 'avg_pnl_pct': 0.0}
+    return {
+        'trades': len(trades),
+        'win_rate': (trades['pnl_pct'] > 0).mean() * 100,
+        'total_pnl_pct': trades['pnl_pct'].sum(),
+        'avg_pnl_pct': trades['pnl_pct'].mean(),
+        'targets': int((trades['outcome'] == 'target').sum()),
+        'stops': int((trades['outcome'] == 'stop').sum()),
+        'timeouts': int((trades['outcome'] == 'timeout').sum()),
+    }
+
+def main():
+    timeframe = sys.argv[1] if len(sys.argv) > 1 else TIMEFRAME
+    symbols = candle_store.stored_symbols(timeframe)
+    if not symbols:
+        print(f"❌ No stored {timeframe} candles found in {candle_store.CANDLE_STORE_DIR}. Run the bot first!")
+        return
+
+    start = time.perf_counter()
+    trades = run_backtest(symbols, timeframe)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(trades)
+    print(f"\n📊 **Backtest Summary** ({len(symbols)} symbols, {timeframe}, {elapsed:.2f}s)")
+    print(f"🔹 Trades: {summary['trades']}")
+    if summary['trades']:
+        print(f"✅ Targets: {summary['targets']}  ❌ Stops: {summary['stops']}  ⏸ Timeouts: {summary['timeouts']}")
+        print(f"✅ Win Rate: {summary['win_rate']:.2f}%")
+        print(f"💰 Total PnL: {summary['total_pnl_pct']:.2f}% (avg {summary['avg_pnl_pct']:.3f}% per trade)")
+        print("\n🚀 Best Symbols:")
+        print(trades.groupby('symbol')['pnl_pct'].sum().sort_values(ascending=False).head(5))
+
+    trades.to_csv(OUTPUT_FILE, index=False)
+    print(f"\n📂 Trades saved to '{OUTPUT_FILE}'")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
-import ccxt
-import pandas as pd
+import startup
+import rate_limiter
 import time
+import candle_store
+import market_cache
 from datetime import datetime
 
+pd = startup.lazy_import('pandas')  # Only needed for the results table
+
 # Initialize Kraken API
-exchange = ccxt.kraken()
+exchange = rate_limiter.create_exchange()  # Token-bucket throttling and backoff for every request
 
 # Fetch all trading pairs from Kraken, ensuring more pairs are included
 def get_all_trading_pairs():
     try:
-        markets = exchange.load_markets()
+        markets = market_cache.load_markets(exchange)  # Disk-cached, refreshed in the background when stale
         return [pair for pair in markets if pair.endswith(("/USDT", "/USD"))]
     except Exception as e:
         print(f"❌ Error fetching trading pairs: {e}")
@@ -24,7 +28,8 @@ def backtest(symbol):
     print(f"Testing {symbol}...")
 
     # Fetch historical data for the last 24 hours (1-hour timeframe)
-    ohlcv = exchange.fetch_ohlcv(symbol, '1h', limit=24)
+    candle_store.update(exchange, symbol, '1h', limit=24)
+    ohlcv = candle_store.load(symbol, '1h', limit=24).tolist()
 
     # Extract the closing prices and calculate percentage change
     closes = [candle[4] for candle in ohlcv]  # Close price is the 5th item
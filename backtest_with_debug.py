@@ -1,20 +1,18 @@
-import ccxt
+import rate_limiter
 import pandas as pd
-import time
+import candle_store
 from datetime import datetime, timezone
 
 # Initialize Kraken API
-exchange = ccxt.kraken({
-    'rateLimit': 1000,
-    'enableRateLimit': True
-})
+exchange = rate_limiter.create_exchange()  # Token-bucket throttling and backoff for every request
 
 # Simulate Breakout Strategy for Backtesting
 def backtest(symbol, timeframe='5m', limit=50, threshold=1.5, take_profit_pct=1.02, stop_loss_pct=0.98):
     """Backtest breakout strategy with exit rules (take profit and stop loss)."""
     
-    # Fetch historical data
-    df = pd.DataFrame(exchange.fetch_ohlcv(symbol, timeframe, limit=limit), columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    # Fetch historical data (shared local candle store, only new candles are downloaded)
+    candle_store.update(exchange, symbol, timeframe, limit=limit)
+    df = pd.DataFrame(candle_store.load(symbol, timeframe, limit=limit), columns=candle_store.CANDLE_COLUMNS)
     
     # Calculate ATR (simplified)
     df['ATR'] = df['high'] - df['low']
@@ -64,7 +62,6 @@ for symbol in symbols:
         "symbol": symbol,
         "pnl": pnl
     })
-    time.sleep(1)  # Simulate time delay for each pair
 
 # Log the results
 df_results = pd.DataFrame(results)
@@ -1,12 +1,9 @@
-import ccxt
-import time
+import rate_limiter
 import pandas as pd
+import candle_store
 
 # Initialize Kraken API
-exchange = ccxt.kraken({
-    'rateLimit': 1000,
-    'enableRateLimit': True
-})
+exchange = rate_limiter.create_exchange()  # Token-bucket throttling and backoff for every request
 
 # Define symbols to test
 symbols = ["BTC/USDT", "ETH/USDT"]
@@ -16,8 +13,8 @@ backtest_results = []
 
 # Fetch historical data for a given symbol
 def fetch_historical_data(symbol, timeframe='5m', limit=200):
-    ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-    return pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    candle_store.update(exchange, symbol, timeframe, limit=limit)
+    return pd.DataFrame(candle_store.load(symbol, timeframe, limit=limit), columns=candle_store.CANDLE_COLUMNS)
 
 # Run backtest for each symbol
 for symbol in symbols:
@@ -47,8 +44,6 @@ for symbol in symbols:
             'status': 'No Breakout'
         })
 
-    time.sleep(1)  # To avoid rate-limiting issues
-
 # Save results to CSV
 df_results = pd.DataFrame(backtest_results)
 df_results.to_csv('/Users/jameserskine/Documents/backtest_results_with_threshold.csv', index=False)
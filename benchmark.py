@@ -0,0 +1,382 @@
+import asyncio
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+
+# ✅ Benchmark Parameters
+BENCH_SIZES = [int(size) for size in os.getenv("BENCH_SIZES", "50,200,1000").split(",")]
+BENCH_LATENCY = float(os.getenv("BENCH_LATENCY", "0.0"))  # Seconds added to every fake-exchange request
+BENCH_REPEATS = int(os.getenv("BENCH_REPEATS", "5"))  # Timed iterations per benchmark and size
+BENCH_DIR = os.getenv("BENCH_DIR", os.path.join(tempfile.gettempdir(), "breakout_bench"))
+RESULTS_FILE = os.getenv("BENCH_RESULTS", os.path.join(BENCH_DIR, "benchmark_results.jsonl"))  # Set it to keep the history past a reboot
+REGRESSION_PCT = 10  # p50 slowdown that compare flags as a regression
+FIXTURE_CANDLES = 2016  # One week of 5m candles per fixture symbol
+FIXTURE_END = 1_735_689_600_000  # 2025-01-01 UTC, fixed so the fixtures never change
+
+# ✅ Sandbox: the bot modules read these at import time, so everything they write stays under BENCH_DIR
+os.makedirs(os.path.join(BENCH_DIR, "home", "Documents"), exist_ok=True)
+os.environ.update({
+    "HOME": os.path.join(BENCH_DIR, "home"),
+    "CANDLE_STORE_DIR": os.path.join(BENCH_DIR, "store"),
+    "BREAKOUT_JOURNAL": os.path.join(BENCH_DIR, "home", "Documents", "breakout_journal.db"),
+    "KRAKEN_API_KEY": os.getenv("KRAKEN_API_KEY", "benchmark"),
+    "KRAKEN_API_SECRET": os.getenv("KRAKEN_API_SECRET", "benchmark"),
+})
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "trading_bot", "datasets"))
+
+import candle_store
+import resample
+import rate_limiter
+import async_scanner
+import market_cache
+import backtest_engine
+from exit_resolver import resolve_exits
+from fake_exchange import FakeExchange, AsyncFakeExchange
+from streaming_indicators import IndicatorState
+from prefilter import CandidateFilter
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+UNLIMITED = {endpoint: (1e9, 1e9) for endpoint in rate_limiter.ENDPOINT_BUDGETS}  # Measure our code, not the throttle
+
+# ✅ Recorded OHLCV Fixtures (generated once, deterministic, reused by every run)
+def fixture_symbols(n):
+    return [f"COIN{i}/USD" for i in range(n)]
+
+def ensure_fixtures(n):
+    """Writes 5m and 1h fixture series for the first n symbols that don't have them yet."""
+    for i, symbol in enumerate(fixture_symbols(n)):
+        if candle_store.row_count(symbol, '5m', FIXTURE_DIR) == FIXTURE_CANDLES:
+            continue
+        rng = np.random.default_rng(i)
+        timestamps = FIXTURE_END - np.arange(FIXTURE_CANDLES)[::-1] * 300_000
+        close = (1 + i % 100) * np.exp(np.cumsum(rng.normal(0, 0.003, FIXTURE_CANDLES)))
+        open_ = np.r_[close[0], close[:-1]]
+        high = np.maximum(open_, close) * (1 + rng.random(FIXTURE_CANDLES) * 0.004)
+        low = np.minimum(open_, close) * (1 - rng.random(FIXTURE_CANDLES) * 0.004)
+        candles = np.column_stack([timestamps, open_, high, low, close, rng.random(FIXTURE_CANDLES) * 1e4])
+        for timeframe in ('5m', '1h'):
+            if os.path.exists(candle_store.series_path(symbol, timeframe, FIXTURE_DIR)):
+                os.remove(candle_store.series_path(symbol, timeframe, FIXTURE_DIR))
+        candle_store.write(symbol, '5m', candles, FIXTURE_DIR)
+        candle_store.write(symbol, '1h', resample.resample(candles, '1h'), FIXTURE_DIR)
+
+def fresh_dir(path):
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    return path
+
+def load_kraken_test(symbols, latency=BENCH_LATENCY):
+    """Imports kraken_test inside the sandbox, alerts off, on a fresh store and a fake exchange."""
+    import kraken_test
+    kraken_test.send_telegram_message = lambda *args, **kwargs: True
+    fresh_dir(candle_store.CANDLE_STORE_DIR)
+    fake = FakeExchange(symbols=symbols, latency=latency)
+    kraken_test.set_exchange(rate_limiter.ScheduledExchange(fake, rate_limiter.RequestScheduler(UNLIMITED)))
+    kraken_test.price_snapshot.track(symbols)
+    kraken_test.indicator_states.clear()
+    kraken_test.market_states.states.clear()
+    return kraken_test, fake
+
+def request_count(exchange):
+    return sum(exchange.requests.values())
+
+# ✅ Benchmarks: each setup(n) returns run(), a zero-argument callable doing one iteration, and the fake exchange (if any)
+def setup_kraken_sweep(n):
+    """kraken_test.scan_once (pre-filter, regime gate, multi-timeframe confirmation) after a warm-up sweep."""
+    symbols = fixture_symbols(n)
+    kraken_test, fake = load_kraken_test(symbols)
+    candidate_filter, hot_symbols = CandidateFilter(), set()
+
+    def run():
+        kraken_test.scan_once(symbols, candidate_filter, hot_symbols, on_breakout=lambda symbol, price: None)
+    run()  # Warm-up: seeds the candle store, indicator states and rolling highs
+    return run, fake
+
+def scheduled_fake_exchange(symbols, latency=BENCH_LATENCY):
+    """A fake exchange behind an unthrottled scheduler; module-level so spawned workers can unpickle it."""
+    return rate_limiter.ScheduledExchange(FakeExchange(symbols=symbols, latency=latency),
+                                          rate_limiter.RequestScheduler(UNLIMITED))
+
+def setup_sharded_sweep(n):
+    """sharded_scanner: one sweep across SCANNER_WORKERS worker processes, breakouts collected by the coordinator."""
+    import atexit
+    import functools
+    import sharded_scanner
+    symbols = fixture_symbols(n)
+    fresh_dir(candle_store.CANDLE_STORE_DIR)
+    checkpoint_dir = fresh_dir(os.path.join(BENCH_DIR, "sharded_checkpoints"))
+    coordinator = sharded_scanner.Coordinator(
+        lambda symbol, price, payload: None, exchange_factory=functools.partial(scheduled_fake_exchange, symbols),
+        worker_env={"CHECKPOINT_FILE": os.path.join(checkpoint_dir, "checkpoint.bin")}, quiet=True,
+    ).start(symbols)
+    atexit.register(coordinator.stop)
+
+    def run():
+        coordinator.sweep()
+    run()  # Warm-up: worker imports, then the first sweep seeds the store and indicator states
+    return run, None
+
+def setup_confirm_all(n):
+    """confirm_breakout on every symbol (no pre-filter), the worst case per sweep."""
+    symbols = fixture_symbols(n)
+    kraken_test, fake = load_kraken_test(symbols)
+
+    def run():
+        for symbol in symbols:
+            kraken_test.confirm_breakout(symbol)
+    run()
+    return run, fake
+
+def setup_async_scan(n):
+    """async_scanner.scan_once: one ticker snapshot plus concurrent incremental OHLCV updates."""
+    symbols = fixture_symbols(n)
+    fake = AsyncFakeExchange(symbols=symbols, latency=BENCH_LATENCY)
+    store_dir = fresh_dir(os.path.join(BENCH_DIR, "async_store"))
+
+    def run():
+        asyncio.run(async_scanner.scan_once(fake, symbols, async_scanner.MAX_CONCURRENCY, store_dir))
+    run()
+    return run, fake
+
+STARTUP_SCRIPT = """
+import startup
+import kraken_test, market_cache, rate_limiter
+from fake_exchange import FakeExchange
+from prefilter import CandidateFilter
+fake = FakeExchange(symbols=[], latency={latency})
+market_cache.load_markets(fake)
+kraken_test.send_telegram_message = lambda *args, **kwargs: True
+kraken_test.set_exchange(rate_limiter.ScheduledExchange(fake, rate_limiter.RequestScheduler({budgets!r})))
+symbols = list(fake.markets)
+kraken_test.price_snapshot.track(symbols)
+kraken_test.scan_once(symbols, CandidateFilter(), set(), on_breakout=lambda symbol, price: None)
+startup.first_sweep_done()
+"""
+
+def setup_startup(n):
+    """A fresh kraken_test process: imports, markets from the disk cache, one sweep on a warm store (what a restart costs)."""
+    symbols = fixture_symbols(n)
+    store_dir = fresh_dir(os.path.join(BENCH_DIR, f"startup_store_{n}"))
+    cache_dir = fresh_dir(os.path.join(BENCH_DIR, "markets_cache"))
+    market_cache.write_cache(FakeExchange(symbols=symbols), cache_dir)
+    env = {**os.environ, "CANDLE_STORE_DIR": store_dir, "MARKETS_CACHE_DIR": cache_dir}
+    script = STARTUP_SCRIPT.format(latency=BENCH_LATENCY, budgets=UNLIMITED)
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    def run():
+        subprocess.run([sys.executable, "-c", script], cwd=root, env=env, check=True, stdout=subprocess.DEVNULL)
+    run()  # Warm-up: seeds the store, so timed runs are restarts rather than first installs
+    return run, None
+
+def setup_calculate_indicators(n):
+    """kraken_test.calculate_indicators (talib over a 100-candle DataFrame) for every symbol."""
+    import kraken_test
+    frames = [candle_store.load_df(symbol, '5m', limit=100, store_dir=FIXTURE_DIR) for symbol in fixture_symbols(n)]
+
+    def run():
+        for df in frames:
+            kraken_test.calculate_indicators(df.copy())
+    return run, None
+
+def setup_streaming_indicators(n):
+    """IndicatorState fed one new candle per symbol (the steady-state cost of confirm_breakout's math)."""
+    series = [candle_store.load(symbol, '5m', store_dir=FIXTURE_DIR) for symbol in fixture_symbols(n)]
+    states = [IndicatorState() for _ in series]
+    for state, candles in zip(states, series):
+        for candle in candles[:100]:
+            state.update(candle)
+    position = [100]
+
+    def run():
+        i = position[0] % FIXTURE_CANDLES
+        for state, candles in zip(states, series):
+            state.update(candles[i])
+        position[0] += 1
+    return run, None
+
+def setup_universe_check(n):
+    """UniverseBuffer: one new candle per symbol plus the vectorized price > rolling high and > MA20 check."""
+    from universe_buffer import UniverseBuffer
+    symbols = fixture_symbols(n)
+    series = [candle_store.load(symbol, '5m', store_dir=FIXTURE_DIR) for symbol in symbols]
+    universe = UniverseBuffer(symbols)
+    for symbol, candles in zip(symbols, series):
+        universe.update_many(symbol, candles[:100])
+    position = [100]
+
+    def run():
+        i = position[0] % FIXTURE_CANDLES
+        for symbol, candles in zip(symbols, series):
+            universe.update(symbol, candles[i])
+        universe.evaluate()
+        position[0] += 1
+    return run, None
+
+def setup_market_state_labels(n):
+    """generate_market_state_labels.label (compute_indicators + classify) on each symbol's 1h history."""
+    import generate_market_state_labels as labels
+    frames = [candle_store.load_df(symbol, '1h', store_dir=FIXTURE_DIR) for symbol in fixture_symbols(n)]
+
+    def run():
+        for df in frames:
+            labels.label(df.copy())
+    return run, None
+
+def setup_backtest(n):
+    """backtest_engine.backtest_series over a week of 5m candles per symbol."""
+    series = {symbol: candle_store.load(symbol, '5m', store_dir=FIXTURE_DIR) for symbol in fixture_symbols(n)}
+
+    def run():
+        for symbol, data in series.items():
+            backtest_engine.backtest_series(symbol, data)
+    return run, None
+
+def setup_resolve_exits(n):
+    """exit_resolver.resolve_exits (bot_performance_analysis) for 5 breakouts per symbol, 1h drilling into 5m."""
+    import pandas as pd
+    rng = np.random.default_rng(0)
+    rows = []
+    for symbol in fixture_symbols(n):
+        data = candle_store.load(symbol, '5m', store_dir=FIXTURE_DIR)
+        for i in rng.integers(100, FIXTURE_CANDLES - 100, 5):
+            price = data[i, 4]
+            rows.append((pd.Timestamp(int(data[i, 0]), unit='ms', tz='UTC'), symbol, price, price * 1.05, price * 0.98))
+    breakouts = pd.DataFrame(rows, columns=["timestamp", "symbol", "price", "target_price", "stop_loss"])
+
+    def load_candles(symbol, timeframe, since, until):
+        data = candle_store.load_range(symbol, timeframe, since, until, FIXTURE_DIR)
+        return data if data is not None else np.empty((0, 6))
+
+    def run():
+        resolve_exits(breakouts.copy(), load_candles, timeframes=('1h', '5m'))
+    return run, None
+
+BENCHMARKS = {
+    'kraken_sweep': setup_kraken_sweep,
+    'sharded_sweep': setup_sharded_sweep,
+    'confirm_all': setup_confirm_all,
+    'async_scan': setup_async_scan,
+    'startup': setup_startup,
+    'calculate_indicators': setup_calculate_indicators,
+    'streaming_indicators': setup_streaming_indicators,
+    'universe_check': setup_universe_check,
+    'market_state_labels': setup_market_state_labels,
+    'backtest': setup_backtest,
+    'resolve_exits': setup_resolve_exits,
+}
+
+# ✅ Harness
+def measure(name, n, repeats=BENCH_REPEATS):
+    """Times 'repeats' iterations, then one more under tracemalloc for peak memory."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        run, fake = BENCHMARKS[name](n)
+        requests_before = request_count(fake) if fake else 0
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            latencies.append(time.perf_counter() - start)
+        requests = (request_count(fake) - requests_before) / repeats if fake else 0
+
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {
+        'bench': name,
+        'symbols': n,
+        'throughput': round(n / p50, 2) if p50 > 0 else None,
+        'p50_ms': round(p50 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'requests': round(requests, 1),
+        'peak_mb': round(peak / 2 ** 20, 2),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+def run_benchmarks(names=None, sizes=BENCH_SIZES, results_file=RESULTS_FILE):
+    """Runs every benchmark at every size and appends the results (one JSON line each) to results_file."""
+    ensure_fixtures(max(sizes))
+    run_info = {
+        'run': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'latency': BENCH_LATENCY,
+        'repeats': BENCH_REPEATS,
+        'python': sys.version.split()[0],
+    }
+    results = []
+    with open(results_file, 'a') as f:
+        for name in names or BENCHMARKS:
+            for n in sizes:
+                result = {**run_info, **measure(name, n)}
+                results.append(result)
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                print(f"⏱️ {name:<22} {n:>5} symbols: {result['throughput']:>10} symbols/sec, "
+                      f"p50 {result['p50_ms']:.1f}ms, p99 {result['p99_ms']:.1f}ms, "
+                      f"{result['requests']} requests, peak {result['peak_mb']}MB")
+    return results
+
+def compare(results_file=RESULTS_FILE, baseline=None):
+    """Compares the latest run with the previous one (or the latest run of commit 'baseline')."""
+    with open(results_file) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    runs = sorted({row['run'] for row in rows})
+    if not runs:
+        print("❌ No benchmark results yet.")
+        return []
+    latest = runs[-1]
+    if baseline:
+        candidates = [row['run'] for row in rows if row['commit'] == baseline and row['run'] != latest]
+        previous = max(candidates) if candidates else None
+    else:
+        previous = runs[-2] if len(runs) > 1 else None
+    if previous is None:
+        print("❌ Nothing to compare against.")
+        return []
+
+    before = {(row['bench'], row['symbols']): row for row in rows if row['run'] == previous}
+    regressions = []
+    print(f"📊 {latest} ({rows[-1]['commit']}) vs {previous} ({next(iter(before.values()))['commit']})")
+    for row in (row for row in rows if row['run'] == latest):
+        old = before.get((row['bench'], row['symbols']))
+        if old is None or not old['p50_ms']:
+            continue
+        change = (row['p50_ms'] / old['p50_ms'] - 1) * 100
+        marker = "❌" if change > REGRESSION_PCT else "✅" if change < -REGRESSION_PCT else "➖"
+        if change > REGRESSION_PCT:
+            regressions.append(row)
+        print(f"{marker} {row['bench']:<22} {row['symbols']:>5} symbols: p50 {old['p50_ms']:.1f} -> {row['p50_ms']:.1f}ms "
+              f"({change:+.1f}%), requests {old['requests']} -> {row['requests']}, "
+              f"peak {old['peak_mb']} -> {row['peak_mb']}MB")
+    return regressions
+
+def main():
+    # Usage: benchmark.py [bench ...] | benchmark.py compare [baseline commit]
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        regressions = compare(baseline=sys.argv[2] if len(sys.argv) > 2 else None)
+        sys.exit(1 if regressions else 0)
+    names = sys.argv[1:] or None
+    unknown = [name for name in names or [] if name not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Unknown benchmark(s): {', '.join(unknown)}. Choose from: {', '.join(BENCHMARKS)}")
+        sys.exit(2)
+    run_benchmarks(names)
+
+if __name__ == "__main__":
+    main()
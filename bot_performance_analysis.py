@@ -1,92 +1,116 @@
 import os
+import time
 import pandas as pd
 import ccxt
 import numpy as np
+import candle_store
+from exit_resolver import resolve_exits
 
 # ✅ Define the breakout log file path
 LOG_FILE = os.path.expanduser("~/Documents/breakout_log.csv")
 
-# ✅ Ensure the file exists
-if not os.path.exists(LOG_FILE):
-    print("❌ No breakout log file found. Run the bot first!")
-    exit()
-
-# ✅ Load breakout data
-columns = ["timestamp", "symbol", "price", "RSI", "volume", "MA20", "MA50", "ATR"]
-df = pd.read_csv(
-    LOG_FILE,
-    names=columns,
-    header=None,
-    parse_dates=["timestamp"],
-    dtype={"symbol": str, "price": float, "RSI": float, "volume": float, "MA20": float, "MA50": float, "ATR": float}
-)
-# ✅ Only analyze the last 100 breakouts to speed up processing
-df = df.tail(100)
-
-
-# ✅ Drop rows where timestamp parsing failed
-df.dropna(subset=["timestamp"], inplace=True)
-
-# ✅ Ensure timestamps are in UTC
-df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
-
-# ✅ Define Stop-Loss & Target Prices
-df["target_price"] = df["price"] * 1.05  # Example: 5% profit target
-df["stop_loss"] = df["price"] * 0.98  # Example: 2% stop loss
+# ✅ Outcome window: 4 hours after each breakout (1h candles, drilling down to 5m/1m on ties)
+OUTCOME_HOURS = 4
+KRAKEN_OHLC_LIMIT = 720  # Kraken returns at most 720 candles per request
 
 # ✅ Initialize Kraken API for fetching historical data
 exchange = ccxt.kraken()
 
-def check_trade_outcome(symbol, breakout_time, breakout_price, target_price, stop_loss):
-    """Fetch future OHLCV data to determine if the breakout hit the target price or stop loss."""
-    try:
-        # Fetch OHLCV (1-hour candles) for 4 hours after breakout
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='1h', since=int(breakout_time.timestamp() * 1000), limit=4)
-        df_ohlcv = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df_ohlcv['timestamp'] = pd.to_datetime(df_ohlcv['timestamp'], unit='ms')
-
-        if df_ohlcv.empty:
-            return False, False  # No price data available
-        
-        # ✅ Check if target price or stop loss was hit
-        max_high = df_ohlcv['high'].max()  # Highest price in next 4 hours
-        min_low = df_ohlcv['low'].min()  # Lowest price in next 4 hours
-
-        hit_target = max_high >= target_price
-        hit_stop = min_low <= stop_loss
-
-        return hit_target, hit_stop
-    except Exception as e:
-        print(f"❌ Error fetching OHLCV for {symbol}: {e}")
-        return False, False
-
-# ✅ Apply function to check each breakout
-df['hit_target'], df['hit_stop'] = zip(*df.apply(lambda row: check_trade_outcome(
-    row['symbol'], row['timestamp'], row['price'], row['target_price'], row['stop_loss']), axis=1))
-
-# ✅ Calculate profit per trade
-df["profit"] = df["hit_target"] * (df["target_price"] - df["price"]) - df["hit_stop"] * (df["price"] - df["stop_loss"])
-
-# ✅ Calculate total profit and win rate
-total_profit = df["profit"].sum()
-win_rate = df["hit_target"].mean() * 100  # % of trades that hit target price
-
-print(f"✅ Total Profit: {total_profit:.2f}")
-print(f"✅ Winning Trades: {df['hit_target'].sum()} ({win_rate:.2f}%)")
-
-# ✅ Summary Statistics
-print("\n📊 **Breakout Performance & Profitability Summary**")
-print(f"🔹 Total Breakouts: {len(df)}")
-print(f"✅ Winning Trades: {df['hit_target'].sum()} ({win_rate:.2f}%)")
-print(f"❌ Stopped Out Trades: {df['hit_stop'].sum()}")
-print(f"💰 Estimated Total Profit: {total_profit:.4f} (assumes 1 unit per trade)")
-
-# ✅ Ensure timestamps are properly formatted
-df['timestamp'] = df['timestamp'].astype(str)
-
-# ✅ Save Analysis to CSV
-output_file = os.path.expanduser("~/Documents/breakout_analysis.csv")
-df.to_csv(output_file, index=False)
-
-print(f"\n📂 Analysis saved to '{output_file}'")
-
+def load_breakouts(path=LOG_FILE):
+    """Loads the breakout log and adds target/stop levels."""
+    columns = ["timestamp", "symbol", "price", "RSI", "volume", "MA20", "MA50", "ATR"]
+    df = pd.read_csv(
+        path,
+        names=columns,
+        header=None,
+        parse_dates=["timestamp"],
+        dtype={"symbol": str, "price": float, "RSI": float, "volume": float, "MA20": float, "MA50": float, "ATR": float}
+    )
+
+    # ✅ Drop rows where timestamp parsing failed
+    df.dropna(subset=["timestamp"], inplace=True)
+
+    # ✅ Ensure timestamps are in UTC
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
+    df.dropna(subset=["timestamp"], inplace=True)
+
+    # ✅ Define Stop-Loss & Target Prices
+    df["target_price"] = df["price"] * 1.05  # Example: 5% profit target
+    df["stop_loss"] = df["price"] * 0.98  # Example: 2% stop loss
+    return df
+
+ohlcv_requests = 0  # Exchange round trips made by this run
+
+def fetch_symbol_candles(symbol, timeframe, since, until):
+    """One covering candle range for a symbol: local candle store first, paginated fetch otherwise."""
+    global ohlcv_requests
+    cached = candle_store.load_range(symbol, timeframe, since, until)
+    if cached is not None:
+        return cached
+
+    step = candle_store.timeframe_ms(timeframe)
+    rows, cursor = [], since
+    while cursor < until:
+        batch = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=cursor, limit=KRAKEN_OHLC_LIMIT)
+        ohlcv_requests += 1
+        batch = [candle for candle in batch if since <= candle[0] < until]
+        if not batch or batch[-1][0] + step <= cursor:
+            break
+        rows.extend(batch)
+        cursor = batch[-1][0] + step
+    return np.array(rows, dtype=float).reshape(-1, 6)
+
+def evaluate_outcomes(df, horizon_hours=OUTCOME_HOURS):
+    """Resolves which of target or stop each breakout hit first, then sets hit_target/hit_stop."""
+    df = resolve_exits(df, fetch_symbol_candles, horizon_hours=horizon_hours)
+    df["hit_target"] = df["outcome"] == "target"
+    df["hit_stop"] = df["outcome"].isin(["stop", "ambiguous"])
+    return df
+
+def main():
+    # ✅ Ensure the file exists
+    if not os.path.exists(LOG_FILE):
+        print("❌ No breakout log file found. Run the bot first!")
+        return
+
+    # ✅ Load every breakout, no truncation needed
+    df = load_breakouts()
+
+    # ✅ Walk each breakout's forward candles to see whether target or stop came first
+    start = time.perf_counter()
+    df = evaluate_outcomes(df)
+    print(f"⏱️ Evaluated {len(df)} breakouts across {df['symbol'].nunique()} symbols "
+          f"in {time.perf_counter() - start:.2f}s ({ohlcv_requests} OHLCV requests)")
+
+    # ✅ Calculate profit per trade
+    df["profit"] = df["hit_target"] * (df["target_price"] - df["price"]) - df["hit_stop"] * (df["price"] - df["stop_loss"])
+
+    # ✅ Calculate total profit and win rate
+    total_profit = df["profit"].sum()
+    win_rate = df["hit_target"].mean() * 100  # % of trades that hit target price
+
+    print(f"✅ Total Profit: {total_profit:.2f}")
+    print(f"✅ Winning Trades: {df['hit_target'].sum()} ({win_rate:.2f}%)")
+
+    # ✅ Summary Statistics
+    print("\n📊 **Breakout Performance & Profitability Summary**")
+    print(f"🔹 Total Breakouts: {len(df)}")
+    print(f"✅ Winning Trades: {df['hit_target'].sum()} ({win_rate:.2f}%)")
+    print(f"❌ Stopped Out Trades: {df['hit_stop'].sum()} ({(df['outcome'] == 'ambiguous').sum()} too close to call)")
+    print(f"⏸ Still Open After {OUTCOME_HOURS}h: {(df['outcome'] == 'open').sum()}")
+    print(f"⏱️ Median Time to Exit: {df.loc[df['outcome'] != 'open', 'time_to_exit'].median()}")
+    print(f"💰 Estimated Total Profit: {total_profit:.4f} (assumes 1 unit per trade)")
+    print(f"💰 Realized PnL: {df['pnl_pct'].sum():.2f}% (avg {df['pnl_pct'].mean():.3f}% per trade)")
+
+    # ✅ Ensure timestamps are properly formatted
+    df['timestamp'] = df['timestamp'].astype(str)
+    df['exit_time'] = df['exit_time'].astype(str)
+
+    # ✅ Save Analysis to CSV
+    output_file = os.path.expanduser("~/Documents/breakout_analysis.csv")
+    df.to_csv(output_file, index=False)
+
+    print(f"\n📂 Analysis saved to '{output_file}'")
+
+if __name__ == "__main__":
+    main()
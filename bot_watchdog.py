@@ -1,28 +1,131 @@
 import os
-import time
+import signal
 import subprocess
+import sys
+import time
+from heartbeat import heartbeat_path, read_heartbeat
 
 # Path to your bot script
-BOT_SCRIPT = os.path.expanduser("~/Documents/kraken_test.py")
+BOT_SCRIPT = os.path.expanduser(os.getenv("BOT_SCRIPT", "~/Documents/kraken_test.py"))
+SHARDED_SCRIPT = os.path.expanduser(os.getenv("SHARDED_SCRIPT", os.path.join(os.path.dirname(BOT_SCRIPT), "sharded_scanner.py")))
 
-def is_bot_running():
-    """Check if the bot process is running."""
-    try:
-        result = subprocess.run(["pgrep", "-f", "kraken_test.py"], capture_output=True, text=True)
-        return result.stdout.strip() != ""
-    except Exception as e:
-        print(f"❌ Error checking bot process: {e}")
-        return False
+# ✅ Supervisor Parameters
+# More than one worker runs sharded_scanner.py instead of the bot: its coordinator splits the universe
+# over the workers and is the only process that writes the journal, dedups breakouts and sends alerts.
+# (SHARD_COUNT is still read for old setups, but no longer starts independent bots.)
+SCANNER_WORKERS = max(1, int(os.getenv("SCANNER_WORKERS") or os.getenv("SHARD_COUNT") or "1"))
+POLL_INTERVAL = 1.0  # Seconds between health checks
+STARTUP_GRACE = float(os.getenv("STARTUP_GRACE", "120"))  # Seconds a new bot gets to publish its first heartbeat
+STOP_TIMEOUT = 15  # Seconds between SIGTERM and SIGKILL
+MIN_UPTIME = 300  # A bot that fails sooner than this counts toward a crash loop
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
 
-def restart_bot():
-    """Restart the bot if it's not running."""
-    print("🔄 Restarting the bot...")
-    subprocess.Popen(["python3", BOT_SCRIPT], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+class BotProcess:
+    """The supervised scanner: started with its heartbeat file, restarted when it dies or stalls."""
 
-# Watchdog loop
-print("🚀 Watchdog started. Monitoring bot status...")
-while True:
-    if not is_bot_running():
-        restart_bot()
-    time.sleep(60)  # Check every 60 seconds
+    def __init__(self, script, name, env=None):
+        self.script = script
+        self.name = name
+        self.env = dict(env or {})
+        self.heartbeat_file = heartbeat_path(self.name)
+        self.process = None
+        self.launched_at = 0.0
+        self.failures = 0  # Consecutive quick failures
+        self.next_start = 0.0
+
+    def start(self):
+        if os.path.exists(self.heartbeat_file):
+            os.remove(self.heartbeat_file)
+        self.launched_at = time.time()
+        env = {key: value for key, value in os.environ.items() if key not in ("SHARD_INDEX", "SHARD_COUNT")}
+        env.update({
+            **self.env,
+            "HEARTBEAT_FILE": self.heartbeat_file,
+            # BOT_LAUNCHED_AT lets the bot report how long it took from launch to its first sweep
+            "BOT_LAUNCHED_AT": str(self.launched_at),
+        })
+        self.process = subprocess.Popen([sys.executable, self.script], env=env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        print(f"🚀 Started {self.name} (pid {self.process.pid})")
+
+    def stop_leftover(self):
+        """Stops a bot left running by an earlier supervisor, so the scanner never runs twice."""
+        beat = read_heartbeat(self.heartbeat_file)
+        if beat is None or time.time() > beat['deadline']:
+            return  # Nothing there, or long dead (don't signal a pid that may have been reused)
+        try:
+            os.kill(beat['pid'], signal.SIGTERM)
+            print(f"🧹 Stopped leftover {self.name} (pid {beat['pid']})")
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def check(self, now):
+        """None while healthy, otherwise why the bot needs a restart."""
+        code = self.process.poll()
+        if code is not None:
+            return f"exited with code {code}"
+        beat = read_heartbeat(self.heartbeat_file)
+        if beat is None or beat['pid'] != self.process.pid:
+            if now - self.launched_at > STARTUP_GRACE:
+                return f"no heartbeat {STARTUP_GRACE:.0f}s after launch"
+            return None
+        if now > beat['deadline']:
+            return (f"stalled: last beat {now - beat['beat_at']:.0f}s ago, "
+                    f"last sweep {beat['sweep_seconds']:.1f}s ({beat['sweeps']} sweeps)")
+        return None
 
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()  # SIGTERM: the bot (or the coordinator and its workers) checkpoints on the way out
+        try:
+            self.process.wait(STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def schedule_restart(self, now):
+        """Restarts right away after a long healthy run, with exponential backoff in a crash loop."""
+        if now - self.launched_at < MIN_UPTIME:
+            self.failures += 1
+        else:
+            self.failures = 0
+        delay = min(BACKOFF_MAX, BACKOFF_BASE ** self.failures) if self.failures else 0.0
+        self.next_start = now + delay
+        if delay:
+            print(f"⏳ {self.name} failed {self.failures}x in a row, restarting in {delay:.0f}s")
+
+def scanner_process(workers=SCANNER_WORKERS):
+    """kraken_test on its own, or the sharded scanner when the universe is split over several workers."""
+    if workers == 1:
+        return BotProcess(BOT_SCRIPT, "kraken_test")
+    # The coordinator's own heartbeat: the workers get theirs (kraken_test_shard<i>of<n>) from it
+    return BotProcess(SHARDED_SCRIPT, "sharded_scanner", env={"SCANNER_WORKERS": str(workers)})
+
+def supervise(bot=None):
+    bot = bot or scanner_process()
+    bot.stop_leftover()
+    bot.start()
+    try:
+        while True:
+            now = time.time()
+            if bot.process is None:
+                if now >= bot.next_start:
+                    bot.start()
+            else:
+                problem = bot.check(now)
+                if problem:
+                    print(f"🔄 Restarting {bot.name}: {problem}")
+                    bot.stop()
+                    bot.process = None
+                    bot.schedule_restart(now)
+            time.sleep(POLL_INTERVAL)
+    finally:
+        bot.stop()
+
+# Watchdog loop
+if __name__ == "__main__":
+    print(f"🚀 Watchdog started. Supervising the scanner ({SCANNER_WORKERS} worker(s)) by heartbeat...")
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Stop the bots too when we are stopped
+    supervise()
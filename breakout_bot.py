@@ -1,20 +1,27 @@
-import ccxt
+import startup  # First, so the launch-to-first-sweep clock covers every other import
+import rate_limiter
+import os
+import json
 import time
-from datetime import datetime, timezone
-import pandas as pd
+import asyncio
 import threading
+from datetime import datetime, timezone
+from price_snapshot import PriceSnapshot, fetch_price_snapshot
+from post_breakout_scheduler import PostBreakoutScheduler
+import candle_store
+from universe_buffer import UniverseBuffer
+import market_cache
+
+pd = startup.lazy_import('pandas')  # Only needed for the CSV export
 
 # Initialize Kraken API
-exchange = ccxt.kraken({
-    'rateLimit': 1000,
-    'enableRateLimit': True
-})
+exchange = rate_limiter.create_exchange()  # Token-bucket throttling and backoff for every request
 
 # Fetch all trading pairs from Kraken, ensuring more pairs are included
 def get_all_trading_pairs():
     """Fetch all available trading pairs from Kraken and include both USDT and USD pairs."""
     try:
-        markets = exchange.load_markets()
+        markets = market_cache.load_markets(exchange)  # Disk-cached, refreshed in the background when stale
         return [pair for pair in markets if pair.endswith(("/USDT", "/USD"))]  # Include USD pairs too
     except Exception as e:
         print(f"❌ Error fetching trading pairs: {e}")
@@ -24,73 +31,133 @@ def get_all_trading_pairs():
 trading_pairs = get_all_trading_pairs()
 print(f"✅ Loaded {len(trading_pairs)} trading pairs from Kraken.")
 
+# ✅ Prices for every pair come from one batched snapshot instead of a ticker call per pair
+price_snapshot = PriceSnapshot(exchange, trading_pairs)
+
 tracking_intervals = [300, 900, 3600]  # 5 min, 15 min, 1 hour
 breakout_data = []
 breakout_threshold = 50  # How many past candles to check for breakouts
 
-def fetch_latest_price(symbol):
-    """Fetches the latest price for a given trading pair."""
-    try:
-        ticker = exchange.fetch_ticker(symbol)
-        return ticker['last']
-    except Exception as e:
-        print(f"❌ Error fetching price for {symbol}: {e}")
-        return None
+# ✅ Rolling highs for every pair live in one buffer: the last 49 closed candles plus the forming one
+universe = UniverseBuffer(trading_pairs, window=breakout_threshold - 1)
 
-def fetch_historical_high(symbol, timeframe="5m", limit=breakout_threshold):
-    """Fetches the highest price from the last 'N' candles."""
+def update_candles(symbol, timeframe="5m", limit=breakout_threshold):
+    """Stores the candles we don't have yet and feeds them to the universe buffer (which keeps the rolling high)."""
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        highs = [candle[2] for candle in ohlcv]  # Extract high prices
-        return max(highs) if highs else None
+        candle_store.update(exchange, symbol, timeframe, limit=limit)  # Only candles we don't have yet
+        universe.sync(symbol, timeframe)
+        return True
     except Exception as e:
         print(f"❌ Error fetching OHLCV for {symbol}: {e}")
-        return None
+        return False
 
 def log_breakout(symbol, breakout_price):
     """Logs the breakout event and schedules price tracking."""
     timestamp = datetime.now(timezone.utc).isoformat()
     breakout_record = {
+        "id": f"{symbol}@{timestamp}",
         "timestamp": timestamp,
         "symbol": symbol,
         "breakout_price": breakout_price,
-        "post_prices": {interval: None for interval in tracking_intervals}
+        "post_prices": {interval: None for interval in tracking_intervals},
+        "checks_left": len(tracking_intervals),
     }
-    breakout_data.append(breakout_record)
+    with records_lock:
+        breakout_data.append(breakout_record)
+        records_by_id[breakout_record["id"]] = breakout_record
+    save_pending_records()  # Before the checks, so a restored check always finds its record
     print(f"[{timestamp}] 🚀 Breakout detected: {symbol} at {breakout_price}")
 
     for interval in tracking_intervals:
-        threading.Timer(interval, fetch_post_breakout_price, args=(breakout_record, interval)).start()
-        
-def fetch_post_breakout_price(record, interval):
-    """Fetches post-breakout prices after a set time interval."""
-    post_price = fetch_latest_price(record["symbol"])
-    record["post_prices"][interval] = post_price
-    print(f"[{datetime.now(timezone.utc).isoformat()}] 🕒 {interval // 60} min post-breakout price for {record['symbol']}: {post_price}")
-    
+        post_breakout_scheduler.schedule(breakout_record["id"], symbol, interval, interval=interval)
+
+def fetch_post_breakout_price(check, post_price):
+    """Records a post-breakout price once its scheduled check comes due."""
+    interval = check["interval"]
+    record = records_by_id.get(check["id"])
+    if record is not None:
+        with records_lock:
+            record["post_prices"][interval] = post_price
+            record["checks_left"] -= 1
+        save_pending_records()
+    print(f"[{datetime.now(timezone.utc).isoformat()}] 🕒 {interval // 60} min post-breakout price for {check['symbol']}: {post_price}")
+
+# ✅ Breakouts still waiting for post-breakout prices are saved next to their pending checks,
+# so checks restored after a restart still have a record to fill in
+PENDING_RECORDS_FILE = os.path.expanduser("~/Documents/pending_breakout_records.json")
+records_by_id = {}
+records_lock = threading.Lock()  # Breakouts come in on the main thread, prices on the scheduler thread
+
+def save_pending_records():
+    with records_lock:
+        pending = [record for record in records_by_id.values() if record["checks_left"] > 0]
+        tmp_path = PENDING_RECORDS_FILE + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(pending, f)
+        os.replace(tmp_path, PENDING_RECORDS_FILE)
+
+def load_pending_records():
+    try:
+        with open(PENDING_RECORDS_FILE) as f:
+            records = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read pending breakout records: {e}")
+        return
+    for record in records:
+        record["post_prices"] = {int(interval): price for interval, price in record["post_prices"].items()}
+        records_by_id[record["id"]] = record
+        breakout_data.append(record)
+    if records:
+        print(f"✅ Restored {len(records)} breakouts awaiting post-breakout prices.")
+
+# ✅ One scheduler thread serves every pending check, due checks share one batched price fetch
+load_pending_records()  # First: overdue checks run as soon as the scheduler starts
+post_breakout_scheduler = PostBreakoutScheduler(
+    lambda symbols: fetch_price_snapshot(exchange, symbols), fetch_post_breakout_price
+).start()
+
 def save_to_csv():
     """Saves breakout and post-breakout data to CSV."""
-    df = pd.DataFrame(breakout_data)
+    df = pd.DataFrame(breakout_data).drop(columns="checks_left", errors="ignore")
     df.to_csv("/Users/jameserskine/Documents/breakout_log.csv", index=False)
     print("✅ Breakout data saved to CSV.")
     
+# ✅ Set SCAN_MODE=async to check all pairs concurrently instead of one at a time,
+# SCAN_MODE=live to stream ticker/OHLC over the websocket and check on every tick,
+# or SCAN_MODE=multi to scan every exchange in SCAN_EXCHANGES (e.g. kraken,coinbase) at once
+SCAN_MODE = os.getenv("SCAN_MODE", "serial")
+
+if SCAN_MODE == "async":
+    from async_scanner import run_scanner
+    asyncio.run(run_scanner(log_breakout, trading_pairs))
+elif SCAN_MODE == "live":
+    # Not the same rule as serial/async: the forming candle's high already holds the tick being checked,
+    # so live compares with the last 50 closed highs and requires price > MA20 (see live_feed.LIVE_ABOVE_MA)
+    from live_feed import run_live_feed
+    asyncio.run(run_live_feed(log_breakout, trading_pairs, include_current=False, above_ma=True))
+elif SCAN_MODE == "multi":
+    from market_data import run_market_data
+    asyncio.run(run_market_data(log_breakout))
+
 # Continuous Execution Loop
 while True:
     print(f"\n🔄 [{datetime.now(timezone.utc).isoformat()}] Checking all trading pairs ({len(trading_pairs)})...\n")
+    sweep_start = time.perf_counter()
+    price_snapshot.refresh()
+
+    checked = [pair for pair in trading_pairs if update_candles(pair)]
 
-    for pair in trading_pairs:
-        latest_price = fetch_latest_price(pair)
-        historical_high = fetch_historical_high(pair)
-        
-        if latest_price and historical_high:
-            print(f"🔍 Checking {pair}: Price={latest_price}, Historical High={historical_high}")
-            # Relaxing the breakout conditions
-            if latest_price > historical_high:
-                log_breakout(pair, latest_price)
-            else:
-                print(f"❌ No breakout detected for {pair}.")
+    # One vectorized check over the whole universe instead of comparing pair by pair
+    prices = universe.prices_array(price_snapshot.prices)
+    for pair, latest_price in universe.breakouts(prices, checked, include_current=True, above_ma=False, min_closed=0):
+        log_breakout(pair, latest_price)
+    print(f"🔍 Checked {len(checked)} pairs")
     
+    print(f"⏱️ Sweep finished in {time.perf_counter() - sweep_start:.2f}s")
+    startup.first_sweep_done()
+
     # Sleep before next cycle
     print("⏳ Waiting 60 seconds before the next check...\n")
     time.sleep(60)
-
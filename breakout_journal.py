@@ -0,0 +1,165 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+
+# ✅ Journal Parameters
+JOURNAL_FILE = os.path.expanduser(os.getenv("BREAKOUT_JOURNAL", "~/Documents/breakout_journal.db"))
+LOG_FILE = os.path.expanduser("~/Documents/breakout_log.csv")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS breakouts (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    entry_price REAL NOT NULL,
+    target_price REAL,
+    stop_loss REAL,
+    post_price REAL,
+    state TEXT NOT NULL DEFAULT 'open'
+);
+CREATE INDEX IF NOT EXISTS idx_breakouts_symbol_state ON breakouts (symbol, state);
+CREATE INDEX IF NOT EXISTS idx_breakouts_state ON breakouts (state);
+"""
+
+class BreakoutJournal:
+    """Append-only breakout records in SQLite (WAL), updated in place by id.
+
+    A breakout is 'open' until its post-breakout price is filled in ('closed') or we
+    give up on it ('expired'). Lookups by symbol and state go through an index, so
+    logging a breakout costs the same however long the history gets.
+    """
+
+    def __init__(self, path=JOURNAL_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.version = 0  # Bumped on every write, lets callers export only when something changed
+        self.exported = None  # (path, last id, file size) after the last export_csv
+        self.stale = False  # A row already in that export has changed since
+
+    def _write(self, sql, args):
+        with self.lock:
+            cursor = self.conn.execute(sql, args)
+            self.version += 1
+            return cursor
+
+    def record(self, timestamp, symbol, entry_price, target_price=None, stop_loss=None):
+        """Appends a new open breakout and returns its id."""
+        return self._write(
+            "INSERT INTO breakouts (timestamp, symbol, entry_price, target_price, stop_loss) VALUES (?, ?, ?, ?, ?)",
+            (str(timestamp), symbol, entry_price, target_price, stop_loss)
+        ).lastrowid
+
+    def open_breakout(self, symbol):
+        """Id of the symbol's open breakout, or None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id FROM breakouts WHERE symbol = ? AND state = 'open' ORDER BY id DESC LIMIT 1", (symbol,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def open_breakouts(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, timestamp, symbol, entry_price FROM breakouts WHERE state = 'open' ORDER BY id"
+            ).fetchall()
+
+    def set_post_price(self, breakout_id, post_price):
+        """Fills in the post-breakout price and closes the record."""
+        self._write("UPDATE breakouts SET post_price = ?, state = 'closed' WHERE id = ?", (post_price, breakout_id))
+        if self.exported is not None and breakout_id <= self.exported[1]:
+            self.stale = True
+
+    def expire(self, breakout_id):
+        """Closes a record whose post-breakout price could not be fetched."""
+        self._write("UPDATE breakouts SET state = 'expired' WHERE id = ? AND state = 'open'", (breakout_id,))
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM breakouts").fetchone()[0]
+
+    def export_csv(self, path=LOG_FILE):
+        """Writes the journal in the old breakout_log.csv layout for the analysis scripts.
+
+        Only rows added since the last export are appended; the file is rewritten when an exported row
+        got its post price, or when the file isn't the one this journal last wrote.
+        """
+        select = "SELECT id, timestamp, symbol, entry_price, target_price, stop_loss, post_price FROM breakouts"
+        with self.lock:
+            exported = self.exported
+            if (exported is not None and exported[0] == path and not self.stale
+                    and os.path.exists(path) and os.path.getsize(path) == exported[2]):
+                last_id = self._write_rows(path, "a", self.conn.execute(f"{select} WHERE id > ? ORDER BY id", (exported[1],)))
+                last_id = max(last_id, exported[1])
+            else:
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                last_id = self._write_rows(tmp_path, "w", self.conn.execute(f"{select} ORDER BY id"))
+                os.replace(tmp_path, path)
+            self.exported = (path, last_id, os.path.getsize(path))
+            self.stale = False
+
+    @staticmethod
+    def _write_rows(path, mode, rows):
+        """Writes journal rows as CSV lines; returns the last id written (0 if none)."""
+        last_id = 0
+        with open(path, mode, newline="") as f:
+            writer = csv.writer(f)
+            for last_id, timestamp, symbol, entry_price, target_price, stop_loss, post_price in rows:
+                writer.writerow([timestamp, symbol, entry_price, target_price, stop_loss,
+                                 "N/A" if post_price is None else post_price])
+        return last_id
+
+    def import_csv(self, path=LOG_FILE):
+        """Loads an existing breakout_log.csv into the journal (one-off migration).
+
+        Rows that don't parse are skipped; any other error rolls the whole import back.
+        """
+        imported = skipped = 0
+        with open(path, newline="") as f, self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for row in csv.reader(f):
+                    if len(row) < 3:
+                        continue
+                    try:
+                        entry_price = float(row[2])
+                        values = [float(v) if v not in ("", "N/A") else None for v in row[3:6]] + [None] * 3
+                    except ValueError:
+                        skipped += 1  # Header or garbage line
+                        continue
+                    target_price, stop_loss, post_price = values[:3]
+                    self.conn.execute(
+                        "INSERT INTO breakouts (timestamp, symbol, entry_price, target_price, stop_loss, post_price, state) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (row[0], row[1], entry_price, target_price, stop_loss, post_price,
+                         "closed" if post_price is not None else "expired")
+                    )
+                    imported += 1
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            self.version += 1
+        if skipped > 1:  # The header is expected
+            print(f"⚠️ Skipped {skipped} unreadable rows in {path}")
+        return imported
+
+    def close(self):
+        self.conn.close()
+
+if __name__ == "__main__":
+    # Usage: python breakout_journal.py export|import [csv_path]
+    command = sys.argv[1] if len(sys.argv) > 1 else "export"
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else LOG_FILE
+    journal = BreakoutJournal()
+    if command == "import":
+        print(f"✅ Imported {journal.import_csv(csv_path)} breakouts from {csv_path}")
+    else:
+        journal.export_csv(csv_path)
+        print(f"✅ Exported {journal.count()} breakouts to {csv_path}")
@@ -0,0 +1,220 @@
+import os
+import time
+import numpy as np
+from startup import lazy_import
+
+pd = lazy_import('pandas')  # Only the DataFrame helpers need it
+
+# ✅ Candle Store Parameters
+CANDLE_STORE_DIR = os.path.expanduser(os.getenv("CANDLE_STORE_DIR", "~/Documents/candle_store"))
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+ROW_WIDTH = len(CANDLE_COLUMNS)
+DTYPE = np.dtype('<f8')
+ROW_BYTES = ROW_WIDTH * DTYPE.itemsize
+
+# Each series is a flat little-endian float64 file of [timestamp, open, high, low, close, volume] rows,
+# sorted by timestamp, so it can be appended in place and memory-mapped by the backtests.
+
+def timeframe_ms(timeframe):
+    """Converts a ccxt timeframe string like '5m', '4h' or '1d' to milliseconds."""
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    return int(timeframe[:-1]) * units[timeframe[-1]] * 1000
+
+# File names: '/' becomes '_', and any '%', '_' or ':' already in the symbol is %-escaped first, so
+# 'BTC/USD' is stored as BTC_USD.f8 and 'USDC/USD:USD' as USDC_USD%3AUSD.f8 -- every name maps back to
+# exactly one symbol.
+_ESCAPES = (('%', '%25'), ('_', '%5F'), (':', '%3A'))
+
+def encode_symbol(symbol):
+    for char, escaped in _ESCAPES:
+        symbol = symbol.replace(char, escaped)
+    return symbol.replace('/', '_')
+
+def decode_symbol(name):
+    symbol = name.replace('_', '/')
+    for char, escaped in reversed(_ESCAPES):
+        symbol = symbol.replace(escaped, char)
+    return symbol
+
+def series_path(symbol, timeframe, store_dir=CANDLE_STORE_DIR):
+    """Returns the file that holds one symbol/timeframe series."""
+    return os.path.join(store_dir, timeframe, f"{encode_symbol(symbol)}.f8")
+
+def stored_symbols(timeframe, store_dir=CANDLE_STORE_DIR):
+    """Lists the symbols that have a stored series for timeframe.
+
+    Files from the old lossy naming (e.g. USDC_USD_USD.f8 for 'USDC/USD:USD') can't be mapped back to
+    a symbol and are left out; the scanners store those series again under the new name.
+    """
+    folder = os.path.join(store_dir, timeframe)
+    if not os.path.isdir(folder):
+        return []
+    symbols = [decode_symbol(name[:-3]) for name in os.listdir(folder) if name.endswith('.f8')]
+    return sorted(symbol for symbol in symbols if symbol.count('/') == 1)
+
+def row_count(symbol, timeframe, store_dir=CANDLE_STORE_DIR):
+    path = series_path(symbol, timeframe, store_dir)
+    return os.path.getsize(path) // ROW_BYTES if os.path.exists(path) else 0
+
+def load(symbol, timeframe, limit=None, store_dir=CANDLE_STORE_DIR):
+    """Reads the stored series (or only its last 'limit' rows) into an (n, 6) array."""
+    path = series_path(symbol, timeframe, store_dir)
+    rows = row_count(symbol, timeframe, store_dir)
+    start = max(0, rows - limit) if limit else 0
+    if rows == 0:
+        return np.empty((0, ROW_WIDTH), dtype=DTYPE)
+    with open(path, 'rb') as f:
+        f.seek(start * ROW_BYTES)
+        data = np.fromfile(f, dtype=DTYPE, count=(rows - start) * ROW_WIDTH)
+    return data.reshape(-1, ROW_WIDTH)
+
+def open_memmap(symbol, timeframe, store_dir=CANDLE_STORE_DIR):
+    """Memory-maps a whole series read-only (for backtests; don't hold it while the bot writes)."""
+    rows = row_count(symbol, timeframe, store_dir)
+    if rows == 0:
+        return np.empty((0, ROW_WIDTH), dtype=DTYPE)
+    return np.memmap(series_path(symbol, timeframe, store_dir), dtype=DTYPE, mode='r', shape=(rows, ROW_WIDTH))
+
+def to_dataframe(data):
+    """Turns stored rows into the same DataFrame layout get_ohlcv has always returned."""
+    df = pd.DataFrame(data, columns=CANDLE_COLUMNS)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+def load_df(symbol, timeframe, limit=None, store_dir=CANDLE_STORE_DIR):
+    return to_dataframe(load(symbol, timeframe, limit, store_dir))
+
+def load_range(symbol, timeframe, since, until, store_dir=CANDLE_STORE_DIR):
+    """Stored candles opening in [since, until) if the store covers that whole range, else None."""
+    data = load(symbol, timeframe, store_dir=store_dir)
+    if len(data) == 0 or data[0, 0] > since or data[-1, 0] < until - timeframe_ms(timeframe):
+        return None
+    start, end = np.searchsorted(data[:, 0], [since, until])
+    return data[start:end]
+
+def first_timestamp(symbol, timeframe, store_dir=CANDLE_STORE_DIR):
+    """Timestamp (ms) of the oldest stored candle, or None when the series is empty."""
+    if row_count(symbol, timeframe, store_dir) == 0:
+        return None
+    return int(np.fromfile(series_path(symbol, timeframe, store_dir), dtype=DTYPE, count=1)[0])
+
+def last_timestamp(symbol, timeframe, store_dir=CANDLE_STORE_DIR):
+    """Timestamp (ms) of the newest stored candle, or None when the series is empty."""
+    last = load(symbol, timeframe, limit=1, store_dir=store_dir)
+    return int(last[0, 0]) if len(last) else None
+
+def write(symbol, timeframe, candles, store_dir=CANDLE_STORE_DIR):
+    """Merges candles into the stored series, replacing any rows with the same timestamps."""
+    rows = np.asarray(candles, dtype=DTYPE).reshape(-1, ROW_WIDTH)
+    if len(rows) == 0:
+        return rows
+    rows = rows[np.argsort(rows[:, 0], kind='stable')]
+
+    path = series_path(symbol, timeframe, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _drop_partial_row(path)
+    existing = row_count(symbol, timeframe, store_dir)
+    last = last_timestamp(symbol, timeframe, store_dir) if existing else None
+
+    if last is None or rows[0, 0] > last:
+        # ✅ Common case: only newer candles, plain append
+        with open(path, 'ab') as f:
+            rows.tofile(f)
+    elif rows[-1, 0] >= last:
+        # ✅ New batch overlaps the tail (e.g. the still-forming candle): overwrite the tail in place
+        timestamps = load(symbol, timeframe, limit=len(rows) + 1, store_dir=store_dir)[:, 0]
+        if rows[0, 0] >= timestamps[0] or existing <= len(timestamps):
+            cut = existing - len(timestamps) + int(np.searchsorted(timestamps, rows[0, 0]))
+            # Write before truncating: the batch covers every timestamp from 'cut' on, so a stop
+            # between the two calls leaves at most a few stale rows past the new ones, never a hole
+            with open(path, 'r+b') as f:
+                f.seek(cut * ROW_BYTES)
+                rows.tofile(f)
+                f.truncate((cut + len(rows)) * ROW_BYTES)
+        else:
+            _rewrite_merged(path, load(symbol, timeframe, store_dir=store_dir), rows)
+    else:
+        # ✅ Backfill inside the stored range: rare, rewrite the merged series
+        _rewrite_merged(path, load(symbol, timeframe, store_dir=store_dir), rows)
+    return rows
+
+def reset(symbol, timeframe, candles, store_dir=CANDLE_STORE_DIR):
+    """Replaces the stored series with candles (e.g. when a gap can't be filled)."""
+    rows = np.asarray(candles, dtype=DTYPE).reshape(-1, ROW_WIDTH)
+    path = series_path(symbol, timeframe, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _rewrite_merged(path, rows[:0], rows)
+    return rows
+
+def _drop_partial_row(path):
+    # A write killed mid-row leaves a few trailing bytes: row_count/load already floor them away,
+    # but an append after them would shift every following row
+    if os.path.exists(path) and os.path.getsize(path) % ROW_BYTES:
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) // ROW_BYTES * ROW_BYTES)
+
+def _rewrite_merged(path, existing, rows):
+    merged = np.concatenate([rows, existing])
+    _, first = np.unique(merged[:, 0], return_index=True)  # rows come first, so new data wins
+    merged = merged[first]
+    tmp_path = path + ".tmp"
+    merged.tofile(tmp_path)
+    os.replace(tmp_path, path)
+
+# ✅ Catch-up after downtime: exchanges cap a 'since' request (Kraken at the newest 720 candles,
+# others at 300-1000 from 'since'), so update pages forward until it reaches the present. When the
+# exchange can't reach back to the stored tail at all, the series restarts from what it returned
+# rather than silently appending across the hole.
+MAX_CATCH_UP_PAGES = int(os.getenv("MAX_CATCH_UP_PAGES", 20))
+
+def _fetch_args(symbol, timeframe, limit, store_dir):
+    last = last_timestamp(symbol, timeframe, store_dir)
+    if last is None:
+        return {'limit': limit}
+    # Re-request the newest stored candle too, it may still have been forming
+    return {'since': last - timeframe_ms(timeframe)}
+
+def _store_page(symbol, timeframe, ohlcv, store_dir, now_ms=None):
+    """Stores one fetched page; returns (rows, since of the next page or None when caught up)."""
+    rows = np.asarray(ohlcv, dtype=DTYPE).reshape(-1, ROW_WIDTH)
+    if len(rows) == 0:
+        return rows, None
+    step = timeframe_ms(timeframe)
+    last = last_timestamp(symbol, timeframe, store_dir)
+    if last is not None and rows[:, 0].min() > last + step:
+        print(f"⚠️ {symbol} {timeframe}: no candles between {last} and {int(rows[:, 0].min())}, restarting the series")
+        return reset(symbol, timeframe, rows, store_dir), None
+    write(symbol, timeframe, rows, store_dir)
+    newest = rows[:, 0].max()
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    if last is None or newest <= last or newest >= now_ms - 2 * step:
+        return rows, None
+    return rows, int(newest)
+
+def update(exchange, symbol, timeframe='5m', limit=100, store_dir=CANDLE_STORE_DIR):
+    """Fetches only candles newer than the stored ones (or 'limit' candles for a new series) and stores them."""
+    pages, args = [], _fetch_args(symbol, timeframe, limit, store_dir)
+    for _ in range(MAX_CATCH_UP_PAGES):
+        rows, since = _store_page(symbol, timeframe, exchange.fetch_ohlcv(symbol, timeframe, **args), store_dir)
+        pages.append(rows)
+        if since is None:
+            break
+        args = {'since': since}
+    return _joined(pages)
+
+async def update_async(exchange, symbol, timeframe='5m', limit=100, store_dir=CANDLE_STORE_DIR):
+    """Async version of update for ccxt.async_support clients."""
+    pages, args = [], _fetch_args(symbol, timeframe, limit, store_dir)
+    for _ in range(MAX_CATCH_UP_PAGES):
+        rows, since = _store_page(symbol, timeframe, await exchange.fetch_ohlcv(symbol, timeframe, **args), store_dir)
+        pages.append(rows)
+        if since is None:
+            break
+        args = {'since': since}
+    return _joined(pages)
+
+def _joined(pages):
+    # Pages overlap by one candle (each re-requests the previous page's newest): keep the later copy
+    rows = np.concatenate(pages)
+    _, last = np.unique(rows[::-1, 0], return_index=True)
+    return rows[::-1][last]
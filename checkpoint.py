@@ -0,0 +1,79 @@
+import os
+import pickle
+import time
+import zlib
+
+# ✅ Checkpoint Parameters
+CHECKPOINT_FILE = os.path.expanduser(os.getenv("CHECKPOINT_FILE", "~/Documents/kraken_test_checkpoint.bin"))
+CHECKPOINT_INTERVAL = float(os.getenv("CHECKPOINT_INTERVAL", "300"))  # Seconds between saves
+CHECKPOINT_MAX_AGE = float(os.getenv("CHECKPOINT_MAX_AGE", str(24 * 3600)))  # Older checkpoints are ignored
+CHECKPOINT_VERSION = 1  # Bump when the pickled classes change shape, so old files are ignored instead of misread
+
+# The scanner's in-memory working state (streaming indicators, regimes, pre-filter buffer, hot
+# symbols) as one zlib-compressed pickle. Candles, pending post-breakout checks and the journal are
+# already on disk; this covers everything a restart would otherwise rebuild from scratch.
+
+def save(state, path=CHECKPOINT_FILE):
+    """Writes the checkpoint atomically (temp file + rename); returns its size in bytes."""
+    payload = {'version': CHECKPOINT_VERSION, 'saved_at': time.time(), 'state': state}
+    data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(data)
+
+def load(path=CHECKPOINT_FILE, max_age=CHECKPOINT_MAX_AGE):
+    """(state, age in seconds), or (None, None) if there is no usable checkpoint."""
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable checkpoint {path}: {e}")
+        return None, None
+    age = time.time() - payload.get('saved_at', 0)
+    if payload.get('version') != CHECKPOINT_VERSION:
+        print(f"⚠️ Ignoring checkpoint {path}: version {payload.get('version')}, expected {CHECKPOINT_VERSION}")
+        return None, None
+    if age > max_age:
+        print(f"⚠️ Ignoring checkpoint {path}: {age / 3600:.1f}h old")
+        return None, None
+    return payload['state'], age
+
+def newer_rows(candles, last_timestamp):
+    """Stored candles from last_timestamp on (the forming candle again, then anything newer).
+
+    Returns None when the stored window starts after last_timestamp: the gap is wider than what was
+    loaded, so the caller should rebuild that state instead of feeding it a hole.
+    """
+    if len(candles) and candles[0, 0] > last_timestamp:
+        return None
+    return candles[candles[:, 0] >= last_timestamp]
+
+class Checkpointer:
+    """Saves collect() to disk at most every 'interval' seconds."""
+
+    def __init__(self, collect, path=CHECKPOINT_FILE, interval=CHECKPOINT_INTERVAL):
+        self.collect = collect
+        self.path = path
+        self.interval = interval
+        self.last_saved = time.monotonic()
+
+    def maybe_save(self, force=False):
+        if not force and time.monotonic() - self.last_saved < self.interval:
+            return None
+        start = time.perf_counter()
+        try:
+            size = save(self.collect(), self.path)
+        except Exception as e:
+            print(f"❌ Error saving checkpoint: {e}")
+            return None
+        finally:
+            self.last_saved = time.monotonic()
+        print(f"💾 Checkpoint saved ({size / 1024:.0f} KB in {time.perf_counter() - start:.2f}s)")
+        return size
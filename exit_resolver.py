@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import candle_store
+
+# ✅ Exit Resolver Parameters
+EXIT_TIMEFRAMES = ('1h', '5m', '1m')  # Coarse to fine; ambiguous candles drill down one step at a time
+HORIZON_HOURS = 4  # How long a trade may stay open before it is marked to market
+
+def first_touch(high, low, start, target, stop, window):
+    """Offsets of the first candle at or after each 'start' whose high reaches target / low reaches stop.
+
+    Everything is resolved at once on an (entries x window) view; 'window' means no touch.
+    """
+    highs = np.concatenate((high, np.full(window, -np.inf)))
+    lows = np.concatenate((low, np.full(window, np.inf)))
+    hit_target = sliding_window_view(highs, window)[start] >= target[:, None]
+    hit_stop = sliding_window_view(lows, window)[start] <= stop[:, None]
+    first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), window)
+    first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), window)
+    return first_target, first_stop
+
+def _resolve_level(load_candles, symbol, timeframes, span_start, span_end, target, stop, result, rows):
+    """Resolves rows whose candle window is [span_start, span_end) on timeframes[0], drilling into ties."""
+    timeframe = timeframes[0]
+    step = candle_store.timeframe_ms(timeframe)
+    candles = load_candles(symbol, timeframe, int(span_start.min()) // step * step, int(span_end.max()))
+    if len(candles) == 0:
+        return
+
+    timestamps = candles[:, 0]
+    start = np.maximum(np.searchsorted(timestamps, span_start, side='right') - 1, 0)
+
+    # The candle holding span_start also holds prices from before it: resolve its part from span_start on
+    # the finer timeframes first, then carry on here from the next candle with the rows still open
+    partial = timestamps[start] < span_start
+    if partial.any() and len(timeframes) > 1:
+        head_end = np.minimum(timestamps[start[partial]] + step, span_end[partial])
+        _resolve_level(load_candles, symbol, timeframes[1:], span_start[partial], head_end,
+                       target[partial], stop[partial], result, rows[partial])
+        start = start + partial
+        still_open = result['outcome'][rows] == 'open'
+        span_start, span_end, target, stop, rows, start = (
+            values[still_open] for values in (span_start, span_end, target, stop, rows, start))
+        if len(rows) == 0:
+            return
+
+    window = max(1, int(np.ceil((span_end - span_start).max() / step)) + 1)
+    first_target, first_stop = first_touch(candles[:, 2], candles[:, 3], start, target, stop, window)
+
+    # Touches past the end of the row's own span don't count
+    span_candles = np.searchsorted(timestamps, span_end) - start
+    first_target = np.where(first_target < span_candles, first_target, window)
+    first_stop = np.where(first_stop < span_candles, first_stop, window)
+
+    touch = np.minimum(first_target, first_stop)
+    touched = touch < window
+    touch_idx = np.minimum(start + touch, len(timestamps) - 1)
+    tied = touched & (first_target == first_stop)
+
+    targeted = touched & (first_target < first_stop)
+    stopped = touched & (first_stop < first_target)
+    result['outcome'][rows[targeted]] = 'target'
+    result['outcome'][rows[stopped]] = 'stop'
+    result['exit_ms'][rows[touched]] = timestamps[touch_idx[touched]]
+
+    # Untouched rows are marked to market at the last close inside their span
+    last_idx = start + span_candles - 1
+    has_data = ~touched & (span_candles > 0)
+    result['last_close'][rows[has_data]] = candles[last_idx[has_data], 4]
+    result['last_ms'][rows[has_data]] = timestamps[last_idx[has_data]]
+
+    if tied.any():
+        result['outcome'][rows[tied]] = 'ambiguous'
+        if len(timeframes) > 1:
+            tie_start = timestamps[touch_idx[tied]]
+            _resolve_level(load_candles, symbol, timeframes[1:], tie_start, tie_start + step,
+                           target[tied], stop[tied], result, rows[tied])
+
+def resolve_exits(breakouts, load_candles, timeframes=EXIT_TIMEFRAMES, horizon_hours=HORIZON_HOURS):
+    """Works out which of target or stop each breakout hit first.
+
+    breakouts needs 'symbol', 'timestamp' (UTC), 'price', 'target_price' and 'stop_loss'.
+    load_candles(symbol, timeframe, since_ms, until_ms) returns an (n, 6) OHLCV array.
+    Adds 'outcome' (target/stop/ambiguous/open), 'exit_time', 'exit_price', 'time_to_exit'
+    and 'pnl_pct'. Candles where both levels are touched are re-checked on the next finer
+    timeframe; if the finest one still can't tell, the outcome is 'ambiguous' and the
+    stop is assumed (the conservative choice).
+    """
+    n = len(breakouts)
+    entry_ms = ((breakouts["timestamp"] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)).to_numpy()
+    entry_price = breakouts["price"].to_numpy(dtype=float)
+    target = breakouts["target_price"].to_numpy(dtype=float)
+    stop = breakouts["stop_loss"].to_numpy(dtype=float)
+    horizon_ms = horizon_hours * 3600 * 1000
+
+    result = {
+        'outcome': np.full(n, 'open', dtype=object),
+        'exit_ms': np.full(n, np.nan),
+        'last_close': np.full(n, np.nan),
+        'last_ms': np.full(n, np.nan),
+    }
+    for symbol, positions in breakouts.groupby("symbol").indices.items():
+        try:
+            _resolve_level(load_candles, symbol, timeframes, entry_ms[positions], entry_ms[positions] + horizon_ms,
+                           target[positions], stop[positions], result, positions)
+        except Exception as e:
+            print(f"❌ Error resolving exits for {symbol}: {e}")
+
+    outcome = result['outcome']
+    is_target = outcome == 'target'
+    is_stop = (outcome == 'stop') | (outcome == 'ambiguous')
+    exit_price = np.where(is_target, target, np.where(is_stop, stop, result['last_close']))
+    exit_ms = np.where(is_target | is_stop, result['exit_ms'], result['last_ms'])
+
+    breakouts["outcome"] = outcome
+    breakouts["exit_time"] = pd.to_datetime(exit_ms, unit='ms', utc=True)
+    breakouts["exit_price"] = exit_price
+    breakouts["time_to_exit"] = pd.to_timedelta(exit_ms - entry_ms, unit='ms')
+    breakouts["pnl_pct"] = (exit_price / entry_price - 1) * 100
+    return breakouts
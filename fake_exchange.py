@@ -0,0 +1,116 @@
+import asyncio
+import time
+import zlib
+import numpy as np
+
+# Local stand-ins for ccxt exchanges: deterministic random-walk markets with a configurable
+# per-request latency, so scanners can be exercised without touching a live venue.
+
+FIVE_MINUTES = 300_000
+
+def _uniform(steps, key):
+    """Uniform [0, 1) numbers from a splitmix64 hash of (step, key): random access, no per-step RNG."""
+    x = steps.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + key
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+
+class FakeExchange:
+    """Synchronous ccxt-like exchange serving generated tickers and OHLCV."""
+
+    def __init__(self, name='fake', symbols=None, latency=0.0, quotes=('USD',), seed=0):
+        self.id = name
+        self.latency = latency
+        self.seed = seed
+        if symbols is None:
+            symbols = [f"COIN{i}/{quote}" for i in range(50) for quote in quotes]
+        self.symbols = list(symbols)
+        # 'BASE/QUOTE:SETTLE' symbols are perpetual swaps, like in ccxt; everything else is spot
+        self.markets = {symbol: {'symbol': symbol, 'base': symbol.split('/')[0], 'quote': symbol.split('/')[1].split(':')[0],
+                                 'spot': ':' not in symbol, 'swap': ':' in symbol}
+                        for symbol in self.symbols}
+        self.options = {}
+        self.requests = {'load_markets': 0, 'fetch_ticker': 0, 'fetch_tickers': 0, 'fetch_ohlcv': 0}
+
+    def _wait(self, endpoint):
+        self.requests[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _prices(self, symbol, timestamps):
+        """Deterministic prices for a symbol at 5m boundaries (vectorized over timestamps)."""
+        key = np.uint64(zlib.crc32(symbol.encode()) * 1000003 + self.seed)
+        steps = np.asarray(timestamps, dtype=np.int64) // FIVE_MINUTES
+        u1, u2 = _uniform(steps, key), _uniform(steps, key ^ np.uint64(0x5DEECE66D))
+        noise = np.sqrt(-2 * np.log(1 - u1)) * np.cos(2 * np.pi * u2)  # Box-Muller: one normal per step
+        base = 1 + zlib.crc32(symbol.encode()) % 1000
+        return base * (1 + 0.05 * np.sin(steps / 50)) * (1 + 0.002 * noise)
+
+    def _price(self, symbol, timestamp):
+        return float(self._prices(symbol, [timestamp])[0])
+
+    def _candles(self, symbol, timeframe, since=None, limit=None):
+        """Candles up to now: the last 'limit' (default 100), or from 'since' (capped at 720 like Kraken)."""
+        step = {'1m': 60_000, '5m': FIVE_MINUTES, '15m': 900_000, '1h': 3_600_000, '4h': 14_400_000}[timeframe]
+        now = int(time.time() * 1000) // step * step
+        if since is None:
+            start = now - ((limit or 100) - 1) * step
+        else:
+            start = max(since // step * step, now - 719 * step)
+        timestamps = np.arange(start, now + 1, step, dtype=np.int64)
+        close = self._prices(symbol, timestamps)
+        open_ = self._prices(symbol, timestamps - step)
+        rows = np.column_stack([timestamps, open_, np.maximum(open_, close) * 1.001, np.minimum(open_, close) * 0.999,
+                                close, np.full(len(timestamps), 1000.0)]).tolist()
+        return rows[:limit] if limit else rows
+
+    def load_markets(self, reload=False):
+        self._wait('load_markets')
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = dict(markets)
+        self.symbols = list(self.markets)
+        return self.markets
+
+    def fetch_ticker(self, symbol):
+        self._wait('fetch_ticker')
+        return {'symbol': symbol, 'last': self._price(symbol, time.time() * 1000)}
+
+    def fetch_tickers(self, symbols=None):
+        self._wait('fetch_tickers')
+        now = time.time() * 1000
+        return {symbol: {'symbol': symbol, 'last': self._price(symbol, now)} for symbol in (symbols or self.symbols)}
+
+    def fetch_ohlcv(self, symbol, timeframe='5m', since=None, limit=None):
+        self._wait('fetch_ohlcv')
+        return self._candles(symbol, timeframe, since, limit)
+
+class AsyncFakeExchange(FakeExchange):
+    """ccxt.async_support-like version; latency is awaited so requests overlap like real I/O."""
+
+    async def _await(self, endpoint):
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def load_markets(self, reload=False):
+        await self._await('load_markets')
+        return self.markets
+
+    async def fetch_ticker(self, symbol):
+        await self._await('fetch_ticker')
+        return {'symbol': symbol, 'last': self._price(symbol, time.time() * 1000)}
+
+    async def fetch_tickers(self, symbols=None):
+        await self._await('fetch_tickers')
+        now = time.time() * 1000
+        return {symbol: {'symbol': symbol, 'last': self._price(symbol, now)} for symbol in (symbols or self.symbols)}
+
+    async def fetch_ohlcv(self, symbol, timeframe='5m', since=None, limit=None):
+        await self._await('fetch_ohlcv')
+        return self._candles(symbol, timeframe, since, limit)
+
+    async def close(self):
+        pass
@@ -1,5 +1,7 @@
 import os
 import pandas as pd
+from exit_resolver import resolve_exits
+from bot_performance_analysis import fetch_symbol_candles
 
 # ✅ Define the correct breakout log file path
 LOG_FILE = os.path.expanduser("~/Documents/breakout_log.csv")
@@ -44,9 +46,10 @@ df["success"] = df["previous_high"].notna() & (df["price"] > df["previous_high"]
 df["target_price"] = df["price"] * 1.03  # 3% profit target
 df["stop_loss"] = df["price"] * 0.97  # 3% stop loss
 
-# ✅ Determine if trade hit target or stop-loss
-df["hit_target"] = df["price"] >= df["target_price"]
-df["hit_stop"] = df["price"] <= df["stop_loss"]
+# ✅ Determine whether the trade hit target or stop-loss first (walks the forward candles)
+df = resolve_exits(df, fetch_symbol_candles)
+df["hit_target"] = df["outcome"] == "target"
+df["hit_stop"] = df["outcome"].isin(["stop", "ambiguous"])
 
 # ✅ Calculate profit per trade
 df["profit"] = df["hit_target"] * (df["target_price"] - df["price"]) - df["hit_stop"] * (df["price"] - df["stop_loss"])
@@ -60,6 +63,8 @@ print("\n📊 **Full Breakout Performance & Profitability Summary**")
 print(f"🔹 Total Breakouts Analyzed: {len(df)}")
 print(f"✅ Winning Trades: {df['hit_target'].sum()} ({win_rate:.2f}%)")
 print(f"❌ Stopped Out Trades: {df['hit_stop'].sum()}")
+print(f"⏱️ Median Time to Exit: {df.loc[df['outcome'] != 'open', 'time_to_exit'].median()}")
+print(f"💰 Realized PnL: {df['pnl_pct'].sum():.2f}% (avg {df['pnl_pct'].mean():.3f}% per trade)")
 print(f"💰 Estimated Total Profit: {total_profit:.4f} (assumes 1 unit per trade)")
 
 # ✅ Display best-performing assets
@@ -0,0 +1,75 @@
+import mmap
+import os
+import struct
+import time
+
+# ✅ Heartbeat Parameters
+HEARTBEAT_DIR = os.path.expanduser(os.getenv("HEARTBEAT_DIR", "~/Documents/heartbeats"))
+HEARTBEAT_STALL = float(os.getenv("HEARTBEAT_STALL", "90"))  # Seconds a sweep may go without progress
+
+# The bot publishes its liveness in a small memory-mapped file that the supervisor polls. Every
+# beat carries a deadline: the time by which the next beat is due (mid-sweep: now + HEARTBEAT_STALL,
+# after a sweep: the idle time plus that). Past the deadline the bot is stalled, whether or not the
+# process still exists. A sequence number (odd while a write is in progress) keeps reads consistent.
+
+LAYOUT = struct.Struct('<QqdddddQ')  # seq, pid, started_at, beat_at, deadline, sweep_end, sweep_seconds, sweeps
+FIELDS = ('pid', 'started_at', 'beat_at', 'deadline', 'sweep_end', 'sweep_seconds', 'sweeps')
+
+def heartbeat_path(name, heartbeat_dir=HEARTBEAT_DIR):
+    return os.path.join(heartbeat_dir, f"{name}.hb")
+
+class Heartbeat:
+    """Writer side: the bot calls beat() while it works and sweep_done() after every sweep."""
+
+    def __init__(self, path, stall=HEARTBEAT_STALL):
+        self.path = path
+        self.stall = stall
+        self.map = None
+        self.seq = 0
+        self.values = {'pid': os.getpid(), 'started_at': time.time(), 'beat_at': 0.0, 'deadline': 0.0,
+                       'sweep_end': 0.0, 'sweep_seconds': 0.0, 'sweeps': 0}
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            os.ftruncate(fd, LAYOUT.size)
+            self.map = mmap.mmap(fd, LAYOUT.size)
+        finally:
+            os.close(fd)
+
+    def _publish(self, **values):
+        if self.map is None:
+            self._open()
+        self.values.update(values)
+        self.seq += 1  # Odd: readers retry until the write below completes
+        struct.pack_into('<Q', self.map, 0, self.seq)
+        self.seq += 1
+        LAYOUT.pack_into(self.map, 0, self.seq, *(self.values[field] for field in FIELDS))
+
+    def beat(self, timeout=None):
+        """Progress inside a sweep: the next beat is due within timeout (default HEARTBEAT_STALL) seconds."""
+        now = time.time()
+        self._publish(beat_at=now, deadline=now + (self.stall if timeout is None else timeout))
+
+    def sweep_done(self, duration, idle=0.0):
+        """A completed sweep; the next beat is due after 'idle' seconds of sleep plus HEARTBEAT_STALL."""
+        now = time.time()
+        self._publish(beat_at=now, deadline=now + idle + self.stall, sweep_end=now, sweep_seconds=duration,
+                      sweeps=self.values['sweeps'] + 1)
+
+def read_heartbeat(path, retries=10):
+    """The latest heartbeat as a dict, or None if there is none (yet)."""
+    try:
+        with open(path, 'rb') as f:
+            for _ in range(retries):
+                data = os.pread(f.fileno(), LAYOUT.size, 0)
+                if len(data) < LAYOUT.size:
+                    return None
+                seq, *values = LAYOUT.unpack(data)
+                if seq and seq % 2 == 0 and struct.unpack_from('<Q', os.pread(f.fileno(), 8, 0))[0] == seq:
+                    return dict(zip(FIELDS, values))
+                time.sleep(0.001)
+    except FileNotFoundError:
+        return None
+    return None
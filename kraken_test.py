@@ -1,8 +1,29 @@
+import startup  # First, so the launch-to-first-sweep clock covers every other import
+import atexit
+import math
 import os
+import signal
+import sys
 import time
-import ccxt
-import pandas as pd
-import talib
+from price_snapshot import PriceSnapshot, fetch_price_snapshot
+from post_breakout_scheduler import PostBreakoutScheduler
+from breakout_journal import BreakoutJournal
+import candle_store
+import resample
+from prefilter import CandidateFilter
+from market_state import MarketStates, REGIME_TIMEFRAME, REGIME_WARMUP
+from streaming_indicators import IndicatorState
+import rate_limiter
+from alerts import close_dispatcher, send_telegram_message
+from rate_limiter import PRIORITY_CONFIRM, PRIORITY_SWEEP
+import market_cache
+import checkpoint
+import sharding
+from heartbeat import Heartbeat, heartbeat_path
+
+# ✅ Heavy modules only load when first used (the sweep itself never needs them)
+pd = startup.lazy_import('pandas')
+talib = startup.lazy_import('talib')
     
 # ✅ Load API keys from environment variables
 api_key = os.getenv("KRAKEN_API_KEY")
@@ -12,8 +33,8 @@ if not api_key or not api_secret:
     print("❌ API keys are missing! Set them in the terminal.")
     exit()
 
-# ✅ Initialize Kraken API
-exchange = ccxt.kraken({
+# ✅ Initialize Kraken API (every request goes through the shared rate-limit scheduler)
+exchange = rate_limiter.create_exchange({
     'apiKey': api_key,
     'secret': api_secret,
 })
@@ -22,14 +43,28 @@ exchange = ccxt.kraken({
 TRAILING_STOP_PERCENT = 5
 RISK_PER_TRADE = 0.02
 LOG_FILE = os.path.expanduser("~/Documents/breakout_log.csv")
+POST_BREAKOUT_DELAY = 60  # Seconds after a breakout to capture the post-breakout price
+POST_BREAKOUT_RETRY_DELAY = 10
+SWEEP_SLEEP = 60  # Seconds between sweeps
+
+# ✅ Liveness for the supervisor (bot_watchdog.py): one heartbeat file per scanner (shard)
+HEARTBEAT_FILE = os.getenv("HEARTBEAT_FILE") or heartbeat_path(sharding.shard_name("kraken_test"))
+heartbeat = Heartbeat(HEARTBEAT_FILE)
+
+# ✅ Bulk price snapshot shared by every price lookup (symbols are set in main)
+price_snapshot = PriceSnapshot(exchange)
+
+def set_exchange(client):
+    """Points the scanner at another client (e.g. a fake exchange for benchmarks)."""
+    global exchange
+    exchange = client
+    price_snapshot.exchange = client
 
-# ✅ Fetch Historical OHLCV Data
+# ✅ Fetch Historical OHLCV Data (only candles newer than the local store are downloaded)
 def get_ohlcv(symbol, timeframe='5m', limit=100):
     try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-        df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        return df
+        candle_store.update(exchange, symbol, timeframe, limit=limit)
+        return candle_store.load_df(symbol, timeframe, limit=limit)
     except Exception as e:
         print(f"❌ Error fetching OHLCV for {symbol}: {e}")
         return None
@@ -51,74 +86,117 @@ def calculate_indicators(df):
 
     return df
     
-# ✅ Fetch Current Price
-def get_current_price(symbol):
+# ✅ Streaming Indicator State (one per symbol/timeframe, fed only new candles)
+indicator_states = {}
+market_states = MarketStates()  # Bull/Bear/Ranging per symbol, from the 1h candles confirmation keeps current
+
+def get_indicator_states(symbol, timeframes, limit=100):
+    """Updates every timeframe's indicators from one fetch of timeframes[0]; the rest are resampled from it."""
     try:
-        ticker = exchange.fetch_ticker(symbol)
-        return ticker['last']
+        new_candles = resample.update(exchange, symbol, timeframes[0], timeframes[1:], limit=limit,
+                                      seed_limit=REGIME_WARMUP)
     except Exception as e:
-        print(f"❌ Error fetching price for {symbol}: {e}")
-        return None 
+        print(f"❌ Error fetching OHLCV for {symbol}: {e}")
+        return {}
+
+    states = {}
+    for timeframe in timeframes:
+        state = indicator_states.get((symbol, timeframe))
+        candles = new_candles[timeframe]
+        if state is None:
+            # Warm up from the stored window the first time we see this series
+            state = indicator_states[(symbol, timeframe)] = IndicatorState()
+            candles = candle_store.load(symbol, timeframe, limit=limit)
+        for candle in candles:
+            state.update(candle)
+        states[timeframe] = state
+    if REGIME_TIMEFRAME in new_candles:
+        market_states.update(symbol, new_candles[REGIME_TIMEFRAME])
+    return states
+
+# ✅ Fetch Current Price
+def get_current_price(symbol):
+    price = price_snapshot.get(symbol)
+    if price is None:
+        print(f"❌ Error fetching price for {symbol}: not in snapshot")
+    return price
         
-# ✅ Log Breakout to File
+# ✅ Log Breakout to the Journal
 def log_breakout(symbol, entry_price):
     try:
         target_price = round(entry_price * 1.05, 6)
         stop_loss = round(entry_price * 0.98, 6)
         timestamp = pd.Timestamp.utcnow()
-        log_entry = f"{timestamp},{symbol},{entry_price},{target_price},{stop_loss},N/A\n"
         
         # Print log entry to check it
-        print(f"Logging Breakout: {log_entry}")
+        print(f"Logging Breakout: {timestamp},{symbol},{entry_price},{target_price},{stop_loss},N/A")
 
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines() 
-        
-        for line in lines[-10:]:
-            if symbol in line and "N/A" in line:
-                print(f"⚠️ Duplicate breakout for {symbol}, already recorded.")
-                return
+        if journal.open_breakout(symbol) is not None:
+            print(f"⚠️ Duplicate breakout for {symbol}, already recorded.")
+            return None
     
-        with open(LOG_FILE, "a") as f:
-            f.write(log_entry)
+        breakout_id = journal.record(timestamp, symbol, entry_price, target_price, stop_loss)
     
         print(f"✅ Breakout Logged: {symbol} at {entry_price} | Target: {target_price} | Stop: {stop_loss}")
         
-        time.sleep(60)
-        post_breakout_price = get_current_price(symbol)
-    
-        retries = 3
-        while post_breakout_price is None and retries > 0:
-            print(f"⚠️ Retrying post-breakout price fetch for {symbol} ({3 - retries} attempts left)...")
-            time.sleep(10)
-            post_breakout_price = get_current_price(symbol)
-            retries -= 1  
-        
+        # Post-breakout price is captured in the background so scanning carries on
+        post_breakout_scheduler.schedule(breakout_id, symbol, POST_BREAKOUT_DELAY, retries=3)
+        return breakout_id
+
+    except Exception as e:
+        print(f"❌ Error logging breakout: {e}")
+        return None
+
+# ✅ Queue a Telegram Alert (sent in the background, bursts are coalesced into digests)
+def alert_payload(symbol, timeframe='5m'):
+    """The last candle and indicators an alert shows, or None before the symbol has any state."""
+    state = indicator_states.get((symbol, timeframe))
+    if state is None:
+        return None
+    indicators = state.values()
+    return {
+        'close': [state.last[4]], 'high': [state.last[2]],
+        'RSI': [indicators['RSI']], 'MA20': [indicators['MA20']], 'MA50': [indicators['MA50']],
+    }
+
+def alert_breakout(symbol, price, payload=None):
+    """payload comes from alert_payload(), here or in the scanner process that holds the symbol's state."""
+    payload = alert_payload(symbol) if payload is None else payload
+    if payload is None:
+        return
+    send_telegram_message(symbol, price, payload)
+
+# ✅ Fill in the Post-Breakout Price (runs on the scheduler thread)
+def update_post_breakout_price(check, post_breakout_price):
+    symbol = check["symbol"]
+    try:
         if post_breakout_price is None:
-            print(f"⚠️ Warning: Could not fetch post-breakout price for {symbol}. Keeping 'N/A'.")
+            retries = check.get("retries", 0)
+            if retries > 0:
+                print(f"⚠️ Retrying post-breakout price fetch for {symbol} ({retries} attempts left)...")
+                post_breakout_scheduler.schedule(check["id"], symbol, POST_BREAKOUT_RETRY_DELAY, retries=retries - 1)
+            else:
+                print(f"⚠️ Warning: Could not fetch post-breakout price for {symbol}. Keeping 'N/A'.")
+                journal.expire(check["id"])
             return
 
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()
-        
-        updated = False
-        for i in range(len(lines) - 1, -1, -1):
-            if symbol in lines[i] and "N/A" in lines[i]:
-                parts = lines[i].strip().split(',')
-                if len(parts) == 6:
-                    parts[-1] = str(post_breakout_price)  # Update post-breakout price
-                    lines[i] = ','.join(parts) + '\n'
-                    updated = True
-                    break
-
-        if updated:
-            with open(LOG_FILE, "w") as f:
-                f.writelines(lines)
-
-            print(f"✅ Updated log with post-breakout price: {post_breakout_price}")
+        journal.set_post_price(check["id"], post_breakout_price)
+        print(f"✅ Updated log with post-breakout price: {post_breakout_price}")
 
     except Exception as e:
-        print(f"❌ Error logging breakout: {e}")
+        print(f"❌ Error updating post-breakout price: {e}")
+
+# ✅ Background Post-Breakout Price Capture (one thread, batched price fetches)
+journal = BreakoutJournal()
+
+def fetch_post_breakout_prices(symbols):
+    with exchange.scheduler.priority(PRIORITY_CONFIRM):
+        return fetch_price_snapshot(exchange, symbols)
+
+post_breakout_scheduler = PostBreakoutScheduler(
+    fetch_post_breakout_prices, update_post_breakout_price,
+    path=sharding.shard_path(os.path.expanduser("~/Documents/pending_post_breakout_kraken.json"))
+)
 
 # ✅ Confirm Breakout with Dynamic Adjustments
 def confirm_breakout(symbol):
@@ -136,24 +214,25 @@ def confirm_breakout(symbol):
     dynamic_atr_multiplier = 1
     dynamic_volume_multiplier = 1
             
-    # Fetch OHLCV data for each timeframe
+    # Update the streaming indicators for each timeframe (one 5m fetch, higher timeframes resampled)
+    states = get_indicator_states(symbol, timeframes)
     for tf in timeframes:
-        df = get_ohlcv(symbol, timeframe=tf)   
-        if df is None or len(df) < 50:
+        state = states.get(tf)
+        if state is None or state.count < 50:
             continue
                 
-        df = calculate_indicators(df)
-        if df is None or 'ATR' not in df.columns:
+        indicators = state.values()
+        if math.isnan(indicators['ATR']):
             print(f"⚠️ Skipping {symbol} on {tf} due to missing ATR data.")
             continue
         
-        recent_high = df['high'].iloc[-2]
-        current_price = df['close'].iloc[-1]
-        ma20 = df['MA20'].iloc[-1]  # Example moving average
+        recent_high = state.previous[2]
+        current_price = state.last[4]
+        ma20 = indicators['MA20']  # Example moving average
         
-        atr_values.append(df['ATR'].iloc[-1])
-        rsi_values.append(df['RSI'].iloc[-1])
-        volume_values.append(df['volume'].iloc[-1])
+        atr_values.append(indicators['ATR'])
+        rsi_values.append(indicators['RSI'])
+        volume_values.append(state.last[5])
     
         # Check if the current price is greater than the recent high and also if it's above the MA20
         if current_price > recent_high and current_price > ma20:
@@ -188,32 +267,177 @@ def confirm_breakout(symbol):
     # Compare confirmations with the dynamic min_confirmations
     return confirmations >= min_confirmations, breakout_price
 
+# ✅ Record a Confirmed Breakout (journal, post-breakout check, alert)
+def record_breakout(symbol, price, payload=None):
+    if log_breakout(symbol, price) is not None:
+        alert_breakout(symbol, price, payload)
+
+# ✅ One Sweep: cheap pre-filter, regime gate, then full confirmation of the survivors
+def scan_once(tradable_symbols, candidate_filter, hot_symbols, on_breakout=record_breakout):
+    """Runs one sweep and returns (breakouts, symbols confirmed); hot_symbols is updated in place."""
+    breakouts = 0
+    confirmed = 0
+    heartbeat.beat()
+
+    # Stage 1: rank everything by distance to its rolling high from one bulk snapshot
+    candidates, audit = candidate_filter.select(tradable_symbols, price_snapshot.refresh(), keep=hot_symbols,
+                                                penalties=market_states.penalties())
+    audited = set(audit)
+
+    # Stage 2: full confirmation for candidates only (hot ones first and ahead of any other queued request)
+    ordered = sorted(candidates, key=lambda s: s not in hot_symbols) + audit
+    for symbol in ordered:
+        heartbeat.beat()  # Per symbol, the regime gate too: its refresh fetches add up on a small rate share
+
+        # Symbols in a Bear/Ranging regime don't get any confirmation fetches
+        hot = symbol in hot_symbols
+        if not hot and symbol not in audited and market_states.should_skip(symbol, exchange):
+            continue
+        print(f"🔍 Checking {symbol}...")
+        confirmed += 1
+
+        with exchange.scheduler.priority(PRIORITY_CONFIRM if hot else PRIORITY_SWEEP):
+            breakout, price = confirm_breakout(symbol)
+        candidate_filter.record(symbol, breakout, audited=symbol in audited)
+        if price is not None:
+            hot_symbols.add(symbol)
+        else:
+            hot_symbols.discard(symbol)
+
+        if breakout:
+            print(f"🚀 Breakout Confirmed: {symbol} at {price}")
+            on_breakout(symbol, price)
+            breakouts += 1
+    return breakouts, confirmed
+
+# ✅ Checkpoint / Restore (a restart resumes the in-memory state and only replays the candles it missed)
+def checkpoint_state(candidate_filter, hot_symbols):
+    return {
+        'indicator_states': indicator_states,
+        'market_states': market_states.states,
+        'candidate_filter': candidate_filter,
+        'hot_symbols': hot_symbols,
+    }
+
+def restore_checkpoint(path=sharding.shard_path(checkpoint.CHECKPOINT_FILE), limit=100):
+    """Restores the last checkpoint, caught up from the candle store; returns (candidate_filter, hot_symbols).
+
+    Candles stored after the checkpoint are replayed from disk, and anything newer is fetched by the
+    normal incremental updates, so only the gap is backfilled. A state whose gap is wider than the
+    stored window is dropped and rebuilt on first use, as without a checkpoint.
+    """
+    state, age = checkpoint.load(path)
+    if state is None:
+        return CandidateFilter(), set()
+
+    start = time.perf_counter()
+    dropped = 0
+    for (symbol, timeframe), indicators in state['indicator_states'].items():
+        rows = None
+        if indicators.last is not None:
+            rows = checkpoint.newer_rows(candle_store.load(symbol, timeframe, limit=limit), indicators.last[0])
+        if rows is None:
+            dropped += 1
+            continue
+        for candle in rows:
+            indicators.update(candle)
+        indicator_states[(symbol, timeframe)] = indicators
+
+    for symbol, regime in state['market_states'].items():
+        rows = None
+        if regime.last_timestamp is not None:
+            rows = checkpoint.newer_rows(candle_store.load(symbol, REGIME_TIMEFRAME, limit=REGIME_WARMUP),
+                                         regime.last_timestamp)
+        if rows is None:
+            dropped += 1
+            continue
+        for candle in rows:
+            regime.update(candle)
+        market_states.states[symbol] = regime
+
+    candidate_filter = state['candidate_filter']
+    for symbol in candidate_filter.buffer.symbols:
+        candidate_filter.invalidate(symbol)
+
+    print(f"♻️ Restored checkpoint from {age / 60:.1f} min ago: {len(indicator_states)} indicator series, "
+          f"{len(market_states.states)} regimes, {len(state['hot_symbols'])} hot symbols "
+          f"({dropped} too stale, rebuilt on use) in {time.perf_counter() - start:.2f}s")
+    return candidate_filter, set(state['hot_symbols'])
+
+def get_tradable_symbols():
+    """USD-quoted symbols, limited to this scanner's shard when several run side by side."""
+    return sharding.shard_symbols(s for s in exchange.markets if any(quote in s for quote in ['/USD', '/USDT', '/USDC']))
+
+def import_log():
+    """First run on the journal: carries over the existing CSV history before it gets re-exported."""
+    if journal.count() == 0 and os.path.exists(LOG_FILE):
+        try:
+            print(f"✅ Imported {journal.import_csv(LOG_FILE)} breakouts from {LOG_FILE} into the journal.")
+        except Exception as e:
+            print(f"❌ Error importing {LOG_FILE} into the journal (nothing imported, will retry next start): {e}")
+
 # ✅ Main Trading Loop
 def main():
-    print("✅ Starting Breakout Bot...")
+    print(f"✅ Starting Breakout Bot ({sharding.shard_name('kraken_test')})...")
+    heartbeat.beat()
+    # The supervisor stops us with SIGTERM: exit normally so the final checkpoint is written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     try:
-        symbols = exchange.load_markets().keys()
-        tradable_symbols = [s for s in symbols if any(quote in s for quote in ['/USD', '/USDT', '/USDC'])]
+        # Disk-cached markets: a restart doesn't wait on the download (stale caches refresh in the background)
+        markets = market_cache.load_markets(exchange)
+        tradable_symbols = get_tradable_symbols()
         print(f"✅ Found {len(tradable_symbols)} tradable assets.")
+        price_snapshot.track(tradable_symbols)
     except Exception as e:
         print(f"❌ Error loading markets: {e}")
         return
         
+    import_log()
+    post_breakout_scheduler.start()
+    exported_version = None
+    # hot_symbols: symbols that confirmed on at least one timeframe last sweep
+    candidate_filter, hot_symbols = restore_checkpoint()
+    checkpointer = checkpoint.Checkpointer(lambda: checkpoint_state(candidate_filter, hot_symbols),
+                                           path=sharding.shard_path(checkpoint.CHECKPOINT_FILE))
+    atexit.register(close_dispatcher)  # Runs after the checkpoint below: queued alerts get a few seconds to go out
+    atexit.register(checkpointer.maybe_save, True)  # Ctrl-C or a normal exit saves one last time
+
     while True:
+        # A background markets refresh swaps in a new dict: pick up listings and delistings
+        if exchange.markets is not markets:
+            markets = exchange.markets
+            tradable_symbols = get_tradable_symbols()
+            price_snapshot.track(tradable_symbols)
+
         print("🔄 Checking for breakouts...")
+        sweep_start = time.perf_counter()
+        requests_before = exchange.scheduler.stats['requests']
+        skipped_before = market_states.skipped
+        breakouts, confirmed = scan_once(tradable_symbols, candidate_filter, hot_symbols)
     
-        for symbol in tradable_symbols:
-            print(f"🔍 Checking {symbol}...")
-    
-            breakout, price = confirm_breakout(symbol)
-    
-            if breakout:
-                print(f"🚀 Breakout Confirmed: {symbol} at {price}")
-                log_breakout(symbol, price)
-    
-        print("⏳ Sleeping for 60 seconds before next check...")
-        time.sleep(60)
+        # Throughput should stay flat no matter how many breakouts fired this sweep
+        elapsed = time.perf_counter() - sweep_start
+        throughput = len(tradable_symbols) / elapsed if elapsed > 0 else 0
+        print(f"⏱️ Sweep: {len(tradable_symbols)} symbols ({confirmed} confirmed) in {elapsed:.1f}s "
+              f"({throughput:.2f} symbols/sec), "
+              f"{breakouts} breakouts, {post_breakout_scheduler.pending()} post-breakout checks pending")
+        stats = exchange.scheduler.stats
+        print(f"📡 Requests: {stats['requests'] - requests_before} this sweep, "
+              f"{stats['rate_limited']} rate-limited so far, {len(hot_symbols)} hot symbols")
+        print(candidate_filter.report())
+        print(f"🧭 Regimes: {market_states.summary()}, {market_states.skipped - skipped_before} candidates skipped")
+        startup.first_sweep_done()
+        heartbeat.sweep_done(elapsed, idle=SWEEP_SLEEP)
+
+        # Keep breakout_log.csv current for the analysis scripts (new rows are appended, see export_csv)
+        if journal.version != exported_version:
+            exported_version = journal.version
+            journal.export_csv(LOG_FILE)
+        checkpointer.maybe_save()
+
+        print(f"⏳ Sleeping for {SWEEP_SLEEP} seconds before next check...")
+        time.sleep(SWEEP_SLEEP)
 
 # ✅ Run Script
 if __name__ == "__main__":
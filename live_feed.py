@@ -0,0 +1,183 @@
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+import ccxt
+import websockets
+import candle_store
+import market_cache
+from streaming_indicators import IndicatorState
+
+# ✅ Live Feed Parameters
+KRAKEN_WS_URL = os.getenv("KRAKEN_WS_URL", "wss://ws.kraken.com/v2")  # Point at a local replay server for testing
+OHLC_INTERVAL = 5  # Minutes, matches the 5m candles the REST scanners use
+SUBSCRIBE_CHUNK = 100  # Symbols per subscribe message
+RECONNECT_DELAY = 1  # Seconds before the first reconnect, doubled on every failure in a row
+RECONNECT_DELAY_MAX = 60
+breakout_threshold = 50  # How many past candles make up the rolling high
+
+# ✅ Breakout rule. The REST scanners (serial/async) compare the price with the high of the last 49
+# closed candles plus the forming one and skip the MA filter. On the websocket the forming candle's high
+# already contains the tick being checked, so by default the live feed compares with the last 50 closed
+# candles and requires price > MA20 instead. Pass include_current=True, above_ma=False for the REST rule.
+LIVE_INCLUDE_CURRENT = False
+LIVE_ABOVE_MA = True
+
+class SymbolState:
+    """Rolling high of the last closed candles plus streaming indicators for one symbol."""
+
+    def __init__(self, include_current=LIVE_INCLUDE_CURRENT, above_ma=LIVE_ABOVE_MA):
+        self.include_current = include_current
+        self.above_ma = above_ma
+        # The rolling high always spans breakout_threshold candles, with or without the forming one
+        self.closed_highs = deque(maxlen=breakout_threshold - 1 if include_current else breakout_threshold)
+        self.indicators = IndicatorState()
+        self.last_price = None
+        self.alerted_candle = None  # Candle timestamp we already flagged, one breakout per candle
+
+    def on_candle(self, candle):
+        current = self.indicators.last
+        if current is not None and candle[0] > current[0]:
+            self.closed_highs.append(current[2])  # The previous candle just closed
+        self.indicators.update(candle)
+
+    def rolling_high(self):
+        highs = list(self.closed_highs)
+        if self.include_current and self.indicators.last is not None:
+            highs.append(self.indicators.last[2])
+        return max(highs) if highs else None
+
+    def check_breakout(self, price):
+        """Price above the rolling high (and above MA20 when above_ma), at most once per candle."""
+        high = self.rolling_high()
+        ma20 = self.indicators.ma20.value
+        candle = self.indicators.last[0] if self.indicators.last is not None else None
+        if high is None or candle == self.alerted_candle:
+            return False
+        if self.above_ma and math.isnan(ma20):
+            return False
+        if price > high and (not self.above_ma or price > ma20):
+            self.alerted_candle = candle
+            return True
+        return False
+
+def parse_candle(data):
+    """Turns a Kraken v2 OHLC entry into a [timestamp, open, high, low, close, volume] row."""
+    timestamp = round(datetime.fromisoformat(data['interval_begin']).timestamp() * 1000)
+    return [float(timestamp), float(data['open']), float(data['high']), float(data['low']),
+            float(data['close']), float(data['volume'])]
+
+class LiveFeed:
+    """Subscribes to ticker and OHLC channels and evaluates the breakout rule on every tick."""
+
+    def __init__(self, symbols, on_breakout, url=KRAKEN_WS_URL, interval=OHLC_INTERVAL,
+                 include_current=LIVE_INCLUDE_CURRENT, above_ma=LIVE_ABOVE_MA):
+        self.symbols = list(symbols)
+        self.on_breakout = on_breakout
+        self.url = url
+        self.interval = interval
+        self.states = {symbol: SymbolState(include_current, above_ma) for symbol in self.symbols}
+        self.messages = 0
+        self.errors = 0  # Messages that couldn't be applied (malformed, or the breakout handler failed)
+        self.reconnects = 0
+
+    def warm_up(self, timeframe='5m'):
+        """Seeds highs and indicators from the local candle store, no network needed."""
+        for symbol, state in self.states.items():
+            for candle in candle_store.load(symbol, timeframe, limit=100):
+                state.on_candle(candle)
+
+    def subscribe_messages(self):
+        messages = []
+        for i in range(0, len(self.symbols), SUBSCRIBE_CHUNK):
+            chunk = self.symbols[i:i + SUBSCRIBE_CHUNK]
+            messages.append({"method": "subscribe", "params": {"channel": "ohlc", "symbol": chunk, "interval": self.interval}})
+            messages.append({"method": "subscribe", "params": {"channel": "ticker", "symbol": chunk}})
+        return messages
+
+    def handle_message(self, message):
+        """Applies one decoded websocket message; returns the breakouts it triggered."""
+        self.messages += 1
+        channel = message.get("channel")
+        breakouts = []
+
+        if channel == "ohlc":
+            for data in message.get("data", []):
+                state = self.states.get(data.get("symbol"))
+                if state is not None:
+                    state.on_candle(parse_candle(data))
+        elif channel == "ticker":
+            received = time.perf_counter()
+            for data in message.get("data", []):
+                symbol = data.get("symbol")
+                state = self.states.get(symbol)
+                if state is None or data.get("last") is None:
+                    continue
+                state.last_price = float(data["last"])
+                if state.check_breakout(state.last_price):
+                    breakouts.append((symbol, state.last_price))
+                    latency_ms = (time.perf_counter() - received) * 1000
+                    print(f"⚡ {symbol} breakout evaluated {latency_ms:.2f} ms after the tick arrived")
+        elif message.get("method") == "subscribe" and not message.get("success", True):
+            print(f"❌ Subscription failed: {message.get('error')}")
+
+        for symbol, price in breakouts:
+            try:
+                self.on_breakout(symbol, price)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Error handling breakout for {symbol}: {e}")
+        return breakouts
+
+    async def run_once(self, ws):
+        for subscribe in self.subscribe_messages():
+            await ws.send(json.dumps(subscribe))
+        print(f"✅ Subscribed to ticker and {self.interval}m OHLC for {len(self.symbols)} symbols.")
+        async for raw in ws:
+            try:
+                self.handle_message(json.loads(raw))
+            except Exception as e:
+                # One bad message (missing field, bad number, broken JSON) mustn't take the feed down
+                self.errors += 1
+                print(f"⚠️ Skipping live-feed message: {type(e).__name__}: {e}")
+
+    async def run(self):
+        """Streams forever, reconnecting and resubscribing with backoff when the socket drops."""
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, max_size=None) as ws:
+                    delay = RECONNECT_DELAY
+                    await self.run_once(ws)
+                print("⚠️ Live feed closed by server.")
+            except (websockets.WebSocketException, OSError, asyncio.TimeoutError) as e:
+                # WebSocketException covers dropped connections as well as failed handshakes (e.g. HTTP 503)
+                print(f"❌ Live feed connection lost: {type(e).__name__}: {e}")
+
+            self.reconnects += 1
+            wait = delay + random.uniform(0, delay / 2)
+            print(f"🔄 Reconnecting in {wait:.1f}s (reconnect #{self.reconnects})...")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+def print_breakout(symbol, price):
+    """Default breakout handler when the live feed runs on its own."""
+    print(f"[{datetime.now(timezone.utc).isoformat()}] 🚀 Breakout detected: {symbol} at {price}")
+
+async def run_live_feed(on_breakout, trading_pairs=None, include_current=LIVE_INCLUDE_CURRENT, above_ma=LIVE_ABOVE_MA):
+    """Loads the universe if needed and runs the live feed (see LIVE_INCLUDE_CURRENT for the rule)."""
+    if trading_pairs is None:
+        markets = market_cache.load_markets(ccxt.kraken())
+        trading_pairs = [pair for pair in markets if pair.endswith(("/USDT", "/USD"))]
+        print(f"✅ Loaded {len(trading_pairs)} trading pairs from Kraken.")
+
+    feed = LiveFeed(trading_pairs, on_breakout, include_current=include_current, above_ma=above_ma)
+    feed.warm_up()
+    await feed.run()
+
+if __name__ == "__main__":
+    asyncio.run(run_live_feed(print_breakout))
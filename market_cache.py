@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+# ✅ Markets Cache Parameters
+MARKETS_CACHE_DIR = os.path.expanduser(os.getenv("MARKETS_CACHE_DIR", "~/Documents/markets_cache"))
+MARKETS_CACHE_TTL = float(os.getenv("MARKETS_CACHE_TTL", str(6 * 3600)))  # Seconds before a background refresh
+
+# Restarts read the markets from disk instead of downloading them: a fresh cache is used as is,
+# a stale one is used right away while a background refresh replaces it, and only with no cache at
+# all does startup wait on the exchange.
+
+def cache_path(exchange_id, cache_dir=MARKETS_CACHE_DIR):
+    return os.path.join(cache_dir, f"{exchange_id}.json")
+
+def read_cache(exchange_id, cache_dir=MARKETS_CACHE_DIR):
+    """(cached data, age in seconds), or (None, None) when there is no usable cache."""
+    path = cache_path(exchange_id, cache_dir)
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data, time.time() - data['saved_at']
+    except FileNotFoundError:
+        return None, None
+    except (ValueError, KeyError) as e:
+        print(f"⚠️ Ignoring unreadable markets cache {path}: {e}")
+        return None, None
+
+def write_cache(exchange, cache_dir=MARKETS_CACHE_DIR):
+    """Saves the exchange's markets and currencies (atomically, so a crash never leaves half a file)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(exchange.id, cache_dir)
+    data = {'saved_at': time.time(), 'markets': exchange.markets, 'currencies': getattr(exchange, 'currencies', None)}
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp, path)
+
+def _apply(exchange, data):
+    exchange.set_markets(data['markets'], data.get('currencies') or None)
+    if exchange.id == 'kraken':
+        # Kraken's fetch_markets also indexes markets by altname; set_markets alone doesn't
+        exchange.options['marketsByAltname'] = {market['altname']: market for market in exchange.markets.values()
+                                                if market.get('altname')}
+    return exchange.markets
+
+def refresh(exchange, cache_dir=MARKETS_CACHE_DIR, on_refresh=None):
+    """Downloads the markets again and rewrites the cache; on_refresh(markets) is called on success."""
+    try:
+        markets = exchange.load_markets(reload=True)
+        write_cache(exchange, cache_dir)
+    except Exception as e:
+        print(f"❌ Error refreshing markets for {exchange.id}: {e}")
+        return None
+    if on_refresh:
+        on_refresh(markets)
+    return markets
+
+def refresh_in_background(exchange, cache_dir=MARKETS_CACHE_DIR, on_refresh=None):
+    thread = threading.Thread(target=refresh, args=(exchange, cache_dir, on_refresh), daemon=True)
+    thread.start()
+    return thread
+
+def load_markets(exchange, ttl=MARKETS_CACHE_TTL, cache_dir=MARKETS_CACHE_DIR, on_refresh=None):
+    """exchange.load_markets(), served from the disk cache when there is one (stale ones refresh in the background)."""
+    data, age = read_cache(exchange.id, cache_dir)
+    if data is None:
+        markets = exchange.load_markets()
+        write_cache(exchange, cache_dir)
+        return markets
+    markets = _apply(exchange, data)
+    if age > ttl:
+        print(f"🔄 Markets cache for {exchange.id} is {age / 3600:.1f}h old, refreshing in the background...")
+        refresh_in_background(exchange, cache_dir, on_refresh)
+    return markets
+
+_refresh_tasks = set()
+
+async def refresh_async(exchange, cache_dir=MARKETS_CACHE_DIR, on_refresh=None):
+    """Async version of refresh for ccxt.async_support clients."""
+    try:
+        markets = await exchange.load_markets(reload=True)
+        write_cache(exchange, cache_dir)
+    except Exception as e:
+        print(f"❌ Error refreshing markets for {exchange.id}: {e}")
+        return None
+    if on_refresh:
+        on_refresh(markets)
+    return markets
+
+async def load_markets_async(exchange, ttl=MARKETS_CACHE_TTL, cache_dir=MARKETS_CACHE_DIR, on_refresh=None):
+    """Async version of load_markets; the background refresh runs as a task on the current loop."""
+    data, age = read_cache(exchange.id, cache_dir)
+    if data is None:
+        markets = await exchange.load_markets()
+        write_cache(exchange, cache_dir)
+        return markets
+    markets = _apply(exchange, data)
+    if age > ttl:
+        print(f"🔄 Markets cache for {exchange.id} is {age / 3600:.1f}h old, refreshing in the background...")
+        task = asyncio.ensure_future(refresh_async(exchange, cache_dir, on_refresh))
+        _refresh_tasks.add(task)  # The loop only keeps weak references to tasks
+        task.add_done_callback(_refresh_tasks.discard)
+    return markets
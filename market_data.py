@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+import ccxt.async_support as ccxt_async
+import async_scanner
+import candle_store
+import market_cache
+import rate_limiter
+
+# ✅ Market Data Parameters
+SCAN_EXCHANGES = [name.strip() for name in os.getenv("SCAN_EXCHANGES", "kraken").split(",") if name.strip()]
+QUOTES = ('USD', 'USDT', 'USDC')  # All treated as the same USD universe
+VENUE_RATE_LIMITS = {'coinbase': 100, 'bitstamp': 100, 'binanceus': 50}  # ms between requests (Kraken: rate_limiter's budgets)
+VENUE_CONCURRENCY = {'kraken': 10}
+DEFAULT_RATE_LIMIT = 500
+DEFAULT_CONCURRENCY = 20
+DEDUP_WINDOW = 300  # Seconds during which the same asset breaking out on another venue counts as one breakout
+
+def normalize_symbol(symbol):
+    """Maps a venue symbol like 'BTC/USDT' or 'BTC/USD:USD' to the unified 'BTC/USD', or None if not a USD pair."""
+    base, _, quote = symbol.partition('/')
+    quote = quote.split(':')[0]
+    if not base or quote not in QUOTES:
+        return None
+    return f"{base}/USD"
+
+class Venue:
+    """One exchange with its own client (and so its own connection pool), rate budget and candle store.
+
+    Requests go through a RequestScheduler: Kraken shares the process-wide one with every other Kraken
+    client, other venues get their own, spaced by rate_limit.
+    """
+
+    def __init__(self, name, client=None, rate_limit=None, concurrency=None, scheduler=None):
+        self.name = name
+        self.rate_limit = rate_limit or VENUE_RATE_LIMITS.get(name, DEFAULT_RATE_LIMIT)
+        self.concurrency = concurrency or VENUE_CONCURRENCY.get(name, DEFAULT_CONCURRENCY)
+        if scheduler is None:
+            scheduler = (rate_limiter.shared_scheduler if name == 'kraken' and rate_limit is None
+                         else rate_limiter.RequestScheduler(rate_limiter.spacing_budgets(self.rate_limit)))
+        client = client or getattr(ccxt_async, name)({'enableRateLimit': False})  # The scheduler throttles instead
+        self.client = rate_limiter.AsyncScheduledExchange(client, scheduler)
+        # Kraken keeps the original store layout, other venues get their own subfolder
+        self.store_dir = candle_store.CANDLE_STORE_DIR if name == 'kraken' else os.path.join(candle_store.CANDLE_STORE_DIR, name)
+        self.symbols = {}  # unified symbol -> venue symbol
+        self.universe = async_scanner.universe_buffer()  # Rolling highs for this venue's pairs, kept across sweeps
+
+    async def load_universe(self):
+        try:
+            markets = await market_cache.load_markets_async(self.client)
+        except Exception as e:
+            print(f"❌ Error loading markets from {self.name}: {e}")
+            return self.symbols
+        symbols = {}
+        for symbol, market in markets.items():
+            if not market.get('spot'):
+                continue  # Swaps/futures like 'BTC/USD:USD' would otherwise fold into the spot asset
+            unified = normalize_symbol(symbol)
+            # Prefer the plain USD pair when a venue lists several quotes for one asset
+            if unified and (unified not in symbols or symbol.endswith('/USD')):
+                symbols[unified] = symbol
+        self.symbols = symbols
+        return symbols
+
+    async def scan(self):
+        """Runs one sweep on this venue and returns [(unified, venue_symbol, price)] breakouts."""
+        native = {symbol: unified for unified, symbol in self.symbols.items()}
+        breakouts, elapsed = await async_scanner.scan_once(self.client, list(native), self.concurrency, self.store_dir,
+                                                             self.universe)
+        print(f"⏱️ {self.name}: {len(native)} pairs in {elapsed:.2f}s")
+        return [(native[symbol], symbol, price) for symbol, price in breakouts]
+
+    async def close(self):
+        await self.client.close()
+
+class BreakoutDeduper:
+    """Collapses the same asset breaking out on several venues within DEDUP_WINDOW into one event."""
+
+    def __init__(self, window=DEDUP_WINDOW):
+        self.window = window
+        self.seen = {}  # unified symbol -> time first reported
+
+    def accept(self, unified, now=None):
+        now = time.time() if now is None else now
+        first = self.seen.get(unified)
+        if first is not None and now - first < self.window:
+            return False
+        self.seen[unified] = now
+        return True
+
+class MarketData:
+    """Scans several exchanges at once and reports breakouts over one unified symbol universe."""
+
+    def __init__(self, venues):
+        self.venues = venues
+        self.deduper = BreakoutDeduper()
+
+    @classmethod
+    def from_names(cls, names=SCAN_EXCHANGES):
+        return cls([Venue(name) for name in names])
+
+    async def load_universe(self):
+        await asyncio.gather(*(venue.load_universe() for venue in self.venues))
+        universe = {}
+        for venue in self.venues:
+            for unified in venue.symbols:
+                universe.setdefault(unified, []).append(venue.name)
+        return universe
+
+    async def scan_once(self):
+        """One concurrent sweep over every venue; returns deduplicated (unified, [venues], price) breakouts."""
+        results = await asyncio.gather(*(venue.scan() for venue in self.venues), return_exceptions=True)
+        grouped = {}
+        for venue, result in zip(self.venues, results):
+            if isinstance(result, Exception):
+                print(f"❌ Sweep failed on {venue.name}: {result}")
+                continue
+            for unified, _, price in result:
+                entry = grouped.setdefault(unified, [[], price])
+                entry[0].append(venue.name)
+
+        return [(unified, venues, price) for unified, (venues, price) in grouped.items() if self.deduper.accept(unified)]
+
+    async def close(self):
+        await asyncio.gather(*(venue.close() for venue in self.venues))
+
+async def run_market_data(on_breakout, market_data=None):
+    """Runs multi-venue sweeps forever, calling on_breakout(symbol, price) once per deduplicated breakout."""
+    market_data = market_data or MarketData.from_names()
+    try:
+        universe = await market_data.load_universe()
+        venues = ", ".join(venue.name for venue in market_data.venues)
+        print(f"✅ Loaded {len(universe)} unified USD assets from {venues}.")
+
+        while True:
+            print(f"\n🔄 [{datetime.now(timezone.utc).isoformat()}] Checking {len(universe)} assets across {venues}...\n")
+            start = time.perf_counter()
+            breakouts = await market_data.scan_once()
+            for unified, seen_on, price in breakouts:
+                print(f"🚀 {unified} breakout on {', '.join(seen_on)}")
+                on_breakout(unified, price)
+
+            elapsed = time.perf_counter() - start
+            print(f"⏱️ Multi-venue sweep finished in {elapsed:.2f}s ({len(breakouts)} breakouts)")
+            await asyncio.sleep(max(0, async_scanner.CYCLE_SECONDS - elapsed))
+    finally:
+        await market_data.close()
+
+if __name__ == "__main__":
+    asyncio.run(run_market_data(async_scanner.print_breakout))
@@ -0,0 +1,124 @@
+import math
+import os
+import time
+import candle_store
+from streaming_indicators import RollingSMA, WilderRSI, WilderATR, WilderADX, StreamingMACD, StreamingOBV
+
+# ✅ Market State Parameters
+REGIME_TIMEFRAME = '1h'
+REGIME_WARMUP = 720  # Stored candles replayed when a symbol's state is first built (200-MA needs 200)
+SKIP_REGIMES = {name.strip() for name in os.getenv("SKIP_REGIMES", "Bear,Ranging").split(",") if name.strip()}
+REGIME_PENALTY_PCT = float(os.getenv("REGIME_PENALTY_PCT", "0.5"))  # Added to pre-filter distance for Bear/Ranging
+
+# Online version of classify_market_state in trading_bot/datasets/generate_market_state_labels.py:
+# the same thresholds, evaluated one candle at a time instead of over a whole CSV.
+
+class MarketState:
+    """Bull/Bear/Ranging regime for one symbol, updated candle by candle."""
+
+    def __init__(self):
+        self.ma200 = RollingSMA(200)
+        self.rsi = WilderRSI(14)
+        self.adx = WilderADX(14)
+        self.macd = StreamingMACD()
+        self.atr = WilderATR(14)
+        self.obv = StreamingOBV()
+        self.volume_ma30 = RollingSMA(30)
+        self.obv_ma30 = RollingSMA(30)
+        self.atr_ma50 = RollingSMA(50)
+        self.last_timestamp = None
+        self.count = 0
+        self.state = 'Unknown'  # Like the offline labels, Unknown candles keep the previous regime
+        self._previous_state = 'Unknown'
+
+    def update(self, candle):
+        """Feeds one candle; the newest timestamp again replaces it, older ones are ignored."""
+        timestamp, _, high, low, close, volume = (float(x) for x in candle)
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return self.state
+        replace = timestamp == self.last_timestamp
+        if replace:
+            self.state = self._previous_state
+        else:
+            self._previous_state = self.state
+            self.count += 1
+        self.last_timestamp = timestamp
+
+        ma200 = self.ma200.update(close, replace)
+        rsi = self.rsi.update(close, replace)
+        adx = self.adx.update(high, low, close, replace)
+        histogram = self.macd.update(close, replace)
+        atr = self.atr.update(high, low, close, replace)
+        obv = self.obv.update(close, volume, replace)
+        volume_ma30 = self.volume_ma30.update(volume, replace)
+        obv_ma30 = self.obv_ma30.update(obv, replace)
+        # The ATR mean only starts once ATR itself has a value (a NaN would poison the running total)
+        atr_ma50 = self.atr_ma50.update(atr, replace) if not math.isnan(atr) else math.nan
+
+        if any(math.isnan(x) for x in (ma200, rsi, adx, histogram, atr, volume_ma30, obv_ma30)):
+            return self.state
+
+        # Same precedence as the offline labels: Ranging over Bear over Bull
+        if 0.97 * ma200 <= close <= 1.03 * ma200 and adx < 18 and atr < atr_ma50:
+            self.state = 'Ranging'
+        elif close < ma200 and adx > 20 and rsi < 45 and histogram < 0 and obv < obv_ma30:
+            self.state = 'Bear'
+        elif close > ma200 and adx > 20 and rsi > 55 and histogram > 0 and volume > volume_ma30:
+            self.state = 'Bull'
+        return self.state
+
+class MarketStates:
+    """Regimes for every symbol, warmed up from the candle store and fed new candles as they are stored."""
+
+    def __init__(self, timeframe=REGIME_TIMEFRAME, skip=SKIP_REGIMES, penalty_pct=REGIME_PENALTY_PCT,
+                 store_dir=candle_store.CANDLE_STORE_DIR):
+        self.timeframe = timeframe
+        self.skip = set(skip)
+        self.penalty_pct = penalty_pct
+        self.store_dir = store_dir
+        self.states = {}
+        self.skipped = 0
+
+    def update(self, symbol, new_candles=()):
+        """Feeds newly stored candles (the first call replays the stored history instead)."""
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = MarketState()
+            new_candles = candle_store.load(symbol, self.timeframe, limit=REGIME_WARMUP, store_dir=self.store_dir)
+        for candle in new_candles:
+            state.update(candle)
+        return state.state
+
+    def regime(self, symbol):
+        state = self.states.get(symbol)
+        return state.state if state else 'Unknown'
+
+    def should_skip(self, symbol, exchange=None, now_ms=None):
+        """True when the symbol's regime is one we don't spend confirmation fetches on.
+
+        Skipped symbols aren't confirmed, so nothing else updates their candles: once a new candle
+        has opened, one fetch on the regime timeframe (given an exchange) brings the state up to date.
+        """
+        state = self.states.get(symbol)
+        if state is None or state.state not in self.skip:
+            return False
+        now_ms = time.time() * 1000 if now_ms is None else now_ms
+        if exchange is not None and now_ms >= state.last_timestamp + candle_store.timeframe_ms(self.timeframe):
+            try:
+                self.update(symbol, candle_store.update(exchange, symbol, self.timeframe, store_dir=self.store_dir))
+            except Exception as e:
+                print(f"❌ Error refreshing market state for {symbol}: {e}")
+        if state.state in self.skip:
+            self.skipped += 1
+            return True
+        return False
+
+    def penalties(self):
+        """Extra pre-filter distance (%) for symbols in a Bear/Ranging regime, so they rank lower."""
+        return {symbol: self.penalty_pct for symbol, state in self.states.items() if state.state in ('Bear', 'Ranging')}
+
+    def summary(self):
+        counts = {}
+        for state in self.states.values():
+            counts[state.state] = counts.get(state.state, 0) + 1
+        return counts
@@ -0,0 +1,80 @@
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import backtest_engine
+import candle_store
+
+# ✅ Parameter Grid (threshold/target/stop are fractions: 0.001 = 0.1%)
+LOOKBACKS = [20, 50, 100]
+THRESHOLDS = [0.0, 0.001, 0.005]
+TAKE_PROFITS = [0.02, 0.03, 0.05]
+STOP_LOSSES = [0.01, 0.02, 0.03]
+MIN_CONFIRMATIONS = [1, 2, 3]
+WORKERS = int(os.getenv("SWEEP_WORKERS", os.cpu_count() or 1))
+OUTPUT_FILE = 'parameter_sweep_results.csv'
+
+# Candle arrays are memory-mapped once per worker, so every process reads the same
+# OS page cache instead of receiving a pickled copy of the data with each task.
+_series = {}
+
+def _init_worker(symbols, timeframe, store_dir):
+    for symbol in symbols:
+        data = candle_store.open_memmap(symbol, timeframe, store_dir)
+        if len(data) > max(LOOKBACKS) + 1:
+            _series[symbol] = data
+
+def evaluate(params):
+    """Backtests one parameter combination across every symbol and returns its summary row."""
+    trades = [backtest_engine.backtest_series(symbol, data, **params) for symbol, data in _series.items()]
+    trades = [t for t in trades if not t.empty]
+    trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame()
+    return {**params, **backtest_engine.summarize(trades)}
+
+def parameter_grid():
+    for lookback, threshold, take_profit, stop_loss, confirmations in itertools.product(
+            LOOKBACKS, THRESHOLDS, TAKE_PROFITS, STOP_LOSSES, MIN_CONFIRMATIONS):
+        yield {
+            'lookback': lookback,
+            'threshold': threshold,
+            'take_profit': take_profit,
+            'stop_loss': stop_loss,
+            'min_confirmations': confirmations,
+        }
+
+def run_sweep(symbols, timeframe=backtest_engine.TIMEFRAME, workers=WORKERS, store_dir=candle_store.CANDLE_STORE_DIR):
+    """Evaluates the whole grid on a process pool and returns the results ranked by total PnL."""
+    grid = list(parameter_grid())
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(symbols, timeframe, store_dir)) as pool:
+        rows = list(pool.map(evaluate, grid, chunksize=max(1, len(grid) // (workers * 4))))
+
+    results = pd.DataFrame(rows).sort_values('total_pnl_pct', ascending=False, ignore_index=True)
+    results.index = np.arange(1, len(results) + 1)
+    results.index.name = 'rank'
+    return results
+
+def main():
+    timeframe = sys.argv[1] if len(sys.argv) > 1 else backtest_engine.TIMEFRAME
+    symbols = candle_store.stored_symbols(timeframe)
+    if not symbols:
+        print(f"❌ No stored {timeframe} candles found in {candle_store.CANDLE_STORE_DIR}. Run the bot first!")
+        return
+
+    combinations = sum(1 for _ in parameter_grid())
+    print(f"🔄 Sweeping {combinations} combinations over {len(symbols)} symbols with {WORKERS} workers...")
+    start = time.perf_counter()
+    results = run_sweep(symbols, timeframe)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📊 **Top Parameter Sets** ({elapsed:.1f}s, {combinations / elapsed:.2f} combinations/sec)")
+    print(results.head(10).to_string())
+
+    results.to_csv(OUTPUT_FILE)
+    print(f"\n📂 Ranked results saved to '{OUTPUT_FILE}'")
+
+if __name__ == "__main__":
+    main()
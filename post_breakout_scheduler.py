@@ -0,0 +1,117 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+# ✅ Scheduler Parameters
+PENDING_CHECKS_FILE = os.path.expanduser(os.getenv("PENDING_CHECKS_FILE", "~/Documents/pending_post_breakout.json"))
+COALESCE_WINDOW = 1.0  # Checks due within this many seconds of each other share one price fetch
+
+class PostBreakoutScheduler:
+    """Holds every pending post-breakout price check in one heap, served by a single thread.
+
+    fetch_prices(symbols) must return {symbol: price} for a batch of symbols, and
+    on_price(check, price) is called for each check once its price is in. Pending checks
+    are written to disk so they survive a restart; overdue ones run as soon as we start.
+    """
+
+    def __init__(self, fetch_prices, on_price, path=PENDING_CHECKS_FILE, coalesce_window=COALESCE_WINDOW):
+        self.fetch_prices = fetch_prices
+        self.on_price = on_price
+        self.path = path
+        self.coalesce_window = coalesce_window
+        self.heap = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.busy = False
+        self.thread = None
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                checks = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read pending post-breakout checks: {e}")
+            return
+        for check in checks:
+            heapq.heappush(self.heap, (check['due'], next(self.counter), check))
+        if checks:
+            print(f"✅ Restored {len(checks)} pending post-breakout checks.")
+
+    def _persist(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump([check for _, _, check in self.heap], f)
+        os.replace(tmp_path, self.path)
+
+    def schedule(self, record_id, symbol, delay, **extra):
+        """Queues a price check for symbol 'delay' seconds from now."""
+        check = {'due': time.time() + delay, 'id': record_id, 'symbol': symbol, 'delay': delay, **extra}
+        with self.cond:
+            heapq.heappush(self.heap, (check['due'], next(self.counter), check))
+            self._persist()
+            self.cond.notify()
+        return check
+
+    def pending(self):
+        with self.cond:
+            return len(self.heap)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="post-breakout-scheduler", daemon=True)
+            self.thread.start()
+        return self
+
+    def drain(self):
+        """Blocks until every pending check has been served."""
+        with self.cond:
+            while self.heap or self.busy:
+                self.cond.wait()
+
+    def _take_due(self):
+        """Waits for the next check to come due and pops everything due alongside it."""
+        with self.cond:
+            while True:
+                if self.heap:
+                    wait = self.heap[0][0] - time.time()
+                    if wait <= 0:
+                        break
+                    self.cond.wait(wait)
+                else:
+                    self.cond.wait()
+
+            cutoff = time.time() + self.coalesce_window
+            due = []
+            while self.heap and self.heap[0][0] <= cutoff:
+                due.append(heapq.heappop(self.heap)[2])
+            self.busy = True
+            return due
+
+    def _run(self):
+        while True:
+            due = self._take_due()
+            try:
+                symbols = sorted({check['symbol'] for check in due})
+                try:
+                    prices = self.fetch_prices(symbols)
+                except Exception as e:
+                    print(f"❌ Error fetching post-breakout prices: {e}")
+                    prices = {}
+                for check in due:
+                    try:
+                        self.on_price(check, prices.get(check['symbol']))
+                    except Exception as e:
+                        print(f"❌ Error handling post-breakout check for {check['symbol']}: {e}")
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self._persist()
+                    self.cond.notify_all()
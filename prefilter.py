@@ -0,0 +1,99 @@
+import os
+import random
+import time
+import numpy as np
+import candle_store
+from universe_buffer import UniverseBuffer
+
+# ✅ Pre-filter Parameters
+PREFILTER_TIMEFRAME = '5m'
+PREFILTER_LOOKBACK = 50  # Candles in the rolling high
+PREFILTER_TOP_K = int(os.getenv("PREFILTER_TOP_K", "20"))  # Closest symbols always confirmed
+PREFILTER_WITHIN_PCT = float(os.getenv("PREFILTER_WITHIN_PCT", "1.0"))  # ...plus any within this % of their high
+PREFILTER_AUDIT_SAMPLE = int(os.getenv("PREFILTER_AUDIT_SAMPLE", "3"))  # Rejected symbols confirmed anyway, to measure misses
+
+class CandidateFilter:
+    """Cheap first stage: ranks symbols by how far the snapshot price is below their rolling high.
+
+    The rolling highs live in a universe buffer: seeded from the stored candles, re-synced whenever a
+    symbol's candles are updated, and fed every snapshot price as a synthesized forming candle, so symbols
+    that are never confirmed still have an up-to-date high without any extra requests. Ranking the whole
+    universe is then one vectorized pass.
+    """
+
+    def __init__(self, top_k=PREFILTER_TOP_K, within_pct=PREFILTER_WITHIN_PCT, audit_sample=PREFILTER_AUDIT_SAMPLE,
+                 timeframe=PREFILTER_TIMEFRAME, lookback=PREFILTER_LOOKBACK, store_dir=candle_store.CANDLE_STORE_DIR):
+        self.top_k = top_k
+        self.within_pct = within_pct
+        self.audit_sample = audit_sample
+        self.timeframe = timeframe
+        self.step_ms = candle_store.timeframe_ms(timeframe)
+        self.store_dir = store_dir
+        self.buffer = UniverseBuffer(window=lookback)
+        self.stats = {'sweeps': 0, 'symbols': 0, 'candidates': 0, 'hits': 0, 'audited': 0, 'misses': 0}
+
+    def invalidate(self, symbol):
+        """Feeds the symbol's newly stored candles into the buffer (call after they were updated)."""
+        self.buffer.sync(symbol, self.timeframe, store_dir=self.store_dir)
+
+    def observe(self, prices, now_ms):
+        self.buffer.observe(prices, now_ms, self.step_ms)
+
+    def rolling_high(self, symbol):
+        """Highest candle high (stored or observed) in the window, or None if nothing is known yet."""
+        i = self.buffer.index.get(symbol)
+        high = float(self.buffer.highs(include_current=True)[i]) if i is not None else np.nan
+        return None if np.isnan(high) else high
+
+    def select(self, symbols, prices, keep=(), penalties=None, now_ms=None):
+        """Returns (candidates, audit): symbols worth full confirmation (closest first) and a random sample of the rest.
+
+        The current price is folded into the window only after ranking, so it can't count as its own high.
+        Symbols with no known high yet are always candidates (they need a first confirmation to warm up),
+        as is anything in 'keep'. 'penalties' adds a per-symbol % to the distance to push symbols down the ranking.
+        """
+        now_ms = time.time() * 1000 if now_ms is None else now_ms
+        for symbol in symbols:
+            if symbol not in self.buffer.index:
+                self.invalidate(symbol)  # First sight: seed from the store
+
+        rows = self.buffer.rows(symbols)
+        highs = self.buffer.highs(include_current=True)[rows]
+        price = self.buffer.prices_array(prices)[rows]
+        distance = (highs - price) / highs * 100
+        if penalties:
+            distance += np.array([penalties.get(symbol, 0.0) for symbol in symbols])
+        self.observe(prices, now_ms)
+
+        warm = np.flatnonzero(~np.isnan(distance))
+        cold = [symbols[i] for i in np.flatnonzero(np.isnan(distance))]
+        order = warm[np.argsort(distance[warm], kind='stable')]
+        chosen = np.zeros(len(symbols), bool)
+        chosen[order[:self.top_k]] = True
+        chosen[warm] |= distance[warm] <= self.within_pct
+        if keep:
+            chosen[warm] |= np.array([symbols[i] in keep for i in warm], bool)
+        candidates = [symbols[i] for i in order if chosen[i]]
+        rejected = [symbols[i] for i in order if not chosen[i]]
+        audit = random.sample(rejected, min(self.audit_sample, len(rejected)))
+
+        self.stats['sweeps'] += 1
+        self.stats['symbols'] += len(symbols)
+        self.stats['candidates'] += len(candidates) + len(cold)
+        self.stats['audited'] += len(audit)
+        return cold + candidates, audit
+
+    def record(self, symbol, breakout, audited=False):
+        """Counts a confirmation result: a breakout among candidates is a hit, one in the audit sample a miss."""
+        self.invalidate(symbol)
+        if breakout:
+            self.stats['misses' if audited else 'hits'] += 1
+
+    def report(self):
+        stats = self.stats
+        hit_rate = stats['hits'] / stats['candidates'] * 100 if stats['candidates'] else 0
+        miss_rate = stats['misses'] / stats['audited'] * 100 if stats['audited'] else 0
+        passed = stats['candidates'] / stats['symbols'] * 100 if stats['symbols'] else 0
+        return (f"🎯 Pre-filter: {passed:.1f}% of symbols confirmed, hit rate {hit_rate:.2f}% "
+                f"({stats['hits']} breakouts / {stats['candidates']} candidates), "
+                f"miss rate {miss_rate:.2f}% ({stats['misses']} / {stats['audited']} audited rejects)")
@@ -0,0 +1,101 @@
+import threading
+import time
+import ccxt
+
+# ✅ Snapshot Parameters
+SNAPSHOT_BATCH_SIZE = 100  # Pairs per fetch_tickers call (keeps Kraken's query string short)
+SNAPSHOT_MAX_AGE = 30  # Seconds before a snapshot is considered stale
+
+def _batches(symbols, batch_size):
+    symbols = list(symbols)
+    for i in range(0, len(symbols), batch_size):
+        yield symbols[i:i + batch_size]
+
+def _last_prices(tickers):
+    return {symbol: ticker.get('last') for symbol, ticker in tickers.items()}
+
+# One unknown or delisted pair makes the exchange reject the whole batch (ccxt.ExchangeError, e.g.
+# Kraken's EQuery:Unknown asset pair): the batch is split in half and each half retried, so only the
+# bad pair goes missing. Network and rate-limit errors aren't split, more requests wouldn't help.
+
+def _fetch_batch(exchange, batch, prices, failed):
+    try:
+        prices.update(_last_prices(exchange.fetch_tickers(batch)))
+    except ccxt.ExchangeError as e:
+        if len(batch) == 1:
+            print(f"⚠️ No ticker for {batch[0]}: {e}")
+            failed.add(batch[0])
+            return
+        for half in (batch[:len(batch) // 2], batch[len(batch) // 2:]):
+            _fetch_batch(exchange, half, prices, failed)
+    except Exception as e:
+        print(f"❌ Error fetching ticker batch ({len(batch)} pairs): {e}")
+
+async def _fetch_batch_async(exchange, batch, prices, failed):
+    try:
+        prices.update(_last_prices(await exchange.fetch_tickers(batch)))
+    except ccxt.ExchangeError as e:
+        if len(batch) == 1:
+            print(f"⚠️ No ticker for {batch[0]}: {e}")
+            failed.add(batch[0])
+            return
+        for half in (batch[:len(batch) // 2], batch[len(batch) // 2:]):
+            await _fetch_batch_async(exchange, half, prices, failed)
+    except Exception as e:
+        print(f"❌ Error fetching ticker batch ({len(batch)} pairs): {e}")
+
+def fetch_price_snapshot(exchange, symbols, batch_size=SNAPSHOT_BATCH_SIZE, failed=None):
+    """Fetches the last price of every symbol in a few batched fetch_tickers calls.
+
+    Symbols the exchange rejects on their own are added to 'failed' (a set) when given.
+    """
+    prices, failed = {}, set() if failed is None else failed
+    for batch in _batches(symbols, batch_size):
+        _fetch_batch(exchange, batch, prices, failed)
+    return prices
+
+async def fetch_price_snapshot_async(exchange, symbols, batch_size=SNAPSHOT_BATCH_SIZE, failed=None):
+    """Async version of fetch_price_snapshot for ccxt.async_support clients."""
+    prices, failed = {}, set() if failed is None else failed
+    for batch in _batches(symbols, batch_size):
+        await _fetch_batch_async(exchange, batch, prices, failed)
+    return prices
+
+class PriceSnapshot:
+    """Holds the latest bulk price snapshot and refreshes it in one go when it goes stale."""
+
+    def __init__(self, exchange, symbols=(), max_age=SNAPSHOT_MAX_AGE):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.max_age = max_age
+        self.prices = {}
+        self.updated_at = 0.0
+        self.failed = set()  # Pairs the exchange rejected: left out until the universe is re-tracked
+        self.lock = threading.Lock()
+
+    def track(self, symbols):
+        """Replaces the set of symbols covered by each refresh."""
+        with self.lock:
+            self.symbols = list(symbols)
+            self.failed.clear()
+
+    def refresh(self):
+        """Fetches a fresh snapshot for every tracked symbol."""
+        with self.lock:
+            self._refresh()
+            return self.prices
+
+    def _refresh(self):
+        symbols = [symbol for symbol in self.symbols if symbol not in self.failed]
+        self.prices = fetch_price_snapshot(self.exchange, symbols, failed=self.failed)
+        self.updated_at = time.time()
+
+    def get(self, symbol):
+        """Returns the last price for symbol, refreshing the whole snapshot if it is stale."""
+        with self.lock:
+            if symbol not in self.symbols:
+                self.symbols.append(symbol)
+                self.updated_at = 0.0
+            if time.time() - self.updated_at > self.max_age:
+                self._refresh()
+            return self.prices.get(symbol)
@@ -0,0 +1,261 @@
+import asyncio
+import contextvars
+import heapq
+import os
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+import ccxt
+import sharding
+
+# ✅ Rate Budget per Endpoint Class: (requests/sec, burst)
+ENDPOINT_BUDGETS = {
+    'ticker': (0.5, 2),
+    'ohlc': (1.0, 3),
+    'public': (0.5, 2),  # load_markets and anything else public
+    'private': (0.33, 15),  # Kraken's private call counter decays ~0.33/sec
+}
+ENDPOINTS = {
+    'fetch_ticker': 'ticker',
+    'fetch_tickers': 'ticker',
+    'fetch_ohlcv': 'ohlc',
+    'fetch_balance': 'private',
+    'fetch_open_orders': 'private',
+    'fetch_my_trades': 'private',
+    'create_order': 'private',
+    'cancel_order': 'private',
+}
+
+# ✅ Share of the budgets this process may use: 1/N for one of N scanner shards, or set explicitly
+# (sharded_scanner.py gives its coordinator and workers their own shares)
+RATE_SHARE = float(os.getenv("RATE_SHARE") or 1 / sharding.SHARD_COUNT)
+
+# ✅ Priorities (lower goes first)
+PRIORITY_CONFIRM = 0  # Confirmation fetches for hot symbols and post-breakout checks
+PRIORITY_SWEEP = 10  # Routine sweeps
+
+# ✅ Backoff on 429 / EAPI:Rate limit
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+def is_rate_limit_error(error):
+    """ccxt's rate-limit exceptions, Kraken's EAPI:Rate limit error code, or an HTTP error with status 429."""
+    if isinstance(error, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)):
+        return True
+    response = getattr(error, 'response', None)
+    status = (getattr(error, 'status', None) or getattr(error, 'status_code', None)
+              or getattr(response, 'status_code', None) or getattr(response, 'status', None))
+    return status == 429 or 'EAPI:Rate limit' in str(error)
+
+class TokenBucket:
+    """Token bucket whose rate backs off on rate-limit errors and creeps back up on success."""
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.02)
+
+    def on_rate_limited(self, delay):
+        self.rate = max(self.max_rate / 16, self.rate / 2)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+class RequestScheduler:
+    """Central, priority-ordered access to the per-endpoint token buckets (thread-safe).
+
+    Waiting requests for an endpoint are served lowest priority number first, so confirmation
+    fetches jump ahead of routine sweeps. Rate-limit errors block the endpoint for an
+    exponentially growing, jittered delay and halve its rate until requests succeed again.
+    """
+
+    def __init__(self, budgets=ENDPOINT_BUDGETS):
+        self.buckets = {endpoint: TokenBucket(rate, burst) for endpoint, (rate, burst) in budgets.items()}
+        self.waiting = {endpoint: [] for endpoint in budgets}
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        # Per thread and per asyncio task (tasks inherit it from whoever created them)
+        self.priority_var = contextvars.ContextVar(f"request_priority_{id(self)}", default=PRIORITY_SWEEP)
+        self.stats = {'requests': 0, 'rate_limited': 0, 'retries': 0}
+
+    @contextmanager
+    def priority(self, priority):
+        """Runs requests made inside the block (on this thread, or this task and the tasks it starts) at the given priority."""
+        token = self.priority_var.set(priority)
+        try:
+            yield
+        finally:
+            self.priority_var.reset(token)
+
+    def current_priority(self):
+        return self.priority_var.get()
+
+    def _try_acquire(self, endpoint, ticket):
+        """Takes a token if 'ticket' is first in line; otherwise returns how long to wait."""
+        bucket = self.buckets[endpoint]
+        queue = self.waiting[endpoint]
+        wait = bucket.wait_time(time.monotonic())
+        if queue[0] == ticket and wait <= 0:
+            heapq.heappop(queue)
+            bucket.take()
+            self.stats['requests'] += 1
+            return 0.0
+        return max(wait, 0.01)
+
+    def _withdraw(self, endpoint, ticket):
+        """Takes a waiter that gave up (cancelled, interrupted) out of line, so it can't block the queue."""
+        with self.cond:
+            queue = self.waiting[endpoint]
+            if ticket in queue:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self.cond.notify_all()
+
+    def acquire(self, endpoint, priority=None):
+        ticket = (self.current_priority() if priority is None else priority, next(self.counter))
+        try:
+            with self.cond:
+                heapq.heappush(self.waiting[endpoint], ticket)
+                while True:
+                    wait = self._try_acquire(endpoint, ticket)
+                    if wait == 0:
+                        self.cond.notify_all()
+                        return
+                    self.cond.wait(wait)
+        except BaseException:
+            self._withdraw(endpoint, ticket)
+            raise
+
+    async def acquire_async(self, endpoint, priority=None):
+        ticket = (self.current_priority() if priority is None else priority, next(self.counter))
+        with self.cond:
+            heapq.heappush(self.waiting[endpoint], ticket)
+        try:
+            while True:
+                with self.cond:
+                    wait = self._try_acquire(endpoint, ticket)
+                    if wait == 0:
+                        self.cond.notify_all()
+                        return
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._withdraw(endpoint, ticket)
+            raise
+
+    def _backoff(self, endpoint, attempt, error):
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        with self.cond:
+            self.stats['rate_limited'] += 1
+            self.buckets[endpoint].on_rate_limited(delay)
+        print(f"⚠️ Rate limited on {endpoint} ({error}), backing off {delay:.1f}s...")
+        return delay
+
+    def _success(self, endpoint):
+        with self.cond:
+            self.buckets[endpoint].on_success()
+
+    def call(self, endpoint, fn, *args, priority=None, **kwargs):
+        """Runs fn(*args, **kwargs) inside the endpoint's budget, retrying rate-limit errors with backoff."""
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire(endpoint, priority)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == MAX_RETRIES:
+                    raise
+                self.stats['retries'] += 1
+                time.sleep(self._backoff(endpoint, attempt, e))
+                continue
+            self._success(endpoint)
+            return result
+
+    async def call_async(self, endpoint, fn, *args, priority=None, **kwargs):
+        """Async version of call for coroutine functions."""
+        for attempt in range(MAX_RETRIES + 1):
+            await self.acquire_async(endpoint, priority)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == MAX_RETRIES:
+                    raise
+                self.stats['retries'] += 1
+                await asyncio.sleep(self._backoff(endpoint, attempt, e))
+                continue
+            self._success(endpoint)
+            return result
+
+class ScheduledExchange:
+    """Wraps a ccxt exchange so every API method goes through the RequestScheduler.
+
+    Create the exchange with 'enableRateLimit': False so ccxt doesn't throttle a second time.
+    """
+
+    def __init__(self, exchange, scheduler=None):
+        self.exchange = exchange
+        self.scheduler = scheduler or RequestScheduler()
+
+    def __getattr__(self, name):
+        attr = getattr(self.exchange, name)
+        if not callable(attr) or not (name.startswith(('fetch_', 'create_', 'cancel_')) or name == 'load_markets'):
+            return attr
+        endpoint = ENDPOINTS.get(name, 'private' if name.startswith(('create_', 'cancel_')) else 'public')
+        return self._schedule(endpoint, attr)
+
+    def _schedule(self, endpoint, fn):
+        def scheduled(*args, **kwargs):
+            return self.scheduler.call(endpoint, fn, *args, **kwargs)
+        return scheduled
+
+class AsyncScheduledExchange(ScheduledExchange):
+    """ScheduledExchange for ccxt.async_support clients: API methods become coroutines that wait their turn."""
+
+    def _schedule(self, endpoint, fn):
+        async def scheduled(*args, **kwargs):
+            return await self.scheduler.call_async(endpoint, fn, *args, **kwargs)
+        return scheduled
+
+def share_budgets(budgets, share):
+    """Budgets for one of several processes splitting the same exchange limits (e.g. scanner shards)."""
+    return {endpoint: (rate * share, max(1, burst * share)) for endpoint, (rate, burst) in budgets.items()}
+
+def spacing_budgets(rate_limit_ms, budgets=ENDPOINT_BUDGETS):
+    """Budgets for a venue we only know ccxt's rateLimit (ms between requests) for: that rate on every endpoint."""
+    return {endpoint: (1000 / rate_limit_ms, burst) for endpoint, (_, burst) in budgets.items()}
+
+def create_exchange(config=None, scheduler=None):
+    """A Kraken client whose requests all go through one shared scheduler."""
+    config = dict(config or {})
+    config['enableRateLimit'] = False
+    return ScheduledExchange(ccxt.kraken(config), scheduler or shared_scheduler)
+
+def create_async_exchange(config=None, scheduler=None):
+    """Async version of create_exchange, drawing from the same budgets as the sync clients in this process."""
+    import ccxt.async_support as ccxt_async
+    config = dict(config or {})
+    config['enableRateLimit'] = False
+    return AsyncScheduledExchange(ccxt_async.kraken(config), scheduler or shared_scheduler)
+
+# One scheduler per process so every script and thread draws from the same budget (a shard gets its share)
+shared_scheduler = RequestScheduler(share_budgets(ENDPOINT_BUDGETS, RATE_SHARE))
@@ -0,0 +1,71 @@
+import numpy as np
+import candle_store
+
+# ✅ Resampling Parameters
+BASE_TIMEFRAME = '5m'
+DERIVED_TIMEFRAMES = ('15m', '1h', '4h')
+
+# Higher timeframes are built from the stored base series instead of being fetched. Buckets are
+# aligned to the epoch like Kraken's own candles; a still-forming base candle makes a still-forming
+# derived candle, which is rewritten in place as later base candles arrive.
+
+def resample(candles, timeframe):
+    """Aggregates (n, 6) base candles into timeframe buckets (the last one may still be forming)."""
+    candles = np.asarray(candles, dtype=candle_store.DTYPE).reshape(-1, candle_store.ROW_WIDTH)
+    if len(candles) == 0:
+        return candles
+    step = candle_store.timeframe_ms(timeframe)
+    buckets = candles[:, 0] // step * step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(candles)] - 1
+    return np.column_stack([
+        buckets[starts],
+        candles[starts, 1],
+        np.maximum.reduceat(candles[:, 2], starts),
+        np.minimum.reduceat(candles[:, 3], starts),
+        candles[ends, 4],
+        np.add.reduceat(candles[:, 5], starts),
+    ])
+
+def derive(symbol, timeframe, since, base_timeframe=BASE_TIMEFRAME, store_dir=candle_store.CANDLE_STORE_DIR):
+    """Rebuilds and stores the timeframe buckets from 'since' (a bucket start) onwards; returns the rows written."""
+    base = _load_since(symbol, base_timeframe, since, store_dir)
+    return candle_store.write(symbol, timeframe, resample(base, timeframe), store_dir)
+
+def _load_since(symbol, timeframe, since, store_dir):
+    """Stored candles from 'since' onwards, reading only as much of the file tail as needed."""
+    limit = 64
+    while True:
+        data = candle_store.load(symbol, timeframe, limit=limit, store_dir=store_dir)
+        if len(data) < limit or data[0, 0] < since:
+            return data[data[:, 0] >= since]
+        limit *= 4
+
+def update(exchange, symbol, base_timeframe=BASE_TIMEFRAME, timeframes=DERIVED_TIMEFRAMES, limit=100,
+           seed_limit=None, store_dir=candle_store.CANDLE_STORE_DIR):
+    """One base-timeframe fetch, then every derived timeframe is brought up to date from it.
+
+    Returns {timeframe: rows written} for the base and each derived timeframe. A derived series is
+    only fetched from the exchange to seed it (or to fill a gap the base history can't cover), since
+    the base window alone is too short to warm up indicators on 4h candles. 'seed_limit' (default
+    'limit') is how many candles a new derived series starts with.
+    """
+    previous_last = candle_store.last_timestamp(symbol, base_timeframe, store_dir)
+    new_base = candle_store.update(exchange, symbol, base_timeframe, limit=limit, store_dir=store_dir)
+    changed = {base_timeframe: new_base}
+    if len(new_base) == 0:
+        return {timeframe: new_base for timeframe in (base_timeframe, *timeframes)}
+
+    # Without stored candles right before this batch, the bucket it starts in is incomplete: skip it
+    first = int(new_base[0, 0])
+    contiguous = previous_last is not None and first <= previous_last + candle_store.timeframe_ms(base_timeframe)
+    for timeframe in timeframes:
+        step = candle_store.timeframe_ms(timeframe)
+        since = first // step * step if contiguous else -(-first // step) * step
+        last = candle_store.last_timestamp(symbol, timeframe, store_dir)
+        seeded = new_base[:0]
+        if last is None or last < since - step:
+            seeded = candle_store.update(exchange, symbol, timeframe, limit=seed_limit or limit, store_dir=store_dir)
+        derived = derive(symbol, timeframe, since, base_timeframe, store_dir)
+        changed[timeframe] = np.concatenate([seeded, derived])
+    return changed
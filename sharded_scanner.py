@@ -0,0 +1,343 @@
+import contextlib
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+import sharding
+from heartbeat import heartbeat_path, read_heartbeat
+
+# ✅ Sharded Scanner Parameters
+SCANNER_WORKERS = int(os.getenv("SCANNER_WORKERS", str(os.cpu_count() or 1)))
+COORDINATOR_RATE_SHARE = 0.1  # Post-breakout checks and market refreshes; the workers split the rest evenly
+CYCLE_SECONDS = 60  # Target time between the start of two sweeps
+MARKETS_REFRESH_SECONDS = float(os.getenv("MARKETS_REFRESH_SECONDS", "3600"))  # How often listings are re-checked
+REBALANCE_TOLERANCE = 0.05  # Shards may differ by this fraction of the average size before symbols move
+WORKER_STARTUP_GRACE = 120  # Seconds a new worker gets before its first heartbeat
+WORKER_STOP_TIMEOUT = 15  # Seconds a worker gets to finish and checkpoint after 'stop' before it is terminated
+
+# Each worker is a kraken_test scanner over its slice of the universe, in its own process with its
+# own rate share, indicator state, heartbeat and checkpoint. Breakouts come back over a queue to the
+# coordinator, the only process that writes the journal, schedules post-breakout checks and alerts.
+# Every worker reports over its own pipe: a worker that has to be killed can only leave a half-written
+# message in a pipe that is thrown away with it, never in one the other workers share.
+
+class ShardAssignment:
+    """Symbol -> worker: by hash first (stable across restarts, so worker checkpoints line up), then evened out.
+
+    Symbols keep their worker while the shards are within tolerance, so their warm state isn't thrown away.
+    """
+
+    def __init__(self, workers, tolerance=REBALANCE_TOLERANCE):
+        self.workers = workers
+        self.tolerance = tolerance
+        self.owner = {}
+
+    def symbols(self, worker):
+        return sorted(symbol for symbol, owner in self.owner.items() if owner == worker)
+
+    def loads(self):
+        loads = [0] * self.workers
+        for owner in self.owner.values():
+            loads[owner] += 1
+        return loads
+
+    def rebalance(self, symbols):
+        """Drops delisted symbols, places new listings and evens out the shards; returns the workers that changed."""
+        symbols = set(symbols)
+        changed = set()
+        for symbol in [symbol for symbol in self.owner if symbol not in symbols]:
+            changed.add(self.owner.pop(symbol))
+        for symbol in sorted(symbols - self.owner.keys()):
+            self.owner[symbol] = sharding.shard_of(symbol, self.workers)
+            changed.add(self.owner[symbol])
+
+        loads = self.loads()
+        slack = max(1, int(len(self.owner) / self.workers * self.tolerance))
+        members = {worker: self.symbols(worker) for worker in range(self.workers)}
+        while max(loads) - min(loads) > slack:
+            source, target = loads.index(max(loads)), loads.index(min(loads))
+            symbol = members[source].pop()
+            members[target].append(symbol)
+            self.owner[symbol] = target
+            loads[source] -= 1
+            loads[target] += 1
+            changed.update((source, target))
+        return changed
+
+@contextlib.contextmanager
+def _environ(values):
+    """Temporarily sets environment variables (spawned processes inherit them from the start)."""
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+def worker_main(index, commands, results, exchange_factory=None, cycle=CYCLE_SECONDS, quiet=False):
+    """Worker process: runs kraken_test sweeps over the symbols the coordinator assigns, on command.
+
+    results is the write end of this worker's pipe to the coordinator.
+    """
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    import kraken_test
+    import market_cache
+    import checkpoint
+
+    kraken_test.heartbeat.beat(WORKER_STARTUP_GRACE)
+    if exchange_factory is not None:
+        kraken_test.set_exchange(exchange_factory())
+    else:
+        market_cache.load_markets(kraken_test.exchange)  # From the cache the coordinator has just written
+    candidate_filter, hot_symbols = kraken_test.restore_checkpoint()
+    checkpointer = checkpoint.Checkpointer(lambda: kraken_test.checkpoint_state(candidate_filter, hot_symbols),
+                                           path=sharding.shard_path(checkpoint.CHECKPOINT_FILE))
+
+    def on_breakout(symbol, price):
+        # The indicator states live here, so the alert's candle and indicators travel with the breakout
+        results.send(('breakout', index, symbol, price, kraken_test.alert_payload(symbol)))
+
+    symbols = []
+    while True:
+        command, *args = commands.get()
+        if command == 'symbols':
+            symbols = args[0]
+            kraken_test.price_snapshot.track(symbols)
+            kraken_test.heartbeat.beat(cycle + kraken_test.heartbeat.stall)
+        elif command == 'sweep':
+            sweep_id = args[0]
+            start = time.perf_counter()
+            breakouts, confirmed = kraken_test.scan_once(symbols, candidate_filter, hot_symbols, on_breakout)
+            elapsed = time.perf_counter() - start
+            kraken_test.heartbeat.sweep_done(elapsed, idle=cycle)
+            results.send(('sweep', sweep_id, index, len(symbols), confirmed, breakouts, elapsed))
+            checkpointer.maybe_save()
+        elif command == 'stop':
+            checkpointer.maybe_save(force=True)
+            return
+
+class Coordinator:
+    """Starts the workers, hands out symbols, runs sweeps across all of them and collects their breakouts."""
+
+    def __init__(self, on_breakout, workers=SCANNER_WORKERS, exchange_factory=None, worker_env=None,
+                 cycle=CYCLE_SECONDS, quiet=False):
+        self.on_breakout = on_breakout
+        self.workers = workers
+        self.exchange_factory = exchange_factory
+        self.worker_env = dict(worker_env or {})
+        self.cycle = cycle
+        self.quiet = quiet
+        self.context = multiprocessing.get_context('spawn')  # Clean interpreters: no inherited clients or threads
+        self.readers = [None] * workers  # Coordinator end of each worker's results pipe
+        self.commands = [None] * workers
+        self.processes = [None] * workers
+        self.started = [0.0] * workers
+        self.assignment = ShardAssignment(workers)
+        # A symbol moved between shards mid-breakout can be reported by both; the journal sees it once
+        from market_data import BreakoutDeduper
+        self.deduper = BreakoutDeduper()
+        self.stats = {'breakouts': 0, 'duplicates': 0, 'restarts': 0}
+        self.sweep_id = 0
+
+    def heartbeat_file(self, index):
+        return heartbeat_path(sharding.shard_name("kraken_test", index, self.workers))
+
+    def _spawn(self, index):
+        env = {
+            **self.worker_env,
+            "SHARD_INDEX": str(index),
+            "SHARD_COUNT": str(self.workers),
+            "RATE_SHARE": str((1 - COORDINATOR_RATE_SHARE) / self.workers),
+            "HEARTBEAT_FILE": self.heartbeat_file(index),
+        }
+        self.commands[index] = self.context.Queue()
+        reader, writer = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=worker_main, daemon=True, name=sharding.shard_name("kraken_test", index, self.workers),
+                                       args=(index, self.commands[index], writer, self.exchange_factory,
+                                             self.cycle, self.quiet))
+        with _environ(env):
+            process.start()
+        writer.close()  # The worker holds the only write end, so its exit shows up here as EOF
+        self.readers[index] = reader
+        self.processes[index] = process
+        self.started[index] = time.time()
+        self.commands[index].put(('symbols', self.assignment.symbols(index)))
+
+    def start(self, symbols):
+        self.assignment.rebalance(symbols)
+        for index in range(self.workers):
+            self._spawn(index)
+        loads = self.assignment.loads()
+        print(f"✅ {self.workers} workers started, {min(loads)}-{max(loads)} symbols each")
+        return self
+
+    def update_universe(self, symbols):
+        """Re-shards after listings/delistings; only workers whose list changed are told."""
+        changed = self.assignment.rebalance(symbols)
+        for index in changed:
+            self.commands[index].put(('symbols', self.assignment.symbols(index)))
+        if changed:
+            print(f"🔀 Rebalanced {len(self.assignment.owner)} symbols, {len(changed)} workers updated")
+        return changed
+
+    def _retire(self, index):
+        """Stops a worker: 'stop' first so it can checkpoint, terminate only if it doesn't get there in time."""
+        process = self.processes[index]
+        if process.is_alive():
+            self.commands[index].put(('stop',))
+            process.join(WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()  # Whatever it was writing is lost with its own pipe, closed below
+            process.join(WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        self.commands[index].cancel_join_thread()  # A 'stop' it never read mustn't hold up our exit
+        if self.readers[index] is not None:
+            self.readers[index].close()
+            self.readers[index] = None
+
+    def _restart(self, index, reason):
+        print(f"🔄 Restarting worker {index}: {reason}")
+        self.stats['restarts'] += 1
+        self._retire(index)
+        self._spawn(index)
+
+    def _problem(self, index, now):
+        process = self.processes[index]
+        if not process.is_alive():
+            return f"exited with code {process.exitcode}"
+        beat = read_heartbeat(self.heartbeat_file(index))
+        if beat is None or beat['pid'] != process.pid:
+            return "no heartbeat" if now - self.started[index] > WORKER_STARTUP_GRACE else None
+        if now > beat['deadline']:
+            return f"stalled, last beat {now - beat['beat_at']:.0f}s ago"
+        return None
+
+    def _handle_breakout(self, symbol, price, payload, now):
+        if not self.deduper.accept(symbol, now):
+            self.stats['duplicates'] += 1
+            return
+        self.stats['breakouts'] += 1
+        self.on_breakout(symbol, price, payload)
+
+    def _receive(self, timeout):
+        """Messages from whichever workers have something to say within timeout seconds."""
+        readers = [reader for reader in self.readers if reader is not None]
+        messages = []
+        for reader in multiprocessing.connection.wait(readers, timeout):
+            try:
+                messages.append(reader.recv())
+            except (EOFError, OSError):
+                # The worker is gone; stop polling its pipe until the health check restarts it
+                self.readers[self.readers.index(reader)] = None
+                reader.close()
+        return messages
+
+    def sweep(self, beat=None):
+        """One sweep on every worker at once; returns per-worker (symbols, confirmed, breakouts, seconds) and wall time.
+
+        Breakouts are handled as they arrive. A worker that dies or stalls is restarted and skipped for this sweep.
+        Reports carry the sweep id, so a late one from an earlier sweep is never taken for this sweep's.
+        beat, if given, is called while waiting (the coordinator's own heartbeat).
+        """
+        start = time.perf_counter()
+        self.sweep_id += 1
+        for index in range(self.workers):
+            self.commands[index].put(('sweep', self.sweep_id))
+        pending = set(range(self.workers))
+        reports = {}
+        while pending:
+            messages = self._receive(timeout=1.0)
+            now = time.time()
+            for message in messages:
+                if message[0] == 'breakout':
+                    _, index, symbol, price, payload = message
+                    self._handle_breakout(symbol, price, payload, now)
+                elif message[0] == 'sweep' and message[1] == self.sweep_id:
+                    _, _, index, *report = message
+                    reports[index] = report
+                    pending.discard(index)
+            for index in list(pending):
+                problem = self._problem(index, now)
+                if problem:
+                    self._restart(index, problem)
+                    pending.discard(index)
+            if beat:
+                beat()
+        return reports, time.perf_counter() - start
+
+    def stop(self):
+        for index, process in enumerate(self.processes):
+            if process is not None and process.is_alive():
+                self.commands[index].put(('stop',))  # All at once, so they checkpoint in parallel
+        for index, process in enumerate(self.processes):
+            if process is not None:
+                self._retire(index)
+
+# ✅ Main Loop
+def run(workers=SCANNER_WORKERS):
+    os.environ.setdefault("RATE_SHARE", str(COORDINATOR_RATE_SHARE))  # Before the rate limiter is first imported
+    import alerts
+    import kraken_test
+    import market_cache
+    import startup
+
+    print(f"✅ Starting sharded breakout scanner ({workers} workers)...")
+    kraken_test.heartbeat.beat(WORKER_STARTUP_GRACE)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        markets = market_cache.load_markets(kraken_test.exchange)
+    except Exception as e:
+        print(f"❌ Error loading markets: {e}")
+        return
+
+    kraken_test.import_log()
+    coordinator = Coordinator(kraken_test.record_breakout, workers).start(kraken_test.get_tradable_symbols())
+    kraken_test.post_breakout_scheduler.start()
+    exported_version = None
+    last_refresh = time.monotonic()
+    try:
+        while True:
+            # Listings and delistings: refresh the markets now and then, re-shard when they changed
+            if time.monotonic() - last_refresh > MARKETS_REFRESH_SECONDS:
+                market_cache.refresh_in_background(kraken_test.exchange)
+                last_refresh = time.monotonic()
+            if kraken_test.exchange.markets is not markets:
+                markets = kraken_test.exchange.markets
+                coordinator.update_universe(kraken_test.get_tradable_symbols())
+
+            print(f"\n🔄 [{datetime.now(timezone.utc).isoformat()}] Sweeping {len(coordinator.assignment.owner)} "
+                  f"symbols on {workers} workers...")
+            breakouts_before = coordinator.stats['breakouts']
+            reports, elapsed = coordinator.sweep(beat=kraken_test.heartbeat.beat)
+            symbols = sum(report[0] for report in reports.values())
+            confirmed = sum(report[1] for report in reports.values())
+            slowest = max((report[3] for report in reports.values()), default=0)
+            print(f"⏱️ Sweep: {symbols} symbols ({confirmed} confirmed) in {elapsed:.1f}s "
+                  f"(slowest worker {slowest:.1f}s, {symbols / elapsed if elapsed > 0 else 0:.1f} symbols/sec), "
+                  f"{coordinator.stats['breakouts'] - breakouts_before} breakouts, "
+                  f"{coordinator.stats['duplicates']} duplicates dropped, {coordinator.stats['restarts']} worker restarts")
+            startup.first_sweep_done()
+            kraken_test.heartbeat.sweep_done(elapsed, idle=max(0, CYCLE_SECONDS - elapsed))
+
+            if kraken_test.journal.version != exported_version:
+                exported_version = kraken_test.journal.version
+                kraken_test.journal.export_csv(kraken_test.LOG_FILE)
+
+            time.sleep(max(0, CYCLE_SECONDS - elapsed))
+    finally:
+        coordinator.stop()
+        alerts.close_dispatcher()  # Breakouts the workers reported last may still be queued
+
+if __name__ == "__main__":
+    run()
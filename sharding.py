@@ -0,0 +1,25 @@
+import os
+import zlib
+
+# ✅ Shard Parameters: set per worker process by sharded_scanner.py when it splits the universe
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = max(1, int(os.getenv("SHARD_COUNT", "1")))
+
+def shard_of(symbol, count=SHARD_COUNT):
+    """Stable shard for a symbol (crc32, so every process and restart agrees)."""
+    return zlib.crc32(symbol.encode()) % count
+
+def shard_symbols(symbols, index=SHARD_INDEX, count=SHARD_COUNT):
+    """The part of the universe this shard scans."""
+    if count == 1:
+        return list(symbols)
+    return [symbol for symbol in symbols if shard_of(symbol, count) == index]
+
+def shard_name(name, index=SHARD_INDEX, count=SHARD_COUNT):
+    """'name' for a single scanner, 'name_shard<i>of<n>' when sharded."""
+    return name if count == 1 else f"{name}_shard{index}of{count}"
+
+def shard_path(path, index=SHARD_INDEX, count=SHARD_COUNT):
+    """Per-shard variant of a state file path, so shards never overwrite each other's state."""
+    root, ext = os.path.splitext(path)
+    return f"{shard_name(root, index, count)}{ext}"
@@ -0,0 +1,41 @@
+import importlib.util
+import os
+import sys
+import time
+
+# ✅ Startup Timing: bot_watchdog.py exports BOT_LAUNCHED_AT when it spawns the bot, so the time spent
+# starting the interpreter and importing is counted too; run by hand, the clock starts at this import.
+LAUNCHED_AT = float(os.getenv("BOT_LAUNCHED_AT") or time.time())
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "10"))  # Seconds from launch to first sweep before we warn
+
+_first_sweep = None
+
+def lazy_import(name):
+    """Returns the module, but only runs its import on first attribute access.
+
+    Keeps pandas, talib and friends off the startup path of scripts that only need them for
+    occasional work (exports, legacy DataFrame helpers).
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+def since_launch():
+    return time.time() - LAUNCHED_AT
+
+def first_sweep_done():
+    """Reports (once) how long after launch the first sweep completed; returns those seconds."""
+    global _first_sweep
+    if _first_sweep is None:
+        _first_sweep = since_launch()
+        marker = "🚀" if _first_sweep <= STARTUP_BUDGET else "⚠️"
+        print(f"{marker} First sweep completed {_first_sweep:.2f}s after launch (budget {STARTUP_BUDGET:.0f}s)")
+    return _first_sweep
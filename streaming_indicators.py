@@ -0,0 +1,285 @@
+import math
+from collections import deque
+
+# Streaming versions of the talib indicators used by confirm_breakout and the market-state labels.
+# Each one keeps O(1) state, takes one candle at a time and can replace the newest value when a
+# still-forming candle changes. Values line up with talib run over the same candles (SMA/EMA/MACD,
+# OBV, and Wilder smoothing for RSI/ATR/ADX).
+
+class RollingSMA:
+    """Simple moving average over the last 'period' values."""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+
+    def update(self, value, replace=False):
+        if replace and self.window:
+            self.total += value - self.window[-1]
+            self.window[-1] = value
+        else:
+            if len(self.window) == self.period:
+                self.total -= self.window[0]
+            self.window.append(value)
+            self.total += value
+        return self.value
+
+    @property
+    def value(self):
+        return self.total / self.period if len(self.window) == self.period else math.nan
+
+class WilderRSI:
+    """RSI with Wilder smoothing, seeded with the plain average of the first 'period' moves (like talib)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0  # Price changes seen so far
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self._saved = None
+
+    def update(self, close, replace=False):
+        if replace and self._saved is not None:
+            self.prev_close, self.count, self.avg_gain, self.avg_loss = self._saved
+        self._saved = (self.prev_close, self.count, self.avg_gain, self.avg_loss)
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.count += 1
+            if self.count <= self.period:
+                self.avg_gain += gain / self.period
+                self.avg_loss += loss / self.period
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.period:
+            return math.nan
+        total = self.avg_gain + self.avg_loss
+        return 100 * self.avg_gain / total if total != 0 else 0.0
+
+class WilderATR:
+    """Average True Range with Wilder smoothing, seeded with the mean of the first 'period' true ranges."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.count = 0  # True ranges seen so far
+        self.atr = 0.0
+        self._saved = None
+
+    def update(self, high, low, close, replace=False):
+        if replace and self._saved is not None:
+            self.prev_close, self.count, self.atr = self._saved
+        self._saved = (self.prev_close, self.count, self.atr)
+
+        if self.prev_close is not None:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            self.count += 1
+            if self.count <= self.period:
+                self.atr += true_range / self.period
+            else:
+                self.atr = (self.atr * (self.period - 1) + true_range) / self.period
+        self.prev_close = close
+        return self.value
+
+    @property
+    def value(self):
+        return self.atr if self.count >= self.period else math.nan
+
+class StreamingEMA:
+    """Exponential moving average seeded with the SMA of the first 'period' values (like talib)."""
+
+    def __init__(self, period):
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.count = 0
+        self.ema = 0.0
+        self._saved = None
+
+    def update(self, value, replace=False):
+        if replace and self._saved is not None:
+            self.count, self.ema = self._saved
+        self._saved = (self.count, self.ema)
+
+        self.count += 1
+        if self.count <= self.period:
+            self.ema += value / self.period
+        else:
+            self.ema += (value - self.ema) * self.k
+        return self.value
+
+    @property
+    def value(self):
+        return self.ema if self.count >= self.period else math.nan
+
+class StreamingMACD:
+    """MACD histogram with talib's alignment: both EMAs start on the slow EMA's first bar, then the signal EMA."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast_period = fast
+        self.slow_period = slow
+        self.seed = []  # First 'slow' closes, until both EMAs can be seeded at once
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    def _seed_emas(self):
+        self.fast = StreamingEMA(self.fast_period)
+        self.slow = StreamingEMA(self.slow_period)
+        self.signal = StreamingEMA(self.signal.period)
+        for value in self.seed[-self.fast_period:]:
+            self.fast.update(value)
+        for value in self.seed:
+            self.slow.update(value)
+        self.signal.update(self.fast.value - self.slow.value)
+
+    def update(self, close, replace=False):
+        if len(self.seed) < self.slow_period or (replace and self.slow.count == self.slow_period):
+            # Still collecting (or replacing the last of) the closes that seed both EMAs
+            if replace and self.seed:
+                self.seed[-1] = close
+            else:
+                self.seed.append(close)
+            if len(self.seed) == self.slow_period:
+                self._seed_emas()
+            return self.value
+
+        self.fast.update(close, replace)
+        self.slow.update(close, replace)
+        self.signal.update(self.fast.value - self.slow.value, replace)
+        return self.value
+
+    @property
+    def value(self):
+        return self.fast.value - self.slow.value - self.signal.value if self.signal.count >= self.signal.period else math.nan
+
+class WilderADX:
+    """ADX with Wilder-smoothed +DM/-DM/TR, following talib's warm-up (first value after 2 * period - 1 candles)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0  # Candles seen so far
+        self.prev = None  # (high, low, close) of the previous candle
+        self.plus_dm = self.minus_dm = self.tr = 0.0
+        self.sum_dx = 0.0
+        self.adx = math.nan
+        self._saved = None
+
+    def update(self, high, low, close, replace=False):
+        if replace and self._saved is not None:
+            self.count, self.prev, self.plus_dm, self.minus_dm, self.tr, self.sum_dx, self.adx = self._saved
+        self._saved = (self.count, self.prev, self.plus_dm, self.minus_dm, self.tr, self.sum_dx, self.adx)
+
+        period = self.period
+        self.count += 1
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return self.value
+
+        prev_high, prev_low, prev_close = self.prev
+        diff_plus, diff_minus = high - prev_high, prev_low - low
+        plus_dm = diff_plus if diff_plus > 0 and diff_plus > diff_minus else 0.0
+        minus_dm = diff_minus if diff_minus > 0 and diff_plus < diff_minus else 0.0
+        true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.prev = (high, low, close)
+
+        if self.count <= period:
+            # Plain sums over the first period - 1 moves
+            self.plus_dm += plus_dm
+            self.minus_dm += minus_dm
+            self.tr += true_range
+            return self.value
+
+        self.plus_dm += plus_dm - self.plus_dm / period
+        self.minus_dm += minus_dm - self.minus_dm / period
+        self.tr += true_range - self.tr / period
+        dx = None
+        if self.tr != 0:
+            plus_di, minus_di = 100 * self.plus_dm / self.tr, 100 * self.minus_dm / self.tr
+            if plus_di + minus_di != 0:
+                dx = 100 * abs(minus_di - plus_di) / (plus_di + minus_di)
+
+        if self.count <= 2 * period:
+            # The first ADX is the plain average of the first 'period' DX values
+            self.sum_dx += dx or 0.0
+            if self.count == 2 * period:
+                self.adx = self.sum_dx / period
+        elif self.count > 2 * period and dx is not None:
+            self.adx = (self.adx * (period - 1) + dx) / period
+        return self.value
+
+    @property
+    def value(self):
+        return self.adx
+
+class StreamingOBV:
+    """On-balance volume, starting from the first candle's volume (like talib)."""
+
+    def __init__(self):
+        self.prev_close = None
+        self.obv = 0.0
+        self._saved = None
+
+    def update(self, close, volume, replace=False):
+        if replace and self._saved is not None:
+            self.prev_close, self.obv = self._saved
+        self._saved = (self.prev_close, self.obv)
+
+        if self.prev_close is None:
+            self.obv = volume
+        elif close > self.prev_close:
+            self.obv += volume
+        elif close < self.prev_close:
+            self.obv -= volume
+        self.prev_close = close
+        return self.obv
+
+    @property
+    def value(self):
+        return self.obv if self.prev_close is not None else math.nan
+
+class IndicatorState:
+    """RSI14, MA20, MA50 and ATR14 for one symbol/timeframe series, updated candle by candle."""
+
+    def __init__(self):
+        self.rsi = WilderRSI(14)
+        self.ma20 = RollingSMA(20)
+        self.ma50 = RollingSMA(50)
+        self.atr = WilderATR(14)
+        self.count = 0
+        self.last = None  # [timestamp, open, high, low, close, volume]
+        self.previous = None
+
+    def update(self, candle):
+        """Feeds one candle; a candle with the newest timestamp again replaces it, older ones are ignored."""
+        timestamp, _, high, low, close, _ = (float(x) for x in candle)
+        replace = self.last is not None and timestamp == self.last[0]
+        if self.last is not None and timestamp < self.last[0]:
+            return self
+
+        self.rsi.update(close, replace)
+        self.ma20.update(close, replace)
+        self.ma50.update(close, replace)
+        self.atr.update(high, low, close, replace)
+
+        if not replace:
+            self.previous = self.last
+            self.count += 1
+        self.last = list(candle)
+        return self
+
+    def values(self):
+        return {
+            'RSI': self.rsi.value,
+            'MA20': self.ma20.value,
+            'MA50': self.ma50.value,
+            'ATR': self.atr.value,
+        }
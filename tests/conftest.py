@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+# ✅ Sandbox: the bot modules read these at import time, so nothing a test writes lands in ~/Documents
+SANDBOX = tempfile.mkdtemp(prefix="breakout_tests_")
+os.makedirs(os.path.join(SANDBOX, "Documents"), exist_ok=True)
+os.environ.update({
+    "HOME": SANDBOX,
+    "CANDLE_STORE_DIR": os.path.join(SANDBOX, "store"),
+    "MARKETS_CACHE_DIR": os.path.join(SANDBOX, "markets_cache"),
+    "BREAKOUT_JOURNAL": os.path.join(SANDBOX, "Documents", "breakout_journal.db"),
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,53 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+class TelegramStub:
+    """Local stand-in for the Telegram Bot API's sendMessage: records every request.
+
+    statuses lists the status codes for the first requests (200 after that); a 429 carries retry_after.
+    """
+
+    def __init__(self, statuses=(), retry_after=0.2):
+        self.statuses = list(statuses)
+        self.retry_after = retry_after
+        self.received = []  # (monotonic time, chat_id, text)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+                stub.received.append((time.monotonic(), form.get('chat_id', [''])[0], form.get('text', [''])[0]))
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                if status == 200:
+                    reply = {"ok": True, "result": {"message_id": len(stub.received)}}
+                else:
+                    reply = {"ok": False, "error_code": status, "parameters": {"retry_after": stub.retry_after}}
+                payload = json.dumps(reply).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def texts(self):
+        return [text for _, _, text in self.received]
+
+    def gaps(self):
+        return [b[0] - a[0] for a, b in zip(self.received, self.received[1:])]
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,66 @@
+import time
+from alerts import AlertDispatcher
+from telegram_stub import TelegramStub
+
+def dispatcher_for(stub, window=0.2, min_interval=0.3):
+    return AlertDispatcher(token="TEST", chat_id=42, api_url=stub.url, window=window, min_interval=min_interval)
+
+def test_burst_goes_out_as_one_digest():
+    with TelegramStub() as stub:
+        dispatcher = dispatcher_for(stub)
+        for i in range(10):
+            dispatcher.send(f"alert {i}")
+        dispatcher.flush()
+
+    assert len(stub.received) == 1
+    assert stub.received[0][1] == "42"
+    assert stub.texts()[0].split("\n\n") == ["📣 10 alerts"] + [f"alert {i}" for i in range(10)]
+    assert dispatcher.stats['messages'] == 1
+    assert dispatcher.stats['alerts_sent'] == 10
+
+def test_messages_are_spaced_per_chat():
+    with TelegramStub() as stub:
+        dispatcher = dispatcher_for(stub, window=0.01, min_interval=0.3)
+        for i in range(4):
+            dispatcher.send(f"alert {i}")
+            time.sleep(0.05)  # Outside the digest window
+        dispatcher.flush()
+
+    # Alerts that queue up while the dispatcher waits out the spacing join the next digest
+    sent = [line for text in stub.texts() for line in text.split("\n\n") if line.startswith("alert")]
+    assert sent == [f"alert {i}" for i in range(4)]
+    assert len(stub.received) >= 2
+    assert min(stub.gaps()) >= 0.3 - 0.01
+
+def test_429_is_retried_after_retry_after():
+    with TelegramStub(statuses=[429], retry_after=0.5) as stub:
+        dispatcher = dispatcher_for(stub, min_interval=0.01)
+        dispatcher.send("alert")
+        dispatcher.flush()
+
+    assert stub.texts() == ["alert", "alert"]
+    assert stub.gaps()[0] >= 0.5 - 0.01
+    assert dispatcher.stats['rate_limited'] == 1
+    assert dispatcher.stats['alerts_sent'] == 1
+
+def test_rejected_digest_is_not_counted_as_sent():
+    with TelegramStub(statuses=[400]) as stub:
+        dispatcher = dispatcher_for(stub)
+        dispatcher.send("first")
+        dispatcher.send("second")
+        dispatcher.flush()
+
+    assert len(stub.received) == 1
+    assert dispatcher.stats['alerts_sent'] == 0
+    assert dispatcher.stats['failed'] == 1
+    assert dispatcher.stats['alerts_failed'] == 2
+
+def test_close_waits_for_queued_alerts():
+    with TelegramStub() as stub:
+        dispatcher = dispatcher_for(stub, window=0.5)
+        dispatcher.send("last alert before exit")
+        assert not dispatcher.flush(timeout=0.05)  # Still inside the digest window
+        dispatcher.close(timeout=5)
+
+    assert stub.texts() == ["last alert before exit"]
+    assert dispatcher.stats['alerts_sent'] == 1
@@ -0,0 +1,51 @@
+import numpy as np
+from backtest_engine import breakout_entries, resolve_exits
+
+def flat(n, price=100.0):
+    return np.full(n, price), np.full(n, price), np.full(n, price)
+
+def test_entries_need_consecutive_closes_above_the_rolling_high():
+    high = np.array([10, 11, 12, 11, 13, 14, 15, 12, 16.0])
+    close = high.copy()
+    assert breakout_entries(high, close, lookback=3).tolist() == [4, 8]
+    assert breakout_entries(high, close, lookback=3, min_confirmations=2).tolist() == [5]
+
+def test_candle_touching_both_levels_counts_as_stop():
+    high, low, close = flat(10)
+    high[3], low[3] = 106.0, 97.0  # Target (105) and stop (98) in the same candle
+    high[5] = 110.0
+
+    exit_idx, exit_price, outcome = resolve_exits(high, low, close, np.array([2]), 0.05, 0.02, max_hold=5)
+    assert (exit_idx.tolist(), exit_price.tolist(), outcome.tolist()) == ([3], [98.0], ['stop'])
+
+    low[3] = 99.0  # Now only the target is touched
+    exit_idx, exit_price, outcome = resolve_exits(high, low, close, np.array([2]), 0.05, 0.02, max_hold=5)
+    assert (exit_idx.tolist(), exit_price.tolist(), outcome.tolist()) == ([3], [105.0], ['target'])
+
+def test_untouched_trades_time_out_after_max_hold_or_at_the_end():
+    high, low, close = flat(10)
+    close[5], close[9] = 101.0, 102.0
+    exit_idx, exit_price, outcome = resolve_exits(high, low, close, np.array([2, 7]), 0.05, 0.02, max_hold=3)
+
+    assert exit_idx.tolist() == [5, 9]  # entry + max_hold, clipped to the last candle
+    assert exit_price.tolist() == [101.0, 102.0]
+    assert outcome.tolist() == ['timeout', 'timeout']
+
+def test_matches_a_candle_by_candle_loop():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 2000)))
+    high, low = close * (1 + rng.uniform(0, 0.01, 2000)), close * (1 - rng.uniform(0, 0.01, 2000))
+    entries = breakout_entries(high, close, lookback=20)
+    exit_idx, exit_price, outcome = resolve_exits(high, low, close, entries, 0.03, 0.02, max_hold=50)
+
+    for entry, got_idx, got_price, got_outcome in zip(entries, exit_idx, exit_price, outcome):
+        target, stop = close[entry] * 1.03, close[entry] * 0.98
+        expected = (min(entry + 50, len(close) - 1), close[min(entry + 50, len(close) - 1)], 'timeout')
+        for i in range(entry + 1, min(entry + 51, len(close))):
+            if low[i] <= stop:
+                expected = (i, stop, 'stop')
+                break
+            if high[i] >= target:
+                expected = (i, target, 'target')
+                break
+        assert (got_idx, got_price, got_outcome) == expected
@@ -0,0 +1,65 @@
+import csv
+import os
+import tempfile
+from breakout_journal import BreakoutJournal
+
+def new_journal():
+    folder = tempfile.mkdtemp()
+    return BreakoutJournal(os.path.join(folder, "journal.db")), os.path.join(folder, "breakout_log.csv")
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+def test_open_breakouts_dedup_close_and_expire():
+    journal, _ = new_journal()
+    first = journal.record("2025-01-01T00:00:00", "BTC/USD", 100.0, 105.0, 97.0)
+    assert journal.open_breakout("BTC/USD") == first
+    assert journal.open_breakout("ETH/USD") is None
+
+    second = journal.record("2025-01-01T00:05:00", "ETH/USD", 2000.0)
+    journal.set_post_price(first, 104.0)
+    assert journal.open_breakout("BTC/USD") is None  # A closed record no longer blocks a new one
+    journal.expire(second)
+    journal.expire(first)  # Already closed: stays closed
+    assert journal.open_breakouts() == []
+    states = dict(journal.conn.execute("SELECT id, state FROM breakouts").fetchall())
+    assert states == {first: "closed", second: "expired"}
+
+def test_export_appends_new_rows_and_rewrites_changed_ones():
+    journal, path = new_journal()
+    first = journal.record("t1", "BTC/USD", 100.0, 105.0, 97.0)
+    journal.export_csv(path)
+    assert read_csv(path) == [["t1", "BTC/USD", "100.0", "105.0", "97.0", "N/A"]]
+
+    journal.record("t2", "ETH/USD", 2000.0)
+    inode = os.stat(path).st_ino
+    journal.export_csv(path)
+    assert os.stat(path).st_ino == inode  # Appended in place
+    assert [row[1] for row in read_csv(path)] == ["BTC/USD", "ETH/USD"]
+
+    journal.set_post_price(first, 104.0)
+    journal.export_csv(path)
+    assert read_csv(path)[0][5] == "104.0" and len(read_csv(path)) == 2
+
+    with open(path, "a") as f:
+        f.write("edited by hand\n")  # Not the file we wrote: start over
+    journal.export_csv(path)
+    assert len(read_csv(path)) == 2
+
+def test_csv_round_trip():
+    journal, path = new_journal()
+    closed = journal.record("t1", "BTC/USD", 100.0, 105.0, 97.0)
+    journal.record("t2", "ETH/USD", 2000.0, None, None)
+    journal.set_post_price(closed, 104.0)
+    journal.export_csv(path)
+    with open(path, "a") as f:
+        f.write("garbage,row,not-a-price\n")
+
+    copy, _ = new_journal()
+    assert copy.import_csv(path) == 2
+    rows = copy.conn.execute(
+        "SELECT timestamp, symbol, entry_price, target_price, stop_loss, post_price, state FROM breakouts ORDER BY id"
+    ).fetchall()
+    assert rows == [("t1", "BTC/USD", 100.0, 105.0, 97.0, 104.0, "closed"),
+                    ("t2", "ETH/USD", 2000.0, None, None, None, "expired")]
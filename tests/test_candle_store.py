@@ -0,0 +1,90 @@
+import asyncio
+import os
+import tempfile
+import time
+import numpy as np
+import candle_store
+from fake_exchange import FIVE_MINUTES, AsyncFakeExchange, FakeExchange
+
+def series(start, n, close=1.0):
+    """n consecutive 5m rows from 'start' (a candle index), all prices set to 'close'."""
+    timestamps = (start + np.arange(n)) * FIVE_MINUTES
+    return np.column_stack([timestamps, *[np.full(n, close)] * 4, np.ones(n)])
+
+def stored(store_dir):
+    return candle_store.load('BTC/USD', '5m', store_dir=store_dir)
+
+def test_write_appends_replaces_the_tail_and_backfills():
+    store_dir = tempfile.mkdtemp()
+    candle_store.write('BTC/USD', '5m', series(10, 5), store_dir)
+    candle_store.write('BTC/USD', '5m', series(15, 3), store_dir)  # Append
+    assert stored(store_dir)[:, 0].tolist() == (np.arange(10, 18) * FIVE_MINUTES).tolist()
+
+    # Tail overlap: the forming candle (17) and two new ones replace/extend the tail in place
+    candle_store.write('BTC/USD', '5m', series(17, 3, close=2.0), store_dir)
+    data = stored(store_dir)
+    assert data[:, 0].tolist() == (np.arange(10, 20) * FIVE_MINUTES).tolist()
+    assert data[:7, 4].tolist() == [1.0] * 7 and data[7:, 4].tolist() == [2.0] * 3
+
+    # Tail overlap reaching past the last len(rows) + 1 stored rows goes through the merged rewrite
+    candle_store.write('BTC/USD', '5m', np.concatenate([series(11, 1, 3.0), series(19, 2, 3.0)]), store_dir)
+    data = stored(store_dir)
+    assert data[:, 0].tolist() == (np.arange(10, 21) * FIVE_MINUTES).tolist()
+    assert data[1, 4] == 3.0 and data[-2:, 4].tolist() == [3.0, 3.0] and data[2, 4] == 1.0
+
+    # Backfill before and inside the stored range
+    candle_store.write('BTC/USD', '5m', np.concatenate([series(5, 2, 4.0), series(12, 1, 4.0)]), store_dir)
+    data = stored(store_dir)
+    assert data[:, 0].tolist() == [5 * FIVE_MINUTES, 6 * FIVE_MINUTES] + (np.arange(10, 21) * FIVE_MINUTES).tolist()
+    assert data[4, 4] == 4.0
+    assert not os.path.exists(candle_store.series_path('BTC/USD', '5m', store_dir) + ".tmp")
+
+def test_trailing_partial_row_is_ignored_and_dropped():
+    store_dir = tempfile.mkdtemp()
+    candle_store.write('BTC/USD', '5m', series(10, 4), store_dir)
+    with open(candle_store.series_path('BTC/USD', '5m', store_dir), 'ab') as f:
+        f.write(b'\x00' * 20)  # A write killed mid-row
+
+    assert candle_store.row_count('BTC/USD', '5m', store_dir) == 4
+    assert candle_store.open_memmap('BTC/USD', '5m', store_dir).shape == (4, candle_store.ROW_WIDTH)
+    candle_store.write('BTC/USD', '5m', series(14, 2), store_dir)
+    assert stored(store_dir)[:, 0].tolist() == (np.arange(10, 16) * FIVE_MINUTES).tolist()
+
+class PagedExchange(FakeExchange):
+    """Returns at most 'page' candles forward from 'since', like most non-Kraken venues."""
+
+    def __init__(self, page, **kwargs):
+        super().__init__(**kwargs)
+        self.page = page
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe='5m', since=None, limit=None):
+        self.calls += 1
+        return super().fetch_ohlcv(symbol, timeframe, since, self.page if since is not None else limit)
+
+def now_candle():
+    return int(time.time() * 1000) // FIVE_MINUTES
+
+def test_update_pages_forward_after_downtime():
+    store_dir = tempfile.mkdtemp()
+    exchange = PagedExchange(page=100, symbols=['BTC/USD'])
+    candle_store.write('BTC/USD', '5m', series(now_candle() - 500, 10), store_dir)  # Down for ~490 candles
+
+    rows = candle_store.update(exchange, 'BTC/USD', '5m', store_dir=store_dir)
+
+    timestamps = stored(store_dir)[:, 0]
+    assert exchange.calls > 1
+    assert np.all(np.diff(timestamps) == FIVE_MINUTES)  # No hole
+    assert timestamps[-1] >= (now_candle() - 1) * FIVE_MINUTES
+    assert np.all(np.diff(rows[:, 0]) > 0) and rows[-1, 0] == timestamps[-1]
+
+def test_update_restarts_the_series_when_the_gap_cannot_be_filled():
+    store_dir = tempfile.mkdtemp()
+    exchange = AsyncFakeExchange(symbols=['BTC/USD'])  # Like Kraken: never more than the newest 720 candles
+    candle_store.write('BTC/USD', '5m', series(now_candle() - 2000, 10), store_dir)
+
+    asyncio.run(candle_store.update_async(exchange, 'BTC/USD', '5m', store_dir=store_dir))
+
+    timestamps = stored(store_dir)[:, 0]
+    assert len(timestamps) in (720, 721)
+    assert np.all(np.diff(timestamps) == FIVE_MINUTES)
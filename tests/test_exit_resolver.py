@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from exit_resolver import resolve_exits
+
+T0 = pd.Timestamp("2025-01-01", tz="UTC")
+STEPS = {'1h': 3_600_000, '5m': 300_000, '1m': 60_000}
+
+def ms(minutes):
+    return int(T0.value // 1_000_000 + minutes * 60_000)
+
+class Market:
+    """Flat candles around 100 on every timeframe, with touches placed by minute (and rolled up)."""
+
+    def __init__(self, hours=6):
+        self.candles = {}
+        for timeframe, step in STEPS.items():
+            timestamps = np.arange(ms(0), ms(hours * 60), step, dtype=float)
+            n = len(timestamps)
+            self.candles[timeframe] = np.column_stack([timestamps, np.full(n, 100.0), np.full(n, 100.5),
+                                                       np.full(n, 99.5), np.full(n, 100.0), np.ones(n)])
+
+    def touch(self, minute, high=None, low=None):
+        """Sets a 1m candle's high/low and every coarser candle that contains it."""
+        for candles in self.candles.values():
+            i = np.searchsorted(candles[:, 0], ms(minute), side='right') - 1
+            if high is not None:
+                candles[i, 2] = max(candles[i, 2], high)
+            if low is not None:
+                candles[i, 3] = min(candles[i, 3], low)
+        return self
+
+    def load(self, symbol, timeframe, since, until):
+        candles = self.candles[timeframe]
+        return candles[(candles[:, 0] >= since) & (candles[:, 0] < until)]
+
+def resolve(market, entry_minute=0):
+    breakouts = pd.DataFrame({'symbol': ['BTC/USD'], 'timestamp': [T0 + pd.Timedelta(minutes=entry_minute)],
+                              'price': [100.0], 'target_price': [105.0], 'stop_loss': [98.0]})
+    return resolve_exits(breakouts, market.load).iloc[0]
+
+def test_tie_on_1h_and_5m_is_settled_on_1m():
+    # Stop at 01:17, target at 01:18: same 1h and same 5m candle, different minutes
+    trade = resolve(Market().touch(77, low=97.0).touch(78, high=106.0))
+    assert trade['outcome'] == 'stop'
+    assert trade['exit_time'] == T0 + pd.Timedelta(minutes=77)
+    assert trade['exit_price'] == 98.0
+
+    trade = resolve(Market().touch(77, high=106.0).touch(78, low=97.0))
+    assert trade['outcome'] == 'target'
+    assert trade['exit_time'] == T0 + pd.Timedelta(minutes=77)
+    assert trade['pnl_pct'] == pytest.approx(5.0)
+
+def test_tie_inside_one_minute_is_ambiguous_and_assumes_the_stop():
+    trade = resolve(Market().touch(77, high=106.0, low=97.0))
+    assert trade['outcome'] == 'ambiguous'
+    assert trade['exit_price'] == 98.0
+    assert trade['exit_time'] == T0 + pd.Timedelta(minutes=77)
+
+def test_touches_before_a_mid_candle_entry_do_not_count():
+    # The stop touch at 00:10 is in the entry's 1h candle but before the 00:30 entry
+    trade = resolve(Market().touch(10, low=97.0).touch(45, high=106.0), entry_minute=30)
+    assert trade['outcome'] == 'target'
+    assert trade['exit_time'] == T0 + pd.Timedelta(minutes=45)
+
+def test_untouched_trade_is_marked_to_market_at_the_horizon():
+    trade = resolve(Market())
+    assert trade['outcome'] == 'open'
+    assert trade['exit_price'] == 100.0
+    assert trade['exit_time'] == T0 + pd.Timedelta(hours=3)  # Last 1h candle inside the 4h horizon
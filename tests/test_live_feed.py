@@ -0,0 +1,58 @@
+import asyncio
+import live_feed
+from ws_replay import ReplayServer, load_sessions, wait_for
+
+SYMBOLS = ["BTC/USD", "ETH/USD"]
+
+async def replay(monkeypatch, on_breakout, until, reject_first=0):
+    """Runs a LiveFeed against the replay server until until(feed, server) holds."""
+    monkeypatch.setattr(live_feed, "RECONNECT_DELAY", 0.01)
+    async with ReplayServer(load_sessions(), reject_first=reject_first) as server:
+        feed = live_feed.LiveFeed(SYMBOLS, on_breakout, url=server.url)
+        task = asyncio.create_task(feed.run())
+        try:
+            await wait_for(lambda: task.done() or until(feed, server))
+            assert not task.done(), task.exception()
+        finally:
+            task.cancel()
+    return feed, server
+
+def test_detects_breakouts_and_resubscribes_after_disconnect(monkeypatch):
+    breakouts = []
+    feed, server = asyncio.run(replay(monkeypatch, lambda symbol, price: breakouts.append((symbol, price)),
+                                      until=lambda feed, server: len(breakouts) == 2))
+
+    # One alert per candle: 102.5 in the same candle as 102.0 doesn't fire again
+    assert breakouts == [("BTC/USD", 102.0), ("ETH/USD", 3050.0)]
+    assert feed.reconnects == 1
+    for subscriptions in server.subscriptions:
+        assert sorted(s["params"]["channel"] for s in subscriptions) == ["ohlc", "ticker"]
+        assert all(s["params"]["symbol"] == SYMBOLS for s in subscriptions)
+    assert len(server.subscriptions) == 2
+    assert feed.errors == 2  # The OHLC entry without a close and the frame that isn't JSON
+
+def test_survives_failed_handshake_and_failing_handler(monkeypatch):
+    breakouts = []
+
+    def on_breakout(symbol, price):
+        breakouts.append(symbol)
+        raise RuntimeError("handler failed")
+
+    feed, server = asyncio.run(replay(monkeypatch, on_breakout, reject_first=1,
+                                      until=lambda feed, server: len(breakouts) == 2))
+
+    assert breakouts == ["BTC/USD", "ETH/USD"]
+    assert server.rejected == 1
+    assert feed.reconnects == 2  # The refused handshake, then the server's disconnect
+    assert feed.errors == 4
+
+def test_rest_rule_counts_the_forming_candle_and_skips_the_ma():
+    rest = live_feed.SymbolState(include_current=True, above_ma=False)
+    live = live_feed.SymbolState()
+    for state in (rest, live):
+        state.on_candle([0.0, 100.0, 101.0, 99.0, 100.0, 1.0])
+        state.on_candle([300_000.0, 100.0, 105.0, 99.0, 104.0, 1.0])  # Forming, high 105
+
+    assert rest.rolling_high() == 105.0 and live.rolling_high() == 101.0
+    assert not rest.check_breakout(104.0) and rest.check_breakout(106.0)
+    assert not live.check_breakout(106.0)  # No MA20 yet
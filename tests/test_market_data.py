@@ -0,0 +1,46 @@
+import asyncio
+from fake_exchange import AsyncFakeExchange
+from market_data import MarketData, Venue
+
+class SpikingExchange(AsyncFakeExchange):
+    """Tickers at twice the candle prices, so every pair breaks out on every sweep."""
+
+    async def fetch_tickers(self, symbols=None):
+        tickers = await super().fetch_tickers(symbols)
+        return {symbol: {**ticker, 'last': ticker['last'] * 2} for symbol, ticker in tickers.items()}
+
+def two_venues(exchange_class=AsyncFakeExchange):
+    alpha = exchange_class('alpha', symbols=['BTC/USD', 'BTC/USDT', 'ETH/USD', 'SOL/USDT', 'BTC/USD:USD', 'DOGE/EUR'])
+    beta = exchange_class('beta', symbols=['BTC/USDT', 'ETH/USDC', 'XRP/USD', 'ETH/USD:USD', 'ADA/USD:USD'])
+    return MarketData([Venue('alpha', client=alpha, rate_limit=1), Venue('beta', client=beta, rate_limit=1)])
+
+def test_unified_universe_is_spot_usd_only():
+    async def load():
+        market_data = two_venues()
+        try:
+            return await market_data.load_universe(), market_data.venues
+        finally:
+            await market_data.close()
+
+    universe, (alpha, beta) = asyncio.run(load())
+
+    assert universe == {'BTC/USD': ['alpha', 'beta'], 'ETH/USD': ['alpha', 'beta'],
+                        'SOL/USD': ['alpha'], 'XRP/USD': ['beta']}
+    # The plain USD spot pair wins over USDT and over the swap
+    assert alpha.symbols == {'BTC/USD': 'BTC/USD', 'ETH/USD': 'ETH/USD', 'SOL/USD': 'SOL/USDT'}
+    assert beta.symbols == {'BTC/USD': 'BTC/USDT', 'ETH/USD': 'ETH/USDC', 'XRP/USD': 'XRP/USD'}
+
+def test_breakout_on_both_venues_is_reported_once():
+    async def sweep_twice():
+        market_data = two_venues(SpikingExchange)
+        try:
+            await market_data.load_universe()
+            return await market_data.scan_once(), await market_data.scan_once()
+        finally:
+            await market_data.close()
+
+    first, second = asyncio.run(sweep_twice())
+
+    assert sorted((unified, sorted(venues)) for unified, venues, _ in first) == [
+        ('BTC/USD', ['alpha', 'beta']), ('ETH/USD', ['alpha', 'beta']), ('SOL/USD', ['alpha']), ('XRP/USD', ['beta'])]
+    assert second == []  # Still breaking out a sweep later, but within the dedup window
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import time
+from post_breakout_scheduler import PostBreakoutScheduler
+
+def pending_path():
+    return os.path.join(tempfile.mkdtemp(), "pending.json")
+
+class Recorder:
+    """fetch_prices/on_price pair that remembers every batch and every served check."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.served = []
+        self.fail = fail
+
+    def fetch_prices(self, symbols):
+        self.batches.append((time.time(), symbols))
+        if self.fail:
+            raise RuntimeError("exchange down")
+        return {symbol: float(len(symbol)) for symbol in symbols}
+
+    def on_price(self, check, price):
+        self.served.append((check['id'], price))
+
+def test_pending_checks_survive_a_restart_in_due_order():
+    path = pending_path()
+    recorder = Recorder()
+    scheduler = PostBreakoutScheduler(recorder.fetch_prices, recorder.on_price, path=path)
+    scheduler.schedule(1, 'BTC/USD', 300)
+    scheduler.schedule(2, 'ETH/USD', 60, entry_price=2000.0)
+    scheduler.schedule(3, 'SOL/USD', 900)
+
+    restored = PostBreakoutScheduler(recorder.fetch_prices, recorder.on_price, path=path)
+    assert restored.pending() == 3
+    checks = [check for _, _, check in sorted(restored.heap, key=lambda entry: entry[:2])]
+    assert [check['id'] for check in checks] == [2, 1, 3]
+    assert restored.heap[0][2] is checks[0]  # The earliest due is next in line
+    assert checks[0]['entry_price'] == 2000.0 and checks[0]['delay'] == 60
+
+def test_overdue_checks_run_on_start_and_leave_an_empty_file():
+    path = pending_path()
+    with open(path, "w") as f:
+        json.dump([{'due': time.time() - 600, 'id': 7, 'symbol': 'BTC/USD', 'delay': 300}], f)
+    recorder = Recorder()
+    scheduler = PostBreakoutScheduler(recorder.fetch_prices, recorder.on_price, path=path).start()
+    scheduler.drain()
+
+    assert recorder.served == [(7, 7.0)]
+    with open(path) as f:
+        assert json.load(f) == []
+
+def test_checks_due_close_together_share_one_fetch():
+    recorder = Recorder()
+    scheduler = PostBreakoutScheduler(recorder.fetch_prices, recorder.on_price, path=None, coalesce_window=0.3).start()
+    scheduler.schedule(1, 'BTC/USD', 0.05)
+    scheduler.schedule(2, 'ETH/USD', 0.2)  # Within the window of the first: same fetch
+    scheduler.schedule(3, 'BTC/USD', 0.25)  # Same symbol again: still fetched once
+    scheduler.schedule(4, 'SOL/USD', 0.8)  # Past the window: its own fetch
+    scheduler.drain()
+
+    assert [symbols for _, symbols in recorder.batches] == [['BTC/USD', 'ETH/USD'], ['SOL/USD']]
+    assert sorted(check_id for check_id, _ in recorder.served) == [1, 2, 3, 4]
+
+def test_failed_fetch_serves_the_checks_without_a_price():
+    recorder = Recorder(fail=True)
+    scheduler = PostBreakoutScheduler(recorder.fetch_prices, recorder.on_price, path=None).start()
+    scheduler.schedule(1, 'BTC/USD', 0)
+    scheduler.drain()
+
+    assert recorder.served == [(1, None)]
@@ -0,0 +1,60 @@
+import asyncio
+import ccxt
+from fake_exchange import AsyncFakeExchange, FakeExchange
+from price_snapshot import PriceSnapshot, fetch_price_snapshot, fetch_price_snapshot_async
+
+SYMBOLS = [f"COIN{i}/USD" for i in range(16)]
+
+class RejectingExchange(FakeExchange):
+    """Fails the whole fetch_tickers call when it contains a delisted pair, like Kraken."""
+
+    def __init__(self, bad=(), error=ccxt.BadSymbol, **kwargs):
+        super().__init__(symbols=SYMBOLS, **kwargs)
+        self.bad = set(bad)
+        self.error = error
+        self.calls = []
+
+    def fetch_tickers(self, symbols=None):
+        self.calls.append(len(symbols))
+        if self.bad & set(symbols):
+            raise self.error("EQuery:Unknown asset pair")
+        return super().fetch_tickers(symbols)
+
+class AsyncRejectingExchange(AsyncFakeExchange):
+    def __init__(self, bad=()):
+        super().__init__(symbols=SYMBOLS)
+        self.bad = set(bad)
+
+    async def fetch_tickers(self, symbols=None):
+        if self.bad & set(symbols):
+            raise ccxt.BadSymbol("EQuery:Unknown asset pair")
+        return await super().fetch_tickers(symbols)
+
+def test_bad_symbol_only_drops_itself():
+    exchange = RejectingExchange(bad={"COIN5/USD"})
+    failed = set()
+    prices = fetch_price_snapshot(exchange, SYMBOLS, batch_size=8, failed=failed)
+
+    assert sorted(prices) == sorted(set(SYMBOLS) - {"COIN5/USD"})
+    assert failed == {"COIN5/USD"}
+    assert exchange.calls[0] == 8 and len(exchange.calls) == 1 + 2 * 3 + 1  # Bisected down to one pair, then the clean batch
+
+    async_prices = asyncio.run(fetch_price_snapshot_async(AsyncRejectingExchange(bad={"COIN5/USD"}), SYMBOLS, batch_size=8))
+    assert sorted(async_prices) == sorted(prices)
+
+def test_network_errors_are_not_bisected():
+    exchange = RejectingExchange(bad=set(SYMBOLS), error=ccxt.NetworkError)
+    assert fetch_price_snapshot(exchange, SYMBOLS, batch_size=8) == {}
+    assert exchange.calls == [8, 8]
+
+def test_snapshot_skips_failed_pairs_until_retracked():
+    exchange = RejectingExchange(bad={"COIN0/USD"})
+    snapshot = PriceSnapshot(exchange, SYMBOLS)
+    snapshot.refresh()
+    calls = len(exchange.calls)
+    snapshot.refresh()
+
+    assert exchange.calls[calls:] == [15]  # One clean batch, the bad pair isn't retried
+    assert snapshot.get("COIN0/USD") is None
+    snapshot.track(SYMBOLS)
+    assert snapshot.failed == set()
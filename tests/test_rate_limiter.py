@@ -0,0 +1,63 @@
+import asyncio
+import rate_limiter
+from rate_limiter import PRIORITY_CONFIRM, PRIORITY_SWEEP, RequestScheduler
+
+def drained_scheduler(rate=20.0):
+    """Scheduler with one 'ohlc' token per 1/rate seconds and that token already spent."""
+    scheduler = RequestScheduler({'ohlc': (rate, 1)})
+    scheduler.acquire('ohlc')
+    return scheduler
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def contend():
+        scheduler = drained_scheduler()
+        served = []
+
+        async def request(name, priority):
+            with scheduler.priority(priority):
+                await scheduler.acquire_async('ohlc')
+            served.append(name)
+
+        # All queue up while the bucket is empty; the confirmation arrives last but goes first
+        await asyncio.gather(request('sweep-1', PRIORITY_SWEEP), request('sweep-2', PRIORITY_SWEEP),
+                             request('confirm', PRIORITY_CONFIRM), request('sweep-3', PRIORITY_SWEEP))
+        return served, scheduler
+
+    served, scheduler = asyncio.run(contend())
+
+    assert served == ['confirm', 'sweep-1', 'sweep-2', 'sweep-3']
+    assert scheduler.waiting['ohlc'] == [] and scheduler.stats['requests'] == 5
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def cancel_head():
+        scheduler = drained_scheduler(rate=5.0)
+        head = asyncio.create_task(scheduler.acquire_async('ohlc', priority=PRIORITY_CONFIRM))
+        await asyncio.sleep(0.05)
+        assert len(scheduler.waiting['ohlc']) == 1
+        head.cancel()
+        await asyncio.gather(head, return_exceptions=True)
+
+        # Without the cleanup this would wait forever behind the cancelled ticket
+        await asyncio.wait_for(scheduler.acquire_async('ohlc'), timeout=2)
+        return scheduler, head
+
+    scheduler, head = asyncio.run(cancel_head())
+
+    assert head.cancelled()
+    assert scheduler.waiting['ohlc'] == [] and scheduler.stats['requests'] == 2
+
+class Candles:
+    async def fetch_ohlcv(self, symbol, *args, **kwargs):
+        return [[symbol]]
+
+def test_timed_out_call_does_not_block_the_next_one():
+    async def time_out():
+        scheduler = drained_scheduler(rate=2.0)
+        exchange = rate_limiter.AsyncScheduledExchange(Candles(), scheduler)
+        try:
+            await asyncio.wait_for(exchange.fetch_ohlcv('BTC/USD'), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        return await asyncio.wait_for(exchange.fetch_ohlcv('ETH/USD'), timeout=2)
+
+    assert asyncio.run(time_out()) == [['ETH/USD']]
@@ -0,0 +1,77 @@
+import numpy as np
+import talib
+from streaming_indicators import (IndicatorState, RollingSMA, StreamingEMA, StreamingMACD, StreamingOBV, WilderADX,
+                                  WilderATR, WilderRSI)
+
+def candles(n=300, seed=7):
+    """Deterministic random-walk OHLCV with a few flat closes (zero moves are an edge case for RSI/OBV)."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    close[50:53] = close[49]
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.random(n) * 0.01)
+    low = np.minimum(open_, close) * (1 - rng.random(n) * 0.01)
+    volume = rng.random(n) * 1000
+    return open_, high, low, close, volume
+
+# name -> (streaming factory, feed(indicator, i, replace), talib over the whole series)
+def cases(open_, high, low, close, volume):
+    return {
+        'RSI': (lambda: WilderRSI(14), lambda ind, c, r: ind.update(c[3], r), talib.RSI(close, timeperiod=14)),
+        'SMA20': (lambda: RollingSMA(20), lambda ind, c, r: ind.update(c[3], r), talib.SMA(close, timeperiod=20)),
+        'EMA12': (lambda: StreamingEMA(12), lambda ind, c, r: ind.update(c[3], r), talib.EMA(close, timeperiod=12)),
+        'ATR': (lambda: WilderATR(14), lambda ind, c, r: ind.update(c[1], c[2], c[3], r),
+                talib.ATR(high, low, close, timeperiod=14)),
+        'ADX': (lambda: WilderADX(14), lambda ind, c, r: ind.update(c[1], c[2], c[3], r),
+                talib.ADX(high, low, close, timeperiod=14)),
+        'MACD': (lambda: StreamingMACD(), lambda ind, c, r: ind.update(c[3], r), talib.MACD(close)[2]),
+        'OBV': (lambda: StreamingOBV(), lambda ind, c, r: ind.update(c[3], c[4], r), talib.OBV(close, volume)),
+    }
+
+def run(make, feed, rows, draft=None):
+    """Streams rows through a fresh indicator; with draft, every candle first arrives as draft(row) and is then replaced."""
+    indicator, values = make(), []
+    for row in rows:
+        if draft is not None:
+            feed(indicator, draft(row), False)
+            feed(indicator, row, True)
+        else:
+            feed(indicator, row, False)
+        values.append(indicator.value)
+    return np.array(values)
+
+def assert_matches(name, streamed, expected):
+    warm = ~np.isnan(expected)
+    assert warm.sum() > 100, name
+    assert np.isnan(streamed[~warm]).all(), f"{name} has values before talib's warm-up ends"
+    assert np.allclose(streamed[warm], expected[warm], rtol=1e-9, atol=1e-9), name
+
+def test_streaming_matches_talib():
+    series = candles()
+    rows = np.column_stack(series)
+    for name, (make, feed, expected) in cases(*series).items():
+        assert_matches(name, run(make, feed, rows), expected)
+
+def test_replacing_the_forming_candle_matches_talib():
+    # Every candle first arrives with different values (as a still-forming candle would), then its final ones
+    series = candles()
+    rows = np.column_stack(series)
+    draft = lambda row: row * np.array([1.0, 1.03, 0.97, 1.02, 2.0])
+    for name, (make, feed, expected) in cases(*series).items():
+        assert_matches(name, run(make, feed, rows, draft), expected)
+
+def test_indicator_state_replaces_same_timestamp_and_ignores_older():
+    open_, high, low, close, volume = candles(120)
+    timestamps = np.arange(len(close)) * 300_000.0
+    state = IndicatorState()
+    for row in np.column_stack([timestamps, open_, high, low, close, volume]):
+        state.update([row[0], row[1], row[2] * 1.05, row[3], row[4] * 1.01, row[5]])  # Forming
+        state.update(row)  # Closed: same timestamp, replaces
+    state.update([timestamps[-2], 1.0, 1.0, 1.0, 1.0, 1.0])  # Older: ignored
+
+    values = state.values()
+    assert state.count == len(close)
+    assert np.isclose(values['RSI'], talib.RSI(close, timeperiod=14)[-1])
+    assert np.isclose(values['MA20'], talib.SMA(close, timeperiod=20)[-1])
+    assert np.isclose(values['MA50'], talib.SMA(close, timeperiod=50)[-1])
+    assert np.isclose(values['ATR'], talib.ATR(high, low, close, timeperiod=14)[-1])
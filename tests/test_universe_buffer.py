@@ -0,0 +1,46 @@
+import numpy as np
+from universe_buffer import UniverseBuffer
+
+def test_rolling_high_low_and_ma_match_numpy_over_random_updates():
+    rng = np.random.default_rng(3)
+    symbols = [f"COIN{i}/USD" for i in range(5)]
+    window, ma_period = 12, 5
+    buffer = UniverseBuffer(symbols, window=window, ma_period=ma_period)
+    closed = {symbol: [] for symbol in symbols}  # Every committed candle, as the buffer stored it
+    forming = {}
+
+    for _ in range(400):
+        symbol = symbols[rng.integers(len(symbols))]
+        # Mostly replace the forming candle, sometimes start a new one (which commits the old one)
+        timestamp = forming.get(symbol, (0,))[0] + (300_000 if rng.random() < 0.4 or symbol not in forming else 0)
+        low = rng.uniform(90, 110)
+        candle = [timestamp, low, low + rng.uniform(0, 5), low, low + rng.uniform(0, 5), 1.0]
+        if symbol in forming and timestamp > forming[symbol][0]:
+            closed[symbol].append(np.float32(forming[symbol][1:5]).astype(float))
+        forming[symbol] = candle
+        buffer.update(symbol, candle)
+
+        i = buffer.index[symbol]
+        history = np.array(closed[symbol]).reshape(-1, 4)
+        if len(history) == 0:
+            assert np.isnan(buffer.rolling_high[i])
+            continue
+        recent = history[-window:]
+        assert buffer.rolling_high[i] == np.max(recent[:, 1])
+        assert buffer.rolling_low[i] == np.min(recent[:, 2])
+        assert buffer.highs(include_current=True)[i] == max(np.max(recent[:, 1]), candle[2])
+        if len(history) >= ma_period - 1:
+            expected_ma = (history[-(ma_period - 1):, 3].sum() + candle[4]) / ma_period
+            assert np.isclose(buffer.ma()[i], expected_ma, rtol=1e-9)
+        else:
+            assert np.isnan(buffer.ma()[i])
+
+def test_breakouts_need_a_full_window_unless_min_closed_says_otherwise():
+    buffer = UniverseBuffer(['BTC/USD'], window=3, ma_period=2)
+    for t, high in enumerate([10.0, 12.0, 11.0]):
+        buffer.update('BTC/USD', [t, high, high, high, high, 1.0])
+    prices = buffer.prices_array({'BTC/USD': 13.0})
+
+    assert buffer.breakouts(prices) == []  # Only 2 closed candles so far
+    assert buffer.breakouts(prices, min_closed=0) == [('BTC/USD', 13.0)]
+    assert buffer.breakouts(buffer.prices_array({'BTC/USD': 12.0}), min_closed=0) == []
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import os
+from http import HTTPStatus
+import websockets
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DISCONNECT = {"replay": "disconnect"}
+
+def load_sessions(name="kraken_ws_v2_replay.jsonl"):
+    """Recorded frames, split into one list per connection at each {"replay": "disconnect"} marker."""
+    sessions = [[]]
+    with open(os.path.join(FIXTURE_DIR, name)) as f:
+        for line in f:
+            frame = line.rstrip("\n")
+            try:
+                is_marker = json.loads(frame) == DISCONNECT
+            except ValueError:
+                is_marker = False
+            if is_marker:
+                sessions.append([])
+            else:
+                sessions[-1].append(frame)
+    return sessions
+
+class ReplayServer:
+    """Local stand-in for Kraken's v2 websocket: acks subscriptions, then replays one recorded session per connection.
+
+    Every session but the last ends with the server closing the connection; the last one stays open.
+    The first reject_first handshakes are refused with HTTP 503.
+    """
+
+    def __init__(self, sessions, expect_subscriptions=2, reject_first=0):
+        self.sessions = sessions
+        self.expect_subscriptions = expect_subscriptions
+        self.reject_first = reject_first
+        self.rejected = 0
+        self.subscriptions = []  # One list of subscribe requests per accepted connection
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def process_request(self, connection, request):
+        if self.rejected < self.reject_first:
+            self.rejected += 1
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "Service unavailable\n")
+        return None
+
+    async def handler(self, ws):
+        connection = len(self.subscriptions)
+        received = []
+        self.subscriptions.append(received)
+        while len(received) < self.expect_subscriptions:
+            request = json.loads(await ws.recv())
+            received.append(request)
+            await ws.send(json.dumps({"method": "subscribe", "success": True,
+                                      "result": {"channel": request["params"]["channel"]}}))
+        session = self.sessions[min(connection, len(self.sessions) - 1)]
+        for frame in session:
+            await ws.send(frame)
+        if connection < len(self.sessions) - 1:
+            await ws.close()
+        else:
+            await ws.wait_closed()
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0, process_request=self.process_request)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+async def wait_for(condition, timeout=10.0):
+    """Polls condition() until it holds; fails the test after timeout seconds."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("timed out waiting for the live feed")
+        await asyncio.sleep(0.01)
@@ -1,66 +1,87 @@
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import ccxt
-from ta.trend import ADXIndicator, MACD
-from ta.momentum import RSIIndicator
-from ta.volatility import AverageTrueRange
-from ta.volume import OnBalanceVolumeIndicator
+import talib
+
+# ✅ Repo root on the path so the candle store can be used as a data source
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+import candle_store
+
+# ✅ Labeling Parameters
+DATASET_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(DATASET_DIR, 'labels')
+OUTPUT_FORMAT = os.getenv("LABEL_FORMAT", "parquet")  # parquet or feather (both need pyarrow)
+WORKERS = int(os.getenv("LABEL_WORKERS", str(os.cpu_count() or 1)))
+STORE_TIMEFRAME = '1h'  # Timeframe used when labeling the candle store ("store" or "store:<timeframe>")
 
 # Load historical data instead of fetching from Binance
 def load_historical_data(file_path):
     df = pd.read_csv(file_path)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df = df.sort_values(by='timestamp')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+    for column in ['open', 'high', 'low', 'close', 'volume']:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    # Drop header junk rows (e.g. the ticker row yfinance exports) before sorting
+    df = df.dropna(subset=['timestamp', 'close'])
+    df = df.sort_values(by='timestamp').reset_index(drop=True)
     return df
 
-# Compute technical indicators
+# Compute technical indicators (one vectorized pass, including the rolling means the classifier compares against)
 def compute_indicators(df):
+    close = df['close'].to_numpy(dtype=float)
+    high = df['high'].to_numpy(dtype=float)
+    low = df['low'].to_numpy(dtype=float)
+    volume = df['volume'].to_numpy(dtype=float)
+
     df['200_MA'] = df['close'].rolling(window=200, min_periods=1).mean()
-    df['RSI'] = RSIIndicator(df['close'], window=14).rsi().ffill().bfill()
-    df['ADX'] = ADXIndicator(df['high'], df['low'], df['close'], window=14).adx().ffill().bfill()
-    df['MACD_Histogram'] = MACD(df['close']).macd_diff().ffill().bfill()
-    df['ATR'] = AverageTrueRange(df['high'], df['low'], df['close'], window=14).average_true_range()
+    df['RSI'] = pd.Series(talib.RSI(close, timeperiod=14), index=df.index).ffill().bfill()
+    df['ADX'] = pd.Series(talib.ADX(high, low, close, timeperiod=14), index=df.index)
+    df['MACD_Histogram'] = pd.Series(talib.MACD(close)[2], index=df.index).ffill().bfill()
+    df['ATR'] = pd.Series(talib.ATR(high, low, close, timeperiod=14), index=df.index)
     df['ATR'] = df['ATR'].replace(0, np.nan).ffill().bfill()
-    df['OBV'] = OnBalanceVolumeIndicator(df['close'], df['volume']).on_balance_volume().ffill().bfill()
-    
+    df['OBV'] = pd.Series(talib.OBV(close, volume), index=df.index).ffill().bfill()
+
     # Ensure no zeros in ADX (replace with NaN and forward fill)
     df.loc[df['ADX'] == 0.0, 'ADX'] = np.nan
     df['ADX'] = df['ADX'].ffill().bfill()
+
+    df['Volume_MA30'] = df['volume'].rolling(window=30).mean()  # Extended volume window
+    df['OBV_MA30'] = df['OBV'].rolling(window=30).mean()  # Extended OBV window
+    df['ATR_MA50'] = df['ATR'].rolling(window=50).mean()
     return df
 
 # Define market state classification
 def classify_market_state(df):
-    df['Market_State'] = 'Unknown'
-
     bull_mask = (
-        (df['close'] > df['200_MA']) & 
+        (df['close'] > df['200_MA']) &
         (df['ADX'] > 20) &  # Lowered ADX threshold to capture earlier trends
         (df['RSI'] > 55) &  # Adjusted RSI for more aggressive Bull detection
-        (df['MACD_Histogram'] > 0) & 
-        (df['volume'] > df['volume'].rolling(window=30).mean())  # Extended volume window
+        (df['MACD_Histogram'] > 0) &
+        (df['volume'] > df['Volume_MA30'])
     )
-    
+
     bear_mask = (
-        (df['close'] < df['200_MA']) & 
+        (df['close'] < df['200_MA']) &
         (df['ADX'] > 20) &  # Lowered ADX threshold for earlier Bear trends
-        (df['RSI'] < 45) & 
-        (df['MACD_Histogram'] < 0) & 
-        (df['OBV'] < df['OBV'].rolling(window=30).mean())  # Extended OBV window
+        (df['RSI'] < 45) &
+        (df['MACD_Histogram'] < 0) &
+        (df['OBV'] < df['OBV_MA30'])
     )
-    
+
     ranging_mask = (
         (df['close'].between(df['200_MA'] * 0.97, df['200_MA'] * 1.03)) &  # Tightened range to better capture ranging
         (df['ADX'] < 18) &  # Lowered ADX further for better ranging detection
-        (df['ATR'] < df['ATR'].rolling(window=50).mean())  # ATR check to filter volatile trends
+        (df['ATR'] < df['ATR_MA50'])  # ATR check to filter volatile trends
     )
 
-    df.loc[bull_mask, 'Market_State'] = 'Bull'
-    df.loc[bear_mask, 'Market_State'] = 'Bear'
-    df.loc[ranging_mask, 'Market_State'] = 'Ranging'
-    
+    # Ranging wins over Bear, Bear over Bull (same precedence as applying the masks in turn)
+    df['Market_State'] = np.select([ranging_mask, bear_mask, bull_mask], ['Ranging', 'Bear', 'Bull'], default='Unknown')
+
     # Reclassify Unknown states based on previous market trends
-    df['Market_State'] = df['Market_State'].replace('Unknown', np.nan)
-    df['Market_State'].fillna(method='ffill', inplace=True)
+    df['Market_State'] = df['Market_State'].replace('Unknown', np.nan).ffill()
 
     return df
 
@@ -70,18 +91,70 @@ def highlight_questionable(df):
     df['Questionable'] = df['Questionable'] & (df['Market_State'] == 'Unknown')
     return df
 
+def label(df):
+    return highlight_questionable(classify_market_state(compute_indicators(df)))
+
+# ✅ Batch Labeling
+def find_jobs(source, store_dir=candle_store.CANDLE_STORE_DIR):
+    """(name, kind, location) for every series in a directory of CSVs or in the candle store ('store[:tf]')."""
+    if source.startswith('store'):
+        timeframe = source.partition(':')[2] or STORE_TIMEFRAME
+        return [(candle_store.encode_symbol(symbol), 'store', (symbol, timeframe, store_dir))
+                for symbol in candle_store.stored_symbols(timeframe, store_dir)]
+    return [(os.path.splitext(name)[0], 'csv', os.path.join(source, name))
+            for name in sorted(os.listdir(source)) if name.endswith('.csv')]
+
+def write_labels(df, path):
+    if OUTPUT_FORMAT == 'feather':
+        df.to_feather(path)
+    else:
+        df.to_parquet(path, index=False)
+
+def label_job(job, output_dir=OUTPUT_DIR):
+    """Loads, labels and writes one series; returns (name, rows, state counts) or (name, 0, error)."""
+    name, kind, location = job
+    try:
+        if kind == 'store':
+            symbol, timeframe, store_dir = location
+            df = candle_store.load_df(symbol, timeframe, store_dir=store_dir)
+        else:
+            df = load_historical_data(location)
+        if df.empty:
+            return name, 0, "no rows"
+        df = label(df)
+        write_labels(df, os.path.join(output_dir, f"{name}.{OUTPUT_FORMAT}"))
+        return name, len(df), df['Market_State'].value_counts().to_dict()
+    except Exception as e:
+        return name, 0, str(e)
+
+def label_all(source=DATASET_DIR, output_dir=OUTPUT_DIR, workers=WORKERS):
+    """Labels every series in source across a process pool, one columnar file per series."""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = find_jobs(source)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(label_job, jobs, [output_dir] * len(jobs), chunksize=max(1, len(jobs) // (workers * 4))))
+
 # Main function
 def main():
-    file_path = '/Users/jameserskine/Documents/trading_bot/datasets/market_state_labeled.csv'
-    df = load_historical_data(file_path)
-    df = compute_indicators(df)
-    df = classify_market_state(df)
-    df = highlight_questionable(df)
+    # Usage: generate_market_state_labels.py [csv directory | store | store:<timeframe>] [output directory]
+    source = sys.argv[1] if len(sys.argv) > 1 else DATASET_DIR
+    if importlib.util.find_spec('pyarrow') is None:
+        print(f"❌ Writing {OUTPUT_FORMAT} needs pyarrow (pip install pyarrow).")
+        return
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
 
-    df.to_csv(file_path, index=False)
+    start = time.perf_counter()
+    results = label_all(source, output_dir)
+    rows = 0
+    for name, count, detail in results:
+        if count:
+            rows += count
+            print(f"✅ {name}: {count} rows {detail}")
+        else:
+            print(f"❌ {name}: {detail}")
 
-    print(f"Dataset saved to {file_path}. Review questionable classifications manually.")
+    print(f"Labeled {rows} rows across {sum(1 for _, count, _ in results if count)} series "
+          f"in {time.perf_counter() - start:.1f}s. Saved to {output_dir}. Review questionable classifications manually.")
 
 if __name__ == '__main__':
     main()
-
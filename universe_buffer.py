@@ -0,0 +1,192 @@
+from collections import deque
+import numpy as np
+import candle_store
+
+# ✅ Universe Buffer Parameters
+UNIVERSE_WINDOW = 50  # Closed candles kept per symbol (the rolling high/low window)
+UNIVERSE_MA_PERIOD = 20
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+class UniverseBuffer:
+    """The last 'window' closed candles of every symbol, as one (symbols x window) float32 ring per field.
+
+    The still-forming candle sits beside the rings and can be replaced freely; it is committed once a
+    newer candle arrives. Rolling high/low come from a monotonic deque per symbol (O(1) amortized per
+    commit) and are mirrored into flat arrays, as is a running close sum for the MA, so the breakout
+    check for the whole universe is a handful of numpy operations instead of a loop over symbols.
+    """
+
+    def __init__(self, symbols=(), window=UNIVERSE_WINDOW, ma_period=UNIVERSE_MA_PERIOD, dtype=np.float32):
+        if window <= ma_period:
+            raise ValueError(f"window ({window}) must be longer than the MA period ({ma_period})")
+        self.window = window
+        self.ma_period = ma_period
+        self.dtype = dtype
+        self.symbols = []
+        self.index = {}
+        self.rings = {field: np.empty((0, window), dtype) for field in FIELDS}
+        self.pos = np.zeros(0, np.int64)  # Next ring slot per symbol
+        self.closed = np.zeros(0, np.int64)  # Closed candles committed per symbol
+        self.current = np.empty((0, 6))  # Forming candle per symbol: timestamp, open, high, low, close, volume
+        self.rolling_high = np.empty(0)  # Max high / min low over the closed window (NaN until the first commit)
+        self.rolling_low = np.empty(0)
+        self.close_sum = np.zeros(0)  # Sum of the last ma_period - 1 closed closes
+        self.max_deques = []  # Per symbol: (sequence, high) with decreasing highs
+        self.min_deques = []  # Per symbol: (sequence, low) with increasing lows
+        self.add(symbols)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def add(self, symbols):
+        """Adds rows for symbols not in the buffer yet."""
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.index]
+        if not new:
+            return
+        n = len(new)
+        for symbol in new:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.max_deques.append(deque())
+            self.min_deques.append(deque())
+        for field in FIELDS:
+            self.rings[field] = np.vstack([self.rings[field], np.full((n, self.window), np.nan, self.dtype)])
+        self.pos = np.concatenate([self.pos, np.zeros(n, np.int64)])
+        self.closed = np.concatenate([self.closed, np.zeros(n, np.int64)])
+        self.current = np.vstack([self.current, np.full((n, 6), np.nan)])
+        self.rolling_high = np.concatenate([self.rolling_high, np.full(n, np.nan)])
+        self.rolling_low = np.concatenate([self.rolling_low, np.full(n, np.nan)])
+        self.close_sum = np.concatenate([self.close_sum, np.zeros(n)])
+
+    def _commit(self, i):
+        """Moves symbol i's forming candle into its ring and slides the rolling windows."""
+        if np.isnan(self.current[i, 0]):
+            return
+        slot, seq = self.pos[i], self.closed[i]
+        for ring, value in zip(self.rings.values(), self.current[i, 1:]):
+            ring[i, slot] = value
+        # Read back the stored (float32) values, so the running sum and deques agree with the rings exactly
+        high, low, close = (float(self.rings[field][i, slot]) for field in ('high', 'low', 'close'))
+        m = self.ma_period - 1
+        self.close_sum[i] += close
+        if seq >= m:
+            self.close_sum[i] -= self.rings['close'][i, (slot - m) % self.window]
+
+        highs, lows = self.max_deques[i], self.min_deques[i]
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((seq, high))
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((seq, low))
+        oldest = seq - self.window + 1
+        while highs[0][0] < oldest:
+            highs.popleft()
+        while lows[0][0] < oldest:
+            lows.popleft()
+        self.rolling_high[i] = highs[0][1]
+        self.rolling_low[i] = lows[0][1]
+
+        self.pos[i] = (slot + 1) % self.window
+        self.closed[i] = seq + 1
+
+    def update(self, symbol, candle):
+        """Feeds one [timestamp, open, high, low, close, volume] candle.
+
+        The forming candle's timestamp again replaces it, a newer one commits it first, older ones are ignored.
+        """
+        i = self.index.get(symbol)
+        if i is None:
+            self.add([symbol])
+            i = self.index[symbol]
+        timestamp = self.current[i, 0]
+        if candle[0] < timestamp:
+            return
+        if candle[0] > timestamp:
+            self._commit(i)
+        self.current[i] = candle[:6]
+
+    def update_many(self, symbol, candles):
+        for candle in candles:
+            self.update(symbol, candle)
+
+    def sync(self, symbol, timeframe, store_dir=candle_store.CANDLE_STORE_DIR):
+        """Feeds the stored candles the buffer hasn't seen yet (at most the last window + 1)."""
+        candles = candle_store.load(symbol, timeframe, limit=self.window + 1, store_dir=store_dir)
+        i = self.index.get(symbol)
+        if i is not None and not np.isnan(self.current[i, 0]):
+            candles = candles[candles[:, 0] >= self.current[i, 0]]
+        self.update_many(symbol, candles)
+
+    def observe(self, prices, timestamp, step_ms):
+        """Folds snapshot prices into the forming candles, starting a new one when timestamp enters a new step.
+
+        Keeps the window moving for symbols whose candles are never fetched; a real candle for the same
+        step later replaces the synthesized one.
+        """
+        bucket = timestamp // step_ms * step_ms
+        for symbol, price in prices.items():
+            if price is None:
+                continue
+            i = self.index.get(symbol)
+            if i is None:
+                self.add([symbol])
+                i = self.index[symbol]
+            current = self.current[i]
+            if np.isnan(current[0]) or bucket > current[0]:
+                self._commit(i)
+                self.current[i] = (bucket, price, price, price, price, 0.0)
+            elif bucket == current[0]:
+                current[2] = max(current[2], price)
+                current[3] = min(current[3], price)
+                current[4] = price
+
+    def prices_array(self, prices):
+        """Aligns a {symbol: price} dict with the buffer rows (NaN where missing)."""
+        array = np.full(len(self.symbols), np.nan)
+        for symbol, price in prices.items():
+            i = self.index.get(symbol)
+            if i is not None and price is not None:
+                array[i] = price
+        return array
+
+    def ma(self):
+        """MA over the last ma_period - 1 closed closes plus the forming close (NaN until there are enough)."""
+        ma = (self.close_sum + self.current[:, 4]) / self.ma_period
+        return np.where(self.closed >= self.ma_period - 1, ma, np.nan)
+
+    def highs(self, include_current=False):
+        """Rolling high per symbol; include_current folds in the forming candle's high."""
+        if include_current:
+            return np.fmax(self.rolling_high, self.current[:, 2])
+        return self.rolling_high
+
+    def rows(self, symbols):
+        """Row indices of the given symbols (adding any the buffer doesn't have yet)."""
+        self.add(symbols)
+        return np.fromiter((self.index[symbol] for symbol in symbols), np.int64, len(symbols))
+
+    def evaluate(self, prices=None, include_current=False, above_ma=True, min_closed=None):
+        """Boolean mask over the buffer rows: price > rolling high (and > MA20 when above_ma).
+
+        prices is an array aligned with the rows (see prices_array); by default the forming close.
+        Prices are rounded to the ring dtype first, so a price equal to a stored high never counts as above it.
+        Symbols with fewer than min_closed closed candles (default: a full window) never break out.
+        """
+        prices = (self.current[:, 4] if prices is None else prices).astype(self.dtype)
+        min_closed = self.window if min_closed is None else min_closed
+        with np.errstate(invalid='ignore'):
+            mask = (self.closed >= min_closed) & (prices > self.highs(include_current).astype(self.dtype))
+            if above_ma:
+                mask &= prices > self.ma().astype(self.dtype)
+        return mask
+
+    def breakouts(self, prices=None, symbols=None, **kwargs):
+        """[(symbol, price)] for every row evaluate() flags, limited to 'symbols' when given."""
+        prices = self.current[:, 4] if prices is None else prices
+        mask = self.evaluate(prices, **kwargs)
+        if symbols is not None:
+            selected = np.zeros(len(self.symbols), bool)
+            selected[self.rows(symbols)] = True
+            mask &= selected
+        return [(self.symbols[i], float(prices[i])) for i in np.flatnonzero(mask)]